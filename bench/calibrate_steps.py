@@ -0,0 +1,479 @@
+"""
+Measures the steps of every outcome of a move on the local chain and derives the step tables of
+levels/game/consts.py from them.
+
+Every outcome (safe, lose, win) of a select_tile is played on every level it can happen on, and every
+outcome of a custom bet, with the draw forced so each one is reached. Every move is played from a game
+of its own in the same state, so the outcomes of one level only differ by the work of the outcome. The
+steps come from the metered step schedule of LocalChain, see Metrics. The padding a move burns and the
+calls of its settlement are taken out. A loss gives LOSE as its work over the safe move of the same
+level, or over the custom_bet entry of ACTION_STEP_COST for a custom bet, the largest value rounded up
+to STEP_ROUNDING. A win gives WIN as its work over the loss of the same game added to LOSE, the smallest
+value rounded down, so padding every outcome up to a loss never leaves one cheaper than the loss.
+
+MODE_STEP_COST comes from moves bet from the wallet, settled with and without batched settlement, and
+SESSION_SETTLEMENT_STEP_COST and NETTING_SETTLEMENT_STEP_COST from the same moves bet from a session
+balance and custom bets recorded in the netting ledger.
+
+The other constants of estimate_action_cost (ESTIMATE_CONSTANTS) come from the actions themselves, see
+EstimateCalibration: each action is estimated, played with its outcome forced and the constant set to the
+steps the estimate of that outcome was short of. The bench roulette does no work in its calls, so
+ROULETTE_CALL_STEP_COST is left out of the estimates while they are calibrated.
+
+  python bench/calibrate_steps.py
+"""
+
+import levels.game.step_cost
+import levels.main
+from daolevels_env import MODES, DAOlevelsEnv
+from iconservice import get_context, json_dumps
+from levels.game.consts import *
+from levels.game.rules import GameRules
+from levels.game.step_cost import StepCost
+from levels.game.payout import Payout
+from levels.game.settlement import SettlementRecord
+from levels.main import DAOlevels
+from levels.scorelib.step_padding import StepPadding
+from local_chain import ICX
+
+# steps the step tables are rounded to
+STEP_ROUNDING = 1000
+# treasury deep enough for a bet of 1 ICX to reach level 6 in every game mode
+TREASURY_MIN = 10 ** 7 * ICX
+LEVEL_MODES = [MODES['easy'], MODES['medium'], MODES['hard'], MODES['jackpot']]
+# constants of estimate_action_cost found by EstimateCalibration, in the order they are calibrated: the actions
+# calibrating one are only estimated with the constants before it
+ESTIMATE_CONSTANTS = ['create_new_game', 'cash_out', 'COMMIT_MOVE_STEP_COST', 'resolve_move', 'auto_climb',
+                      'select_tiles', 'SESSION_STEP_COST', 'NETTING_STEP_COST']
+
+
+class ForcedDraws:
+  """ Makes DAOlevels._get_random return the queued numbers. The real draw still runs, so its steps are metered. """
+
+  def __init__(self):
+    self.queue = list()
+    # steps burnt by the step padding of the moves played since the last push
+    self.padding = 0
+    self._draw = None
+    self._burn = None
+
+  def __enter__(self) -> 'ForcedDraws':
+    self._draw = DAOlevels._get_random
+    self._burn = StepPadding.burn
+    draw = self._draw
+    burn = self._burn
+    queue = self.queue
+
+    def get_random(score, brick_count: int, user_seed: str = '') -> int:
+      number = draw(score, brick_count, user_seed)
+      return queue.pop(0) if queue else number
+
+    def count_burn(units: int) -> None:
+      metrics = get_context().chain.metrics
+      steps = metrics.steps
+      burn(units)
+      self.padding += metrics.steps - steps
+
+    DAOlevels._get_random = get_random
+    StepPadding.burn = staticmethod(count_burn)
+    return self
+
+  def __exit__(self, *exc) -> None:
+    DAOlevels._get_random = self._draw
+    StepPadding.burn = staticmethod(self._burn)
+
+  def push(self, number: int) -> None:
+    self.queue.append(number)
+    self.padding = 0
+
+
+class EstimateCosts:
+  """ Sets constants of estimate_action_cost, names of ACTION_STEP_COST entries stand for the entry. """
+
+  def __init__(self, costs: dict):
+    self.costs = costs
+    self._saved = dict()
+
+  @staticmethod
+  def _module(name: str):
+    return levels.game.step_cost if name == 'ROULETTE_CALL_STEP_COST' else levels.main
+
+  def __enter__(self) -> 'EstimateCosts':
+    for name, steps in self.costs.items():
+      if name in ACTION_STEP_COST:
+        self._saved[name] = ACTION_STEP_COST[name]
+        ACTION_STEP_COST[name] = steps
+      else:
+        self._saved[name] = getattr(self._module(name), name)
+        setattr(self._module(name), name, steps)
+    return self
+
+  def __exit__(self, *exc) -> None:
+    for name, steps in self._saved.items():
+      if name in ACTION_STEP_COST:
+        ACTION_STEP_COST[name] = steps
+      else:
+        setattr(self._module(name), name, steps)
+
+
+def branch_of(outcome: int) -> int:
+  if outcome == OUTCOME_SAFE:
+    return STEP_BRANCH_SAFE
+  if outcome == OUTCOME_LOST:
+    return STEP_BRANCH_LOSE
+  return STEP_BRANCH_WIN
+
+
+def draw_for(game_mode: int, level: int, max_level: int, square_id: int, branch: int) -> int:
+  # a draw giving the outcome branch to square_id on level, 0 when the outcome can not happen there
+  rules = GameRules.for_mode(game_mode)
+  for number in range(1, rules.tiles(level) + 1):
+    if branch_of(rules.resolve(level, max_level, square_id, number)) == branch:
+      return number
+  return 0
+
+
+class Move:
+  """ Steps of one measured move. """
+
+  def __init__(self, game_mode: int, state: int, level: int, branch: int, steps: int, padding: int, settled: int):
+    self.game_mode = game_mode
+    # moves of the same state are played from games that only differ by the outcome of the move
+    self.state = state
+    self.level = level
+    self.branch = branch
+    self.steps = steps
+    self.padding = padding
+    # steps charged for the settlement calls the move made
+    self.settled = settled
+
+  @property
+  def unpadded(self) -> int:
+    return self.steps - self.padding
+
+  @property
+  def common(self) -> int:
+    # the steps of the move without the level term of StepCost.outcome
+    return self.unpadded - (self.level + 1) * STEP_SCHEDULE_SET_BYTE
+
+  @property
+  def work(self) -> int:
+    return self.unpadded - self.settled
+
+
+def new_env(**env_args) -> DAOlevelsEnv:
+  env_args.setdefault('treasury_min', TREASURY_MIN)
+  return DAOlevelsEnv(players=1, **env_args)
+
+
+def new_player(env: DAOlevelsEnv):
+  # every game gets a player of its own, so no player runs out of game slots
+  player = env.chain.create_account(10 ** 7 * ICX)
+  if env.session:
+    env.chain.invoke(player, env.score, 'deposit', None, 1000 * ICX)
+  return player
+
+
+class StepCalibration:
+  def __init__(self, **env_args):
+    self.env = new_env(**env_args)
+    self.step_cost = StepCost(env_args.get('batched_settlement', False))
+    # bets from a session balance and custom bets in the netting ledger make no settlement calls
+    self.wallet = not self.env.session and not env_args.get('netting_epoch_bets')
+    # the first bet builds the cached bet limits and the ledgers, work no outcome of a later move does
+    player = self._new_player()
+    assert self.env.custom_bet(player, CUSTOM_TILE_COUNTS[0], 1, ICX).status
+    assert self.env.create_game(player, MODES['easy'], ICX).status
+
+  def _new_player(self):
+    return new_player(self.env)
+
+  def _settled(self, record: SettlementRecord) -> int:
+    return self.step_cost.charged_settlement(record) if self.wallet else 0
+
+  def level_move(self, game_mode: int, level: int, branch: int) -> Move:
+    """ Plays a game of game_mode up to level and measures the move played there, None when branch can not happen """
+    env = self.env
+    bet_amount = PROMO_ENTRY_VALUE if game_mode == MODES['jackpot'] else ICX
+    max_level = MAX_ROW_HEIGHT
+    number = draw_for(game_mode, level, max_level, 1, branch)
+    if not number:
+      return None
+    player = self._new_player()
+    with ForcedDraws() as draws:
+      result = env.create_game(player, game_mode, bet_amount)
+      assert result.status, result.error
+      slot = env.new_game_slot(result)
+      for climbed in range(level):
+        draws.push(draw_for(game_mode, climbed, max_level, 1, STEP_BRANCH_SAFE))
+        assert env.select_tile(player, slot, 1).status
+      draws.push(number)
+      result = env.select_tile(player, slot, 1)
+    assert result.status, result.error
+    record = None
+    if branch != STEP_BRANCH_SAFE:
+      rules = GameRules.for_mode(game_mode)
+      payout = rules.balance(bet_amount, level + 1) if branch == STEP_BRANCH_WIN else 0
+      record = SettlementRecord(0, bet_amount, rules.balance(bet_amount, level), payout)
+    return Move(game_mode, level, level, branch, result.metrics['steps'], draws.padding, self._settled(record))
+
+  def custom_move(self, number_of_tiles: int, branch: int) -> Move:
+    player = self._new_player()
+    with ForcedDraws() as draws:
+      draws.push(1 if branch == STEP_BRANCH_LOSE else 2)
+      result = self.env.custom_bet(player, number_of_tiles, 1, ICX)
+    assert result.status, result.error
+    payout = Payout.custom(ICX, number_of_tiles) if branch == STEP_BRANCH_WIN else 0
+    settled = self._settled(SettlementRecord(0, ICX, 0, payout))
+    return Move(MODES['custom'], number_of_tiles, 0, branch, result.metrics['steps'], draws.padding, settled)
+
+  def moves(self, game_mode: int) -> list:
+    if game_mode == MODES['custom']:
+      return [self.custom_move(number_of_tiles, branch) for number_of_tiles in CUSTOM_TILE_COUNTS
+              for branch in (STEP_BRANCH_LOSE, STEP_BRANCH_WIN)]
+    moves = [self.level_move(game_mode, level, branch) for level in range(MAX_ROW_HEIGHT)
+             for branch in (STEP_BRANCH_SAFE, STEP_BRANCH_LOSE, STEP_BRANCH_WIN)]
+    return [move for move in moves if move is not None]
+
+  @staticmethod
+  def action_steps(moves: list) -> dict:
+    # ACTION_STEP_COST with select_tile taken from the most expensive safe move and custom_bet from the cheapest
+    # custom loss
+    safe_moves = [move.common for move in moves if move.branch == STEP_BRANCH_SAFE]
+    custom_losses = [move.work for move in moves if move.game_mode == MODES['custom'] and
+                     move.branch == STEP_BRANCH_LOSE]
+    return dict(ACTION_STEP_COST, select_tile=round_up(max(safe_moves)), custom_bet=-round_up(-min(custom_losses)))
+
+  @staticmethod
+  def step_costs(move_lists: list, action_steps: dict) -> list:
+    """
+    [SAFE, LOSE, WIN] of the step table of one settlement path, 0 for an outcome that did not happen. A loss
+    cheaper than a safe move is charged as much
+    :param move_lists: the moves of one game mode played on each chain the path is calibrated on
+    """
+    lose, win = list(), list()
+    for moves in move_lists:
+      states = dict()
+      for move in moves:
+        states.setdefault(move.state, dict())[move.branch] = move
+      for outcomes in states.values():
+        loss = outcomes[STEP_BRANCH_LOSE]
+        if STEP_BRANCH_SAFE in outcomes:
+          lose.append(loss.work - outcomes[STEP_BRANCH_SAFE].work)
+        elif loss.game_mode == MODES['custom']:
+          lose.append(loss.work - action_steps['custom_bet'])
+        if STEP_BRANCH_WIN in outcomes:
+          win.append(outcomes[STEP_BRANCH_WIN].work - loss.work)
+    costs = [0, max(round_up(max(lose)), 0), 0]
+    if win:
+      costs[STEP_BRANCH_WIN] = costs[STEP_BRANCH_LOSE] - round_up(-min(win))
+    return costs
+
+
+class Estimate:
+  """ One action played against its estimate. """
+
+  def __init__(self, constant: str, name: str, branch: str, steps: int, estimated: int, unset: int, per_step: int):
+    self.constant = constant
+    self.name = name
+    self.branch = branch
+    self.steps = steps
+    # estimate of the outcome played with the constants of levels/game/consts.py
+    self.estimated = estimated
+    # the same estimate with constant set to 0 and the ones calibrated before it, and the times it holds constant
+    self.unset = unset
+    self.per_step = per_step
+
+  @property
+  def required(self) -> int:
+    # the value of constant making the estimate cover the action
+    return -(-(self.steps - self.unset) // self.per_step)
+
+
+class EstimateCalibration:
+  """
+  Plays every action of a level game and of a custom bet with each settlement path and finds ESTIMATE_CONSTANTS
+  from the outcomes the estimates of those actions give. The ACTION_STEP_COST entries of select_tile and
+  custom_bet and the step tables come from StepCalibration.
+  """
+
+  def __init__(self):
+    self.costs = {name: 0 for name in ESTIMATE_CONSTANTS}
+    self.estimates = list()
+    for constant in ESTIMATE_CONSTANTS:
+      getattr(self, f'_calibrate_{constant.lower()}')(constant)
+      self.costs[constant] = round_up(max(0, *[estimate.required for estimate in self.estimates
+                                               if estimate.constant == constant]))
+
+  def play(self, constant: str, env: DAOlevelsEnv, player, name: str, params: dict, value: int, branch: str,
+           draws: list = ()):
+    """ Estimates action(name, params) and plays it with draws forced, the estimate of branch is recorded """
+    model = json_dumps({'name': name, 'params': params})
+    query = {'model': model, 'player_address': player, 'value': value}
+    transaction = StepCost.transaction(len(json_dumps({'method': 'action', 'params': {'model': model}}).encode()))
+
+    estimated = env.query('estimate_action_cost', query)['branches'][branch]
+    unset = list()
+    for steps in (0, STEP_ROUNDING):
+      with EstimateCosts(dict(self.costs, ROULETTE_CALL_STEP_COST=0, **{constant: steps})):
+        unset.append(env.query('estimate_action_cost', query)['branches'][branch])
+    with ForcedDraws() as forced:
+      for number in draws:
+        forced.push(number)
+      result = env.action(player, name, params, value)
+    assert result.status, result.error
+    self.estimates.append(Estimate(constant, name, branch, result.metrics['steps'], estimated - transaction,
+                                   unset[0] - transaction, (unset[1] - unset[0]) // STEP_ROUNDING))
+    return result
+
+  def _open(self, env: DAOlevelsEnv, game_mode: int = MODES['easy'], climbed: int = 0) -> tuple:
+    # a new player with a game of game_mode climbed up to level climbed
+    player = new_player(env)
+    bet_amount = PROMO_ENTRY_VALUE if game_mode == MODES['jackpot'] else ICX
+    with ForcedDraws() as forced:
+      for level in range(climbed):
+        forced.push(draw_for(game_mode, level, MAX_ROW_HEIGHT, 1, STEP_BRANCH_SAFE))
+      slot = env.new_game_slot(env.create_game(player, game_mode, bet_amount))
+      for _ in range(climbed):
+        assert env.select_tile(player, slot, 1).status
+    return player, slot
+
+  @staticmethod
+  def _new_game(env: DAOlevelsEnv, game_mode: int) -> tuple:
+    bet_amount = PROMO_ENTRY_VALUE if game_mode == MODES['jackpot'] else ICX
+    if env.session:
+      return {'game_mode': game_mode, 'bet_amount': bet_amount}, 0
+    return {'game_mode': game_mode}, bet_amount
+
+  @staticmethod
+  def _custom_bet(env: DAOlevelsEnv, number_of_tiles: int) -> tuple:
+    params = {'number_of_tiles': number_of_tiles, 'square_id': 1, 'user_seed': ''}
+    if env.session:
+      return dict(params, bet_amount=ICX), 0
+    return params, ICX
+
+  @staticmethod
+  def _draws(game_mode: int, level: int, branches: list) -> list:
+    # draws of the moves of a game played from level with branches
+    return [draw_for(game_mode, level + index, MAX_ROW_HEIGHT, 1, branch) for index, branch in enumerate(branches)]
+
+  def _calibrate_create_new_game(self, constant: str) -> None:
+    # the first game builds the bet limits table, so does the first one after its refresh window
+    env = new_env()
+    for game_mode in (MODES['easy'], MODES['easy'], MODES['jackpot']):
+      self.play(constant, env, new_player(env), 'create_new_game', *self._new_game(env, game_mode), 'open')
+    env.chain.block_height += LIMITS_REFRESH_WINDOW
+    self.play(constant, env, new_player(env), 'create_new_game', *self._new_game(env, MODES['easy']), 'open')
+
+  def _calibrate_cash_out(self, constant: str) -> None:
+    for batched_settlement in (False, True):
+      env = new_env(batched_settlement=batched_settlement)
+      for climbed in (1, MAX_ROW_HEIGHT - 1):
+        player, slot = self._open(env, MODES['easy'], climbed)
+        self.play(constant, env, player, 'cash_out', {'active_game_num': slot}, 0, 'cash_out')
+
+  def _calibrate_commit_move_step_cost(self, constant: str) -> None:
+    env = new_env(commit_reveal_seeds=20)
+    player, slot = self._open(env)
+    self.play(constant, env, player, 'select_tile', {'active_game_num': slot, 'square_id': 1, 'user_seed': ''}, 0,
+              'commit')
+
+  def _calibrate_resolve_move(self, constant: str) -> None:
+    env = new_env(commit_reveal_seeds=20)
+    for branch in (STEP_BRANCH_SAFE, STEP_BRANCH_LOSE):
+      player, slot = self._open(env)
+      assert env.select_tile(player, slot, 1).status
+      for _ in range(2):
+        assert env.reveal_seed().status
+      self.play(constant, env, player, 'resolve_move', {'active_game_num': slot}, 0, STEP_BRANCH_NAMES[branch],
+                self._draws(MODES['easy'], 0, [branch]))
+
+  def _calibrate_auto_climb(self, constant: str) -> None:
+    safe = STEP_BRANCH_SAFE
+    # (square_ids, branches of the moves, cash_out, branch of the action)
+    climbs = [
+      ([1], [safe], False, 'safe'),
+      ([1] * 3, [safe] * 3, True, 'cash_out'),
+      ([1] * 3, [safe, STEP_BRANCH_LOSE], False, 'lose'),
+      ([1] * MAX_ROW_HEIGHT, [safe] * (MAX_ROW_HEIGHT - 1) + [STEP_BRANCH_WIN], False, 'win')
+    ]
+    for batched_settlement in (False, True):
+      env = new_env(batched_settlement=batched_settlement)
+      for square_ids, branches, cash_out, branch in climbs:
+        player, slot = self._open(env)
+        params = {'active_game_num': slot, 'square_ids': square_ids, 'user_seed': '', 'stop_at_level': 0,
+                  'cash_out': cash_out}
+        self.play(constant, env, player, 'auto_climb', params, 0, branch, self._draws(MODES['easy'], 0, branches))
+
+  def _calibrate_select_tiles(self, constant: str) -> None:
+    for env_args in ({}, {'batched_settlement': True}, {'commit_reveal_seeds': 20}):
+      env = new_env(**env_args)
+      for count in (1, 3):
+        for branch in (STEP_BRANCH_SAFE, STEP_BRANCH_LOSE):
+          player = new_player(env)
+          slots = [env.new_game_slot(env.create_game(player, MODES['easy'], ICX)) for _ in range(count)]
+          moves = [[slot, 1, ''] for slot in slots]
+          name = 'commit' if env.commit_reveal else STEP_BRANCH_NAMES[branch]
+          draws = [] if env.commit_reveal else self._draws(MODES['easy'], 0, [branch]) * count
+          self.play(constant, env, player, 'select_tiles', {'moves': moves}, 0, name, draws)
+          if env.commit_reveal:
+            break
+
+  def _calibrate_session_step_cost(self, constant: str) -> None:
+    env = new_env(session_deposit=1000 * ICX)
+    for game_mode in (MODES['easy'], MODES['jackpot']):
+      self.play(constant, env, new_player(env), 'create_new_game', *self._new_game(env, game_mode), 'open')
+      player, slot = self._open(env, game_mode)
+      self.play(constant, env, player, 'select_tile', {'active_game_num': slot, 'square_id': 1, 'user_seed': ''}, 0,
+                'lose', self._draws(game_mode, 0, [STEP_BRANCH_LOSE]))
+    player, slot = self._open(env, MODES['easy'], MAX_ROW_HEIGHT - 1)
+    self.play(constant, env, player, 'cash_out', {'active_game_num': slot}, 0, 'cash_out')
+    self._custom_bets(constant, env)
+
+  def _calibrate_netting_step_cost(self, constant: str) -> None:
+    env = new_env(netting_epoch_bets=100)
+    self._custom_bets(constant, env)
+
+  def _custom_bets(self, constant: str, env: DAOlevelsEnv) -> None:
+    for number_of_tiles in CUSTOM_TILE_COUNTS:
+      for branch in (STEP_BRANCH_LOSE, STEP_BRANCH_WIN):
+        self.play(constant, env, new_player(env), 'custom_bet', *self._custom_bet(env, number_of_tiles),
+                  STEP_BRANCH_NAMES[branch], [1 if branch == STEP_BRANCH_LOSE else 2])
+
+
+def round_up(steps: int) -> int:
+  return -(-steps // STEP_ROUNDING) * STEP_ROUNDING
+
+
+def main() -> None:
+  wallet = [StepCalibration(), StepCalibration(batched_settlement=True)]
+  session = StepCalibration(session_deposit=1000 * ICX)
+  netting = StepCalibration(netting_epoch_bets=100)
+  moves = {game_mode: [calibration.moves(game_mode) for calibration in wallet] for game_mode in MODES.values()}
+  action_steps = StepCalibration.action_steps([move for mode_moves in moves.values() for move in mode_moves[0]])
+  for action in ('select_tile', 'custom_bet'):
+    print(f"ACTION_STEP_COST['{action}'] = {action_steps[action]}  (now {ACTION_STEP_COST[action]})")
+  for name, game_mode in MODES.items():
+    print(f'{name.upper()}_STEP_COST = {StepCalibration.step_costs(moves[game_mode], action_steps)}  '
+          f'(now {MODE_STEP_COST[game_mode]})')
+    for move in moves[game_mode][0]:
+      print(f'  state {move.state}  {STEP_BRANCH_NAMES[move.branch]:<5} steps {move.steps:>7}  '
+            f'padding {move.padding:>6}  unpadded {move.unpadded:>7}  work {move.work:>7}')
+  for name, game_mode in MODES.items():
+    costs = StepCalibration.step_costs([session.moves(game_mode)], action_steps)
+    print(f'SESSION_SETTLEMENT_STEP_COST {name} = {costs}  (now {SESSION_SETTLEMENT_STEP_COST[game_mode]})')
+  costs = StepCalibration.step_costs([netting.moves(MODES['custom'])], action_steps)
+  print(f'NETTING_SETTLEMENT_STEP_COST = {costs}  (now {NETTING_SETTLEMENT_STEP_COST})')
+
+  estimates = EstimateCalibration()
+  for constant in ESTIMATE_CONSTANTS:
+    now = ACTION_STEP_COST[constant] if constant in ACTION_STEP_COST else getattr(levels.main, constant)
+    print(f'{constant} = {estimates.costs[constant]}  (now {now})')
+    for estimate in estimates.estimates:
+      if estimate.constant == constant:
+        print(f'  {estimate.name:<15} {estimate.branch:<8} steps {estimate.steps:>7}  '
+              f'estimated {estimate.estimated:>7}  required {estimate.required:>7}')
+
+
+if __name__ == '__main__':
+  main()
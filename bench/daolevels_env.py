@@ -0,0 +1,149 @@
+"""
+DAOlevels deployed on a LocalChain with a fake roulette treasury, plus helpers to send actions.
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from iconservice import sha3_256
+from local_chain import ICX, LocalChain
+from levels.main import DAOlevels
+from levels.repository.game_model import GameMode
+
+MODES = {
+  'easy': GameMode.EASY,
+  'medium': GameMode.MEDIUM,
+  'hard': GameMode.HARD,
+  'jackpot': GameMode.JACKPOT,
+  'custom': GameMode.CUSTOM
+}
+
+
+class DAOlevelsEnv:
+  def __init__(self, seed: int = 0, players: int = 20, treasury_min: int = 100000 * ICX,
+               batched_settlement: bool = False, netting_epoch_bets: int = None, typed: bool = False,
+               commit_reveal_seeds: int = 0, session_deposit: int = 0):
+    self.chain = LocalChain(seed)
+    # send create_game, select_tile, cash_out and custom_bet through the typed externals instead of action
+    self.typed = typed
+    self.owner = self.chain.create_account(10 ** 6 * ICX)
+    self.roulette = self.chain.deploy_roulette(treasury_min, 10 ** 9 * ICX)
+    self.score = self.chain.deploy(DAOlevels, self.owner)
+    self.players = [self.chain.create_account(10 ** 7 * ICX) for _ in range(players)]
+
+    self._setup(self.owner, 'set_roulette_score', {'score': self.roulette.address})
+    self._setup(self.owner, 'set_game_admin', {'admin_address': self.owner})
+    self._setup(self.owner, 'turn_game_on')
+    self._setup(self.owner, 'turn_promo_on')
+    self._setup(self.owner, 'set_batched_settlement', {'on': batched_settlement})
+    if netting_epoch_bets is not None:
+      self._setup(self.owner, 'set_custom_netting',
+                  {'on': True, 'epoch_bets': netting_epoch_bets, 'float_limit': 1000 * ICX})
+    # with commit_reveal_seeds set select_tile commits the move to a house seed chain of that length,
+    # the seeds are revealed backwards by reveal_seed
+    self.commit_reveal = commit_reveal_seeds > 0
+    self._seeds = list()
+    if self.commit_reveal:
+      self._seeds = [sha3_256(str(seed).encode())]
+      for _ in range(commit_reveal_seeds):
+        self._seeds.append(sha3_256(self._seeds[-1]))
+      self._setup(self.owner, 'commit_seed_chain', {'commitment': self._seeds.pop(), 'length': commit_reveal_seeds})
+      self._setup(self.owner, 'set_commit_reveal', {'on': True})
+    # with session_deposit set every player deposits it once and bets are taken from the session balance
+    self.session = session_deposit > 0
+    if self.session:
+      self._setup(self.owner, 'set_session_settlement', {'float_limit': 1000 * ICX})
+      for player in self.players:
+        result = self.chain.invoke(player, self.score, 'deposit', None, session_deposit)
+        if not result.status:
+          raise RuntimeError(f'deposit failed: {result.error}')
+    # the promo part of a jackpot win is paid from the DAOlevels balance
+    self.chain.transfer(self.owner, self.score, 100000 * ICX)
+
+  def _setup(self, sender, method: str, params: dict = None) -> None:
+    result = self.chain.invoke(sender, self.score, method, params)
+    if not result.status:
+      raise RuntimeError(f'{method} failed: {result.error}')
+
+  # ================================================
+  #  Actions
+  # ================================================
+  def action(self, player, name: str, params: dict, value: int = 0):
+    model = json.dumps({'name': name, 'params': params})
+    return self.chain.invoke(player, self.score, 'action', {'model': model}, value)
+
+  def create_game(self, player, game_mode: int, bet_amount: int):
+    if self.session:
+      if self.typed:
+        return self.chain.invoke(player, self.score, 'create_game', {'mode': game_mode, 'bet': bet_amount})
+      return self.action(player, 'create_new_game', {'game_mode': game_mode, 'bet_amount': bet_amount})
+    if self.typed:
+      return self.chain.invoke(player, self.score, 'create_game', {'mode': game_mode}, bet_amount)
+    return self.action(player, 'create_new_game', {'game_mode': game_mode}, bet_amount)
+
+  def select_tile(self, player, active_game_num: int, square_id: int, user_seed: str = ''):
+    if self.typed:
+      return self.chain.invoke(player, self.score, 'select_tile',
+                               {'slot': active_game_num, 'square': square_id, 'seed': user_seed})
+    return self.action(player, 'select_tile',
+                       {'active_game_num': active_game_num, 'square_id': square_id, 'user_seed': user_seed})
+
+  def select_tiles(self, player, moves: list):
+    # moves: [[active_game_num, square_id, user_seed], ...]
+    return self.action(player, 'select_tiles', {'moves': moves})
+
+  def cash_out(self, player, active_game_num: int):
+    if self.typed:
+      return self.chain.invoke(player, self.score, 'cash_out', {'slot': active_game_num})
+    return self.action(player, 'cash_out', {'active_game_num': active_game_num})
+
+  def resolve_move(self, player, active_game_num: int):
+    if self.typed:
+      return self.chain.invoke(player, self.score, 'resolve_move', {'slot': active_game_num})
+    return self.action(player, 'resolve_move', {'active_game_num': active_game_num})
+
+  def reveal_seed(self):
+    return self.chain.invoke(self.owner, self.score, 'reveal_seed', {'seed': self._seeds.pop()})
+
+  def auto_climb(self, player, active_game_num: int, square_ids: list, user_seed: str = '',
+                 stop_at_level: int = 0, cash_out: bool = False):
+    return self.action(player, 'auto_climb',
+                       {'active_game_num': active_game_num, 'square_ids': square_ids, 'user_seed': user_seed,
+                        'stop_at_level': stop_at_level, 'cash_out': cash_out})
+
+  def custom_bet(self, player, number_of_tiles: int, square_id: int, bet_amount: int, user_seed: str = ''):
+    if self.session:
+      if self.typed:
+        return self.chain.invoke(player, self.score, 'custom_bet',
+                                 {'tiles': number_of_tiles, 'square': square_id, 'seed': user_seed, 'bet': bet_amount})
+      return self.action(player, 'custom_bet',
+                         {'number_of_tiles': number_of_tiles, 'square_id': square_id, 'user_seed': user_seed,
+                          'bet_amount': bet_amount})
+    if self.typed:
+      return self.chain.invoke(player, self.score, 'custom_bet',
+                               {'tiles': number_of_tiles, 'square': square_id, 'seed': user_seed}, bet_amount)
+    return self.action(player, 'custom_bet',
+                       {'number_of_tiles': number_of_tiles, 'square_id': square_id, 'user_seed': user_seed},
+                       bet_amount)
+
+  def query(self, method: str, params: dict = None):
+    return self.chain.query(self.score, method, params)
+
+  # ================================================
+  #  Result helpers
+  # ================================================
+  @staticmethod
+  def new_game_slot(result) -> int:
+    for event in result.events:
+      if event.name == 'NewGameStarted':
+        return json.loads(event.args[0])['active_game_num']
+    raise RuntimeError(f'No game started: {result.error}')
+
+  @staticmethod
+  def game_over(result) -> bool:
+    # the game stays open only while every tile resolved in the transaction was safe
+    results = [event.args[1] for event in result.events if event.name == 'SelectedSquareResult']
+    return not results or not results[-1].startswith('SAFE')
@@ -0,0 +1,97 @@
+"""
+Plays games on the local chain and exports the blocks in the ICON JSON-RPC layout read by
+indexer/event_indexer.py, one file per --blocks-per-file blocks.
+
+  python bench/export_eventlogs.py fixtures/ --games 500 --modes easy,medium,hard,jackpot,custom
+"""
+
+import argparse
+import json
+import os
+
+from iconservice import Address
+from daolevels_env import MODES, DAOlevelsEnv
+from local_chain import ICX
+from run_benchmark import Benchmark
+
+
+def encode_value(value) -> tuple:
+  # (ICON type name, JSON-RPC encoding) of an eventlog argument
+  if isinstance(value, bool):
+    return 'bool', hex(int(value))
+  if isinstance(value, int):
+    return 'int', hex(value)
+  if isinstance(value, Address):
+    return 'Address', str(value)
+  if isinstance(value, bytes):
+    return 'bytes', '0x' + value.hex()
+  return 'str', str(value)
+
+
+class EventlogExporter:
+  def __init__(self, directory: str, blocks_per_file: int = 500):
+    self._directory = directory
+    self._blocks_per_file = blocks_per_file
+    self._blocks = list()
+    self.files = 0
+    os.makedirs(directory, exist_ok=True)
+
+  def __call__(self, sender, score_address, method: str, params: dict, value: int, result) -> None:
+    event_logs = list()
+    for event in result.events:
+      encoded = [encode_value(arg) for arg in list(event.args) + list(event.kwargs.values())]
+      event_logs.append({
+        'scoreAddress': str(event.score_address),
+        'indexed': [f'{event.name}({",".join(name for name, _ in encoded)})'] +
+                   [value for _, value in encoded[:event.indexed]],
+        'data': [value for _, value in encoded[event.indexed:]]
+      })
+    tx = {
+      'txHash': '0x' + result.tx_hash.hex(),
+      'from': str(sender),
+      'to': str(score_address),
+      'value': hex(value),
+      'status': hex(result.status),
+      'data': {'method': method, 'params': {key: encode_value(param)[1] for key, param in params.items()}},
+      'eventLogs': event_logs
+    }
+    self._blocks.append({'height': result.block_height, 'timestamp': result.timestamp, 'transactions': [tx]})
+    if len(self._blocks) == self._blocks_per_file:
+      self.flush()
+
+  def flush(self) -> None:
+    if not self._blocks:
+      return
+    name = f'blocks_{self._blocks[0]["height"]:09d}-{self._blocks[-1]["height"]:09d}.json'
+    with open(os.path.join(self._directory, name), 'w') as file:
+      json.dump(self._blocks, file)
+    self._blocks = list()
+    self.files += 1
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description='Export DAOlevels blocks from the local chain')
+  parser.add_argument('directory')
+  parser.add_argument('--games', type=int, default=500, help='games played per mode')
+  parser.add_argument('--modes', default='easy,medium,hard,jackpot,custom')
+  parser.add_argument('--strategy', choices=['select', 'auto', 'batch'], default='select')
+  parser.add_argument('--blocks-per-file', type=int, default=500)
+  parser.add_argument('--typed', action='store_true', help='use the typed externals instead of action')
+  parser.add_argument('--commit-reveal', type=int, default=0, metavar='SEEDS',
+                      help='commit select_tile moves to a house seed chain of SEEDS seeds')
+  parser.add_argument('--session', type=int, default=0, metavar='DEPOSIT',
+                      help='every player deposits DEPOSIT ICX once and bets from the session balance')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+
+  env = DAOlevelsEnv(args.seed, typed=args.typed, commit_reveal_seeds=args.commit_reveal,
+                    session_deposit=args.session * ICX)
+  exporter = EventlogExporter(args.directory, args.blocks_per_file)
+  env.chain.listeners.append(exporter)
+  Benchmark(env, args.seed).run([MODES[mode] for mode in args.modes.split(',')], args.games, args.strategy)
+  exporter.flush()
+  print(f'{exporter.files} files written to {args.directory}, last block {env.chain.block_height}')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,467 @@
+"""
+In-memory stand-in for the parts of iconservice used by the DAOlevels SCORE.
+
+It is only meant to run the SCORE offline from the bench harness, see bench/local_chain.py.
+Storage, transfers, inter-score calls and eventlogs are routed through the Context set by the
+LocalChain, which also keeps the counters reported by the benchmark.
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+__all__ = [
+  'Address', 'AddressPrefix', 'IconScoreBase', 'IconScoreDatabase', 'IconScoreException', 'InterfaceScore',
+  'Logger', 'VarDB', 'DictDB', 'ArrayDB', 'eventlog', 'external', 'interface', 'payable', 'revert',
+  'json_dumps', 'json_loads', 'sha3_256'
+]
+
+
+# ================================================
+#  Context
+# ================================================
+class Context:
+  """ Per transaction state, installed by the LocalChain before a SCORE method runs. """
+
+  def __init__(self, chain, msg, tx, block_height: int, timestamp: int, readonly: bool = False):
+    self.chain = chain
+    self.msg = msg
+    self.tx = tx
+    self.block_height = block_height
+    self.timestamp = timestamp
+    self.readonly = readonly
+
+
+_CONTEXT = None
+
+
+def set_context(context) -> None:
+  global _CONTEXT
+  _CONTEXT = context
+
+
+def get_context():
+  return _CONTEXT
+
+
+# ================================================
+#  Errors and helpers
+# ================================================
+class IconScoreException(Exception):
+  pass
+
+
+def revert(message: str = None, code: int = 0) -> None:
+  raise IconScoreException(message)
+
+
+def _charge_api_call(function: str, size: int) -> None:
+  chain = _CONTEXT.chain if _CONTEXT is not None else None
+  if chain is not None:
+    chain.metrics.api_calls += 1
+    chain.metrics.steps += chain.metrics.api_call(function, size)
+
+
+def json_dumps(obj) -> str:
+  text = json.dumps(obj, separators=(',', ':'))
+  _charge_api_call('json_dumps', len(text.encode()))
+  return text
+
+
+def json_loads(src: str):
+  _charge_api_call('json_loads', len(src.encode()))
+  return json.loads(src)
+
+
+def sha3_256(data: bytes) -> bytes:
+  _charge_api_call('sha3_256', len(data))
+  return hashlib.sha3_256(data).digest()
+
+
+class Logger:
+  @staticmethod
+  def debug(msg: str, tag: str = '') -> None:
+    pass
+
+  @staticmethod
+  def info(msg: str, tag: str = '') -> None:
+    pass
+
+  @staticmethod
+  def warning(msg: str, tag: str = '') -> None:
+    pass
+
+  @staticmethod
+  def error(msg: str, tag: str = '') -> None:
+    pass
+
+
+# ================================================
+#  Address
+# ================================================
+class AddressPrefix:
+  EOA = 0
+  CONTRACT = 1
+
+
+class Address:
+  def __init__(self, prefix: int, body: bytes):
+    self.prefix = prefix
+    self.body = body
+
+  @staticmethod
+  def from_string(address: str) -> 'Address':
+    prefix = AddressPrefix.CONTRACT if address[:2] == 'cx' else AddressPrefix.EOA
+    return Address(prefix, bytes.fromhex(address[2:]))
+
+  @staticmethod
+  def from_data(prefix: int, data: bytes) -> 'Address':
+    return Address(prefix, hashlib.sha3_256(data).digest()[-20:])
+
+  @staticmethod
+  def from_bytes(data: bytes) -> 'Address':
+    if len(data) == 21:
+      return Address(data[0], data[1:])
+    return Address(AddressPrefix.EOA, data)
+
+  @property
+  def is_contract(self) -> bool:
+    return self.prefix == AddressPrefix.CONTRACT
+
+  def to_bytes(self) -> bytes:
+    if self.is_contract:
+      return bytes([AddressPrefix.CONTRACT]) + self.body
+    return self.body
+
+  def __str__(self) -> str:
+    return ('cx' if self.is_contract else 'hx') + self.body.hex()
+
+  def __repr__(self) -> str:
+    return str(self)
+
+  def __eq__(self, other) -> bool:
+    return isinstance(other, Address) and self.prefix == other.prefix and self.body == other.body
+
+  def __ne__(self, other) -> bool:
+    return not self.__eq__(other)
+
+  def __hash__(self) -> int:
+    return hash((self.prefix, self.body))
+
+
+# ================================================
+#  Storage
+# ================================================
+class IconScoreDatabase:
+  """ Key value storage of one SCORE, writes are journaled until the transaction commits. """
+
+  def __init__(self, address: Address, metrics):
+    self.address = address
+    self._storage = dict()
+    self._journal = None
+    self._metrics = metrics
+
+  def begin(self) -> None:
+    self._journal = dict()
+
+  def commit(self) -> None:
+    if self._journal:
+      for key, value in self._journal.items():
+        if value is None:
+          self._storage.pop(key, None)
+        else:
+          self._storage[key] = value
+    self._journal = None
+
+  def rollback(self) -> None:
+    self._journal = None
+
+  def get(self, key: bytes):
+    self._metrics.reads += 1
+    if self._journal is not None and key in self._journal:
+      value = self._journal[key]
+    else:
+      value = self._storage.get(key)
+    if value is not None:
+      self._metrics.bytes_read += len(value)
+    return value
+
+  def put(self, key: bytes, value: bytes) -> None:
+    self._check_writable()
+    self._metrics.writes += 1
+    self._metrics.bytes_written += len(key) + len(value)
+    if self._stored(key) is None:
+      self._metrics.steps += len(value) * self._metrics.STEP_SET_BYTE
+    else:
+      self._metrics.steps += len(value) * self._metrics.STEP_REPLACE_BYTE
+    self._write(key, value)
+
+  def delete(self, key: bytes) -> None:
+    self._check_writable()
+    self._metrics.deletes += 1
+    stored = self._stored(key)
+    if stored is not None:
+      self._metrics.steps += len(stored) * self._metrics.STEP_DELETE_BYTE
+    self._write(key, None)
+
+  def _stored(self, key: bytes):
+    # the value held under key, without counting a read
+    if self._journal is not None and key in self._journal:
+      return self._journal[key]
+    return self._storage.get(key)
+
+  def _write(self, key: bytes, value) -> None:
+    if self._journal is not None:
+      self._journal[key] = value
+    elif value is None:
+      self._storage.pop(key, None)
+    else:
+      self._storage[key] = value
+
+  def _check_writable(self) -> None:
+    if _CONTEXT is not None and _CONTEXT.readonly:
+      raise IconScoreException('Storage is readonly in a query call')
+
+  def __len__(self) -> int:
+    return len(self._storage)
+
+  @property
+  def size(self) -> int:
+    # bytes held in committed storage
+    return sum(len(key) + len(value) for key, value in self._storage.items())
+
+
+def _encode(value) -> bytes:
+  if isinstance(value, bool):
+    value = int(value)
+  if isinstance(value, int):
+    return value.to_bytes((value.bit_length() + 8) // 8, 'big', signed=True)
+  if isinstance(value, str):
+    return value.encode()
+  if isinstance(value, bytes):
+    return value
+  if isinstance(value, Address):
+    return value.to_bytes()
+  raise IconScoreException(f'Unsupported value type: {type(value)}')
+
+
+def _decode(data, value_type):
+  if data is None:
+    if value_type == int:
+      return 0
+    if value_type == str:
+      return ""
+    if value_type == bool:
+      return False
+    return None
+  if value_type == int:
+    return int.from_bytes(data, 'big', signed=True)
+  if value_type == str:
+    return data.decode()
+  if value_type == bool:
+    return bool(int.from_bytes(data, 'big', signed=True))
+  if value_type == Address:
+    return Address.from_bytes(data)
+  return data
+
+
+def _key(*parts) -> bytes:
+  return b'|'.join(_encode(part) for part in parts)
+
+
+class VarDB:
+  def __init__(self, var_key, db: IconScoreDatabase, value_type: type):
+    self._key = _key(b'var', var_key)
+    self._db = db
+    self._value_type = value_type
+
+  def set(self, value) -> None:
+    self._db.put(self._key, _encode(value))
+
+  def get(self):
+    return _decode(self._db.get(self._key), self._value_type)
+
+  def remove(self) -> None:
+    self._db.delete(self._key)
+
+
+class DictDB:
+  def __init__(self, var_key, db: IconScoreDatabase, value_type: type, depth: int = 1, _prefix: bytes = None):
+    self._prefix = _prefix if _prefix is not None else _key(b'dict', var_key)
+    self._db = db
+    self._value_type = value_type
+    self._depth = depth
+
+  def _item_key(self, key) -> bytes:
+    return self._prefix + b'|' + _encode(key)
+
+  def __getitem__(self, key):
+    if self._depth > 1:
+      return DictDB(None, self._db, self._value_type, self._depth - 1, self._item_key(key))
+    return _decode(self._db.get(self._item_key(key)), self._value_type)
+
+  def __setitem__(self, key, value) -> None:
+    if self._depth > 1:
+      raise IconScoreException('DictDB depth mismatch')
+    self._db.put(self._item_key(key), _encode(value))
+
+  def __contains__(self, key) -> bool:
+    return self._db.get(self._item_key(key)) is not None
+
+  def __delitem__(self, key) -> None:
+    self._db.delete(self._item_key(key))
+
+  def remove(self, key) -> None:
+    self.__delitem__(key)
+
+
+class ArrayDB:
+  def __init__(self, var_key, db: IconScoreDatabase, value_type: type):
+    self._prefix = _key(b'array', var_key)
+    self._size_key = self._prefix + b'|size'
+    self._db = db
+    self._value_type = value_type
+
+  def _size(self) -> int:
+    return _decode(self._db.get(self._size_key), int)
+
+  def put(self, value) -> None:
+    size = self._size()
+    self._db.put(self._prefix + b'|' + _encode(size), _encode(value))
+    self._db.put(self._size_key, _encode(size + 1))
+
+  def pop(self):
+    size = self._size()
+    if size == 0:
+      return None
+    value = self.get(size - 1)
+    self._db.delete(self._prefix + b'|' + _encode(size - 1))
+    self._db.put(self._size_key, _encode(size - 1))
+    return value
+
+  def get(self, index: int):
+    size = self._size()
+    if index < 0:
+      index += size
+    if index < 0 or index >= size:
+      raise IndexError('ArrayDB index out of range')
+    return _decode(self._db.get(self._prefix + b'|' + _encode(index)), self._value_type)
+
+  def __getitem__(self, index: int):
+    return self.get(index)
+
+  def __len__(self) -> int:
+    return self._size()
+
+  def __iter__(self):
+    for index in range(self._size()):
+      yield self.get(index)
+
+
+# ================================================
+#  Decorators
+# ================================================
+def external(func=None, readonly: bool = False):
+  def decorate(f):
+    f.__external__ = True
+    f.__readonly__ = readonly
+    return f
+  if func is not None:
+    return decorate(func)
+  return decorate
+
+
+def payable(func):
+  func.__payable__ = True
+  return func
+
+
+def eventlog(func=None, indexed: int = 0):
+  def decorate(f):
+    @wraps(f)
+    def emit(self, *args, **kwargs):
+      _CONTEXT.chain.emit_event(self.address, f.__name__, indexed, args, kwargs)
+    return emit
+  if func is not None:
+    return decorate(func)
+  return decorate
+
+
+def interface(func):
+  @wraps(func)
+  def call(self, *args, **kwargs):
+    return _CONTEXT.chain.call_score(self._from_score.address, self._address, func.__name__, args, kwargs)
+  return call
+
+
+class InterfaceScore:
+  def __init__(self, address: Address, from_score):
+    self._address = address
+    self._from_score = from_score
+
+
+# ================================================
+#  SCORE base
+# ================================================
+class _Icx:
+  def __init__(self, score):
+    self._score = score
+
+  def transfer(self, address: Address, amount: int) -> None:
+    _CONTEXT.chain.transfer(self._score.address, address, amount)
+
+  def send(self, address: Address, amount: int) -> bool:
+    try:
+      self.transfer(address, amount)
+      return True
+    except IconScoreException:
+      return False
+
+  def get_balance(self, address: Address) -> int:
+    return _CONTEXT.chain.balance_of(address)
+
+
+class IconScoreBase:
+  def __init__(self, db: IconScoreDatabase):
+    self.__db = db
+    self.__icx = _Icx(self)
+
+  def on_install(self, **kwargs) -> None:
+    pass
+
+  def on_update(self, **kwargs) -> None:
+    pass
+
+  @property
+  def db(self) -> IconScoreDatabase:
+    return self.__db
+
+  @property
+  def address(self) -> Address:
+    return self.__db.address
+
+  @property
+  def owner(self) -> Address:
+    return _CONTEXT.chain.owner_of(self.address)
+
+  @property
+  def msg(self):
+    return _CONTEXT.msg
+
+  @property
+  def tx(self):
+    return _CONTEXT.tx
+
+  @property
+  def block_height(self) -> int:
+    return _CONTEXT.block_height
+
+  @property
+  def icx(self) -> _Icx:
+    return self.__icx
+
+  def now(self) -> int:
+    return _CONTEXT.timestamp
+
+  def create_interface_score(self, address: Address, interface_cls):
+    return interface_cls(address, self)
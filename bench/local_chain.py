@@ -0,0 +1,267 @@
+"""
+Single process chain that runs SCOREs on top of the bench iconservice stand-in.
+
+Every transaction gets its own block, storage writes and balances are rolled back when the
+SCORE reverts, and all storage, transfer, inter-score and eventlog activity is counted in
+LocalChain.metrics so the benchmark can report it per call, along with the steps the default
+step schedule charges for it.
+"""
+
+import random
+
+import iconservice
+from iconservice import Address, AddressPrefix, IconScoreDatabase, IconScoreException
+
+ICX = 10 ** 18
+BLOCK_INTERVAL_US = 2000000
+
+
+class Metrics:
+  FIELDS = ['reads', 'writes', 'deletes', 'bytes_read', 'bytes_written', 'events', 'event_bytes',
+            'interface_calls', 'transfers', 'api_calls', 'steps']
+  # default step schedule of the network, steps counts what the SCORE is charged for its work on top of the
+  # steps every transaction pays for itself and its input. Values are charged per byte of the value stored,
+  # replaced or deleted, a deleted byte is refunded.
+  STEP_CONTRACT_CALL = 25000
+  STEP_SET_BYTE = 320
+  STEP_REPLACE_BYTE = 80
+  STEP_DELETE_BYTE = -240
+  STEP_EVENTLOG_BYTE = 100
+  # SCORE API functions are charged a ratio of STEP_API_CALL, the steps of sha3_256(b''), in thousandths, and that
+  # charge again for every block of bytes they hash or (de)serialize, the ScoreApiStepRatio schedule of iconservice
+  STEP_API_CALL = 10000
+  API_CALL_STEPS = {
+    # function: (ratio, block bytes)
+    'sha3_256': (1000, 320),
+    'json_dumps': (5000, 100),
+    'json_loads': (4000, 100)
+  }
+
+  def __init__(self):
+    for field in Metrics.FIELDS:
+      setattr(self, field, 0)
+
+  @staticmethod
+  def api_call(function: str, size: int) -> int:
+    # steps charged for one call of the SCORE API function on size bytes
+    ratio, block = Metrics.API_CALL_STEPS[function]
+    steps = Metrics.STEP_API_CALL * ratio // 1000
+    return steps + steps * size // block
+
+  def snapshot(self) -> dict:
+    return {field: getattr(self, field) for field in Metrics.FIELDS}
+
+  def since(self, snapshot: dict) -> dict:
+    return {field: getattr(self, field) - snapshot[field] for field in Metrics.FIELDS}
+
+
+class Message:
+  def __init__(self, sender: Address, value: int = 0):
+    self.sender = sender
+    self.value = value
+
+
+class Transaction:
+  def __init__(self, tx_hash: bytes, origin: Address, timestamp: int, index: int = 0):
+    self.hash = tx_hash
+    self.origin = origin
+    self.timestamp = timestamp
+    self.index = index
+
+
+class Event:
+  def __init__(self, score_address: Address, name: str, indexed: int, args: tuple, kwargs: dict):
+    self.score_address = score_address
+    self.name = name
+    self.indexed = indexed
+    self.args = args
+    self.kwargs = kwargs
+
+  def __repr__(self) -> str:
+    return f'{self.name}{self.args}'
+
+
+class TxResult:
+  def __init__(self, status: int, events: list, metrics: dict, error: str = None, block_height: int = 0,
+               tx_hash: bytes = b'', timestamp: int = 0):
+    self.status = status
+    self.events = events
+    self.metrics = metrics
+    self.error = error
+    self.block_height = block_height
+    self.tx_hash = tx_hash
+    self.timestamp = timestamp
+
+
+class FakeRoulette:
+  """ Treasury side of the ICONbet roulette SCORE as seen by DAOlevels. """
+
+  def __init__(self, chain: 'LocalChain', address: Address, treasury_min: int):
+    self._chain = chain
+    self.address = address
+    self.treasury_min = treasury_min
+    self.wagers = 0
+    self.rake = 0
+    self.payouts = 0
+    self.settlements = 0
+
+  def get_treasury_min(self) -> int:
+    return self.treasury_min
+
+  def take_wager(self, _amount: int) -> None:
+    self.wagers += _amount
+
+  def take_rake(self, _amount: int, _payout: int) -> None:
+    self.rake += _amount
+
+  def wager_payout(self, _payout: int) -> None:
+    self.payouts += _payout
+    self._chain.transfer(self.address, iconservice.get_context().tx.origin, _payout)
+
+  def settle_bet(self, _game_id: int, _wager: int, _rake: int, _payout: int) -> None:
+    self.settlements += 1
+    self.take_wager(_wager)
+    if _rake > 0:
+      self.take_rake(_rake, _rake)
+    if _payout > 0:
+      self.wager_payout(_payout)
+
+
+class LocalChain:
+  def __init__(self, seed: int = 0, start_timestamp: int = 1600000000000000):
+    self.metrics = Metrics()
+    self._random = random.Random(seed)
+    self._balances = dict()
+    self._scores = dict()
+    self._owners = dict()
+    self._dbs = list()
+    self._events = None
+    # called with (sender, score_address, method, params, value, result) after every invoke
+    self.listeners = list()
+    self.block_height = 0
+    self.timestamp = start_timestamp
+
+  # ================================================
+  #  Accounts and deployment
+  # ================================================
+  def create_account(self, balance: int = 0) -> Address:
+    address = Address(AddressPrefix.EOA, self._random_bytes(20))
+    self._balances[address] = balance
+    return address
+
+  def balance_of(self, address: Address) -> int:
+    return self._balances.get(address, 0)
+
+  def owner_of(self, score_address: Address) -> Address:
+    return self._owners[score_address]
+
+  def deploy(self, score_class, owner: Address) -> Address:
+    address = Address(AddressPrefix.CONTRACT, self._random_bytes(20))
+    db = IconScoreDatabase(address, self.metrics)
+    self._dbs.append(db)
+    self._scores[address] = (score_class, db)
+    self._owners[address] = owner
+    self._balances[address] = 0
+    self._run(owner, address, 0, lambda score: score.on_install())
+    return address
+
+  def deploy_roulette(self, treasury_min: int, balance: int) -> FakeRoulette:
+    address = Address(AddressPrefix.CONTRACT, self._random_bytes(20))
+    roulette = FakeRoulette(self, address, treasury_min)
+    self._scores[address] = roulette
+    self._balances[address] = balance
+    return roulette
+
+  # ================================================
+  #  Calls
+  # ================================================
+  def invoke(self, sender: Address, score_address: Address, method: str, params: dict = None,
+             value: int = 0) -> TxResult:
+    params = params or dict()
+    result = self._run(sender, score_address, value, lambda score: getattr(score, method)(**params))
+    for listener in self.listeners:
+      listener(sender, score_address, method, params, value, result)
+    return result
+
+  def query(self, score_address: Address, method: str, params: dict = None):
+    params = params or dict()
+    score_class, db = self._scores[score_address]
+    context = iconservice.Context(self, Message(None), None, self.block_height, self.timestamp, readonly=True)
+    previous = iconservice.get_context()
+    iconservice.set_context(context)
+    try:
+      return getattr(score_class(db), method)(**params)
+    finally:
+      iconservice.set_context(previous)
+
+  def call_score(self, from_address: Address, to_address: Address, method: str, args: tuple, kwargs: dict):
+    self.metrics.interface_calls += 1
+    self.metrics.steps += Metrics.STEP_CONTRACT_CALL
+    target = self._scores[to_address]
+    if isinstance(target, FakeRoulette):
+      return getattr(target, method)(*args, **kwargs)
+
+    score_class, db = target
+    outer = iconservice.get_context()
+    context = iconservice.Context(self, Message(from_address), outer.tx, outer.block_height, outer.timestamp,
+                                  outer.readonly)
+    iconservice.set_context(context)
+    try:
+      return getattr(score_class(db), method)(*args, **kwargs)
+    finally:
+      iconservice.set_context(outer)
+
+  def transfer(self, from_address: Address, to_address: Address, amount: int, charged: bool = True) -> None:
+    # charged is False for the ICX sent with the transaction, the SCORE pays no steps for it
+    if amount < 0 or self._balances.get(from_address, 0) < amount:
+      raise IconScoreException(f'Out of balance: {from_address}')
+    self.metrics.transfers += 1
+    if charged:
+      self.metrics.steps += Metrics.STEP_CONTRACT_CALL
+    self._balances[from_address] -= amount
+    self._balances[to_address] = self._balances.get(to_address, 0) + amount
+
+  def emit_event(self, score_address: Address, name: str, indexed: int, args: tuple, kwargs: dict) -> None:
+    event_bytes = len(name) + sum(len(str(arg)) for arg in args) + sum(len(str(arg)) for arg in kwargs.values())
+    self.metrics.events += 1
+    self.metrics.event_bytes += event_bytes
+    self.metrics.steps += event_bytes * Metrics.STEP_EVENTLOG_BYTE
+    self._events.append(Event(score_address, name, indexed, args, kwargs))
+
+  def storage_size(self) -> int:
+    return sum(db.size for db in self._dbs)
+
+  # ================================================
+  #  Internal
+  # ================================================
+  def _random_bytes(self, size: int) -> bytes:
+    return bytes(self._random.getrandbits(8) for _ in range(size))
+
+  def _run(self, sender: Address, score_address: Address, value: int, call) -> TxResult:
+    self.block_height += 1
+    self.timestamp += BLOCK_INTERVAL_US
+    tx = Transaction(self._random_bytes(32), sender, self.timestamp)
+    balances = dict(self._balances)
+    self._events = list()
+    for score_db in self._dbs:
+      score_db.begin()
+    snapshot = self.metrics.snapshot()
+
+    score_class, db = self._scores[score_address]
+    iconservice.set_context(iconservice.Context(self, Message(sender, value), tx, self.block_height, self.timestamp))
+    try:
+      if value:
+        self.transfer(sender, score_address, value, False)
+      call(score_class(db))
+    except Exception as e:
+      # anything escaping the SCORE fails the transaction, as on chain
+      for score_db in self._dbs:
+        score_db.rollback()
+      self._balances = balances
+      return TxResult(0, list(), self.metrics.since(snapshot), str(e), self.block_height, tx.hash, self.timestamp)
+    finally:
+      iconservice.set_context(None)
+
+    for score_db in self._dbs:
+      score_db.commit()
+    return TxResult(1, self._events, self.metrics.since(snapshot), None, self.block_height, tx.hash, self.timestamp)
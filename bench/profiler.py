@@ -0,0 +1,183 @@
+"""
+Opt-in cost profiler for DAOlevels on the local chain.
+
+Profiler.install() wraps the settlement, repository, codec and eventlog methods of the SCORE and
+attributes storage reads/writes, bytes written, bytes serialized, inter-score calls, eventlogs and
+wall time to each of them, grouped by the action being sent. Costs are reported both inclusive
+(the method and everything it calls) and self (minus the instrumented methods it calls).
+
+  python bench/run_benchmark.py --games 500 --profile
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import iconservice
+import levels.main
+from levels.main import DAOlevels
+from levels.repository.game_model import GameModel
+from levels.repository.game_repository import GameDB, GameSession, IGameRepository
+
+COUNTERS = ['reads', 'writes', 'bytes_written', 'interface_calls', 'events', 'api_calls']
+
+# (owner, attribute, label, serializer) where serializer marks functions returning serialized bytes/str
+DEFAULT_TARGETS = [
+  (DAOlevels, 'action', 'DAOlevels.action', False),
+  (DAOlevels, '_create_new_game', 'DAOlevels._create_new_game', False),
+  (DAOlevels, '_select_tile', 'DAOlevels._select_tile', False),
+  (DAOlevels, '_process_cash_out', 'DAOlevels._process_cash_out', False),
+  (DAOlevels, '_auto_climb', 'DAOlevels._auto_climb', False),
+  (DAOlevels, '_custom_bet', 'DAOlevels._custom_bet', False),
+  (DAOlevels, '_win_game', 'DAOlevels._win_game', False),
+  (DAOlevels, '_settle', 'DAOlevels._settle', False),
+  (DAOlevels, '_get_random', 'DAOlevels._get_random', False),
+  (DAOlevels, '_get_limits', 'DAOlevels._get_limits', False),
+  (DAOlevels, '_pad_steps', 'DAOlevels._pad_steps', False),
+  (DAOlevels, 'NewGameStarted', 'event NewGameStarted', False),
+  (DAOlevels, 'SelectedSquareResult', 'event SelectedSquareResult', False),
+  (DAOlevels, 'FundTransfer', 'event FundTransfer', False),
+  (DAOlevels, 'GenericMessage', 'event GenericMessage', False),
+  (IGameRepository, 'get', 'IGameRepository.get', False),
+  (IGameRepository, 'create', 'IGameRepository.create', False),
+  (IGameRepository, 'climb_level', 'IGameRepository.climb_level', False),
+  (IGameRepository, 'save', 'IGameRepository.save', False),
+  (IGameRepository, 'remove_from_active_game', 'IGameRepository.remove_from_active_game', False),
+  (IGameRepository, 'get_uid', 'IGameRepository.get_uid', False),
+  (GameSession, 'flush', 'GameSession.flush', False),
+  (GameDB, '__init__', 'GameDB()', False),
+  (GameModel, 'to_storage', 'GameModel.to_storage', True),
+  (GameModel, 'from_storage', 'GameModel.from_storage', False),
+  (levels.main, 'json_loads', 'json_loads', False),
+  (levels.main, 'json_dumps', 'json_dumps', True),
+  (iconservice.Logger, 'info', 'Logger.info', False),
+]
+
+
+class Entry:
+  def __init__(self):
+    self.calls = 0
+    self.seconds = 0.0
+    self.self_seconds = 0.0
+    self.bytes_serialized = 0
+    self.counters = dict.fromkeys(COUNTERS, 0)
+    self.self_counters = dict.fromkeys(COUNTERS, 0)
+
+
+class _Frame:
+  def __init__(self, label: str, metrics: dict, started: float):
+    self.label = label
+    self.metrics = metrics
+    self.started = started
+    self.child_seconds = 0.0
+    self.child_counters = dict.fromkeys(COUNTERS, 0)
+
+
+class Profiler:
+  def __init__(self, chain, targets: list = None):
+    self._chain = chain
+    self._targets = DEFAULT_TARGETS if targets is None else targets
+    self._originals = list()
+    self._stack = list()
+    self._action = None
+    self.entries = dict()
+
+  # ================================================
+  #  Installation
+  # ================================================
+  def install(self) -> 'Profiler':
+    for owner, attribute, label, serializer in self._targets:
+      raw = owner.__dict__.get(attribute) if isinstance(owner, type) else getattr(owner, attribute, None)
+      if raw is None:
+        # the SCORE no longer has this method, nothing to attribute
+        continue
+      self._originals.append((owner, attribute, raw))
+      if isinstance(raw, staticmethod):
+        setattr(owner, attribute, staticmethod(self._wrap(raw.__func__, label, serializer)))
+      else:
+        setattr(owner, attribute, self._wrap(raw, label, serializer))
+    return self
+
+  def uninstall(self) -> None:
+    for owner, attribute, raw in reversed(self._originals):
+      setattr(owner, attribute, raw)
+    self._originals = list()
+
+  @contextmanager
+  def action(self, name: str):
+    previous = self._action
+    self._action = name
+    try:
+      yield
+    finally:
+      self._action = previous
+
+  def _wrap(self, func, label: str, serializer: bool):
+    profiler = self
+
+    def profiled(*args, **kwargs):
+      profiler._enter(label)
+      result = None
+      try:
+        result = func(*args, **kwargs)
+        return result
+      finally:
+        profiler._exit(len(result) if serializer and result is not None else 0)
+
+    profiled.__wrapped__ = func
+    profiled.__name__ = getattr(func, '__name__', label)
+    return profiled
+
+  # ================================================
+  #  Accounting
+  # ================================================
+  def _enter(self, label: str) -> None:
+    self._stack.append(_Frame(label, self._chain.metrics.snapshot(), time.perf_counter()))
+
+  def _exit(self, bytes_serialized: int) -> None:
+    seconds_now = time.perf_counter()
+    frame = self._stack.pop()
+    seconds = seconds_now - frame.started
+    delta = self._chain.metrics.since(frame.metrics)
+
+    entry = self.entries.setdefault((self._action or '-', frame.label), Entry())
+    entry.calls += 1
+    entry.seconds += seconds
+    entry.self_seconds += seconds - frame.child_seconds
+    entry.bytes_serialized += bytes_serialized
+    for counter in COUNTERS:
+      entry.counters[counter] += delta[counter]
+      entry.self_counters[counter] += delta[counter] - frame.child_counters[counter]
+
+    if self._stack:
+      parent = self._stack[-1]
+      parent.child_seconds += seconds
+      for counter in COUNTERS:
+        parent.child_counters[counter] += delta[counter]
+
+  # ================================================
+  #  Report
+  # ================================================
+  def report(self) -> str:
+    lines = [
+      f'{"action":<16}{"method":<46}{"calls":>8}{"incl us":>9}{"self us":>9}{"reads":>7}{"writes":>7}'
+      f'{"B written":>10}{"B serial":>9}{"iscore":>7}{"events":>7}{"api":>6}'
+    ]
+    actions = sorted({action for action, _ in self.entries})
+    for action in actions:
+      rows = [(label, entry) for (entry_action, label), entry in self.entries.items() if entry_action == action]
+      rows.sort(key=lambda row: row[1].self_seconds, reverse=True)
+      for label, entry in rows:
+        calls = entry.calls
+        lines.append(
+          f'{action:<16}{label:<46}{calls:>8}{entry.seconds / calls * 1e6:>9.1f}{entry.self_seconds / calls * 1e6:>9.1f}'
+          f'{entry.self_counters["reads"] / calls:>7.2f}{entry.self_counters["writes"] / calls:>7.2f}'
+          f'{entry.self_counters["bytes_written"] / calls:>10.1f}{entry.bytes_serialized / calls:>9.1f}'
+          f'{entry.self_counters["interface_calls"] / calls:>7.2f}{entry.self_counters["events"] / calls:>7.2f}'
+          f'{entry.self_counters["api_calls"] / calls:>6.2f}')
+      lines.append('')
+    lines.append('per call averages, storage/iscore/event/api columns are self costs')
+    return '\n'.join(lines)
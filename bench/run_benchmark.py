@@ -0,0 +1,199 @@
+"""
+End to end benchmark of DAOlevels on the local chain.
+
+Plays full games per game mode through DAOlevels.action and reports throughput and, per action,
+the storage reads/writes, bytes written, inter-score calls, transfers, eventlogs and the steps the
+SCORE is charged for them.
+
+  python bench/run_benchmark.py --games 2000 --modes easy,medium,hard,custom --strategy select
+
+With --profile the cost of every action is also attributed to the SCORE methods, see profiler.py.
+"""
+
+import argparse
+import random
+import time
+
+from daolevels_env import MODES, DAOlevelsEnv
+from levels.game.consts import MAX_OPEN_GAMES
+from local_chain import ICX, Metrics
+from profiler import Profiler
+
+
+class ActionStats:
+  def __init__(self):
+    self.calls = 0
+    self.failed = 0
+    self.seconds = 0.0
+    self.totals = dict.fromkeys(Metrics.FIELDS, 0)
+
+  def add(self, result, seconds: float) -> None:
+    self.calls += 1
+    self.seconds += seconds
+    if not result.status:
+      self.failed += 1
+    for field, value in result.metrics.items():
+      self.totals[field] += value
+
+
+class Benchmark:
+  def __init__(self, env: DAOlevelsEnv, seed: int = 0, bet_amount: int = ICX, profiler: Profiler = None):
+    self.env = env
+    self.profiler = profiler
+    self.random = random.Random(seed)
+    self.bet_amount = bet_amount
+    self.stats = dict()
+    self.games = 0
+
+  def _send(self, name: str, call, *args, **kwargs):
+    started = time.perf_counter()
+    if self.profiler is not None:
+      with self.profiler.action(name):
+        result = call(*args, **kwargs)
+    else:
+      result = call(*args, **kwargs)
+    self.stats.setdefault(name, ActionStats()).add(result, time.perf_counter() - started)
+    return result
+
+  def _seed(self) -> str:
+    return str(self.random.getrandbits(32))
+
+  def play_level_game(self, player, game_mode: int, strategy: str) -> None:
+    env = self.env
+    bet_amount = 5 * ICX if game_mode == MODES['jackpot'] else self.bet_amount
+    result = self._send('create_new_game', env.create_game, player, game_mode, bet_amount)
+    if not result.status:
+      return
+    slot = env.new_game_slot(result)
+    bricks = 4 if game_mode in (MODES['easy'], MODES['jackpot']) else 3
+    # jackpot games can not be cashed out, everything else cashes out at a random level or plays to the end
+    cash_out_level = 0 if game_mode == MODES['jackpot'] else self.random.randint(0, 6)
+
+    # auto_climb is rejected while moves are committed to house seeds, those games are played tile by tile
+    if strategy == 'auto' and game_mode != MODES['jackpot'] and not env.commit_reveal:
+      tiles = [self.random.randint(1, bricks) for _ in range(6)]
+      self._send('auto_climb', env.auto_climb, player, slot, tiles, self._seed(), cash_out_level, cash_out_level > 0)
+    else:
+      level = 0
+      while True:
+        result = self._send('select_tile', env.select_tile, player, slot, self.random.randint(1, bricks), self._seed())
+        if result.status and env.commit_reveal and game_mode != MODES['jackpot']:
+          # the move waits for the seed after the next one, the house reveals both and the player resolves it
+          self._reveal_committed_seed()
+          result = self._send('resolve_move', env.resolve_move, player, slot)
+        if not result.status or env.game_over(result):
+          break
+        level += 1
+        if level == cash_out_level:
+          self._send('cash_out', env.cash_out, player, slot)
+          break
+    self.games += 1
+
+  def play_level_games_batched(self, player, game_mode: int, games: int) -> None:
+    # opens up to MAX_OPEN_GAMES games and plays one tile on every open game per select_tiles action
+    env = self.env
+    bet_amount = 5 * ICX if game_mode == MODES['jackpot'] else self.bet_amount
+    bricks = 4 if game_mode in (MODES['easy'], MODES['jackpot']) else 3
+    cash_out_levels = dict()
+    for _ in range(min(games, MAX_OPEN_GAMES)):
+      result = self._send('create_new_game', env.create_game, player, game_mode, bet_amount)
+      if not result.status:
+        break
+      cash_out_levels[env.new_game_slot(result)] = 0 if game_mode == MODES['jackpot'] else self.random.randint(0, 6)
+    self.games += len(cash_out_levels)
+
+    while cash_out_levels:
+      moves = [[slot, self.random.randint(1, bricks), self._seed()] for slot in cash_out_levels]
+      result = self._send('select_tiles', env.select_tiles, player, moves)
+      if not result.status:
+        break
+      if env.commit_reveal and game_mode != MODES['jackpot']:
+        self._reveal_committed_seed()
+        for slot in cash_out_levels:
+          self._send('resolve_move', env.resolve_move, player, slot)
+      levels = {game['active_game_num']: game['level']
+                for game in env.query('get_open_games_by_address', {'player_address': player})}
+      for slot, cash_out_level in list(cash_out_levels.items()):
+        if slot in levels and levels[slot] == cash_out_level:
+          self._send('cash_out', env.cash_out, player, slot)
+        if slot not in levels or levels[slot] == cash_out_level:
+          del cash_out_levels[slot]
+
+  def _reveal_committed_seed(self) -> None:
+    for _ in range(2):
+      self._send('reveal_seed', self.env.reveal_seed)
+
+  def play_custom_game(self, player) -> None:
+    number_of_tiles = self.random.choice([8, 12, 16, 20, 24])
+    square_id = self.random.randint(1, number_of_tiles)
+    self._send('custom_bet', self.env.custom_bet, player, number_of_tiles, square_id, self.bet_amount, self._seed())
+    self.games += 1
+
+  def run(self, modes: list, games: int, strategy: str) -> float:
+    started = time.perf_counter()
+    for game_mode in modes:
+      for i in range(games):
+        player = self.env.players[i % len(self.env.players)]
+        if game_mode == MODES['custom']:
+          self.play_custom_game(player)
+        elif strategy == 'batch':
+          if i % MAX_OPEN_GAMES == 0:
+            self.play_level_games_batched(player, game_mode, games - i)
+        else:
+          self.play_level_game(player, game_mode, strategy)
+    return time.perf_counter() - started
+
+  def report(self, seconds: float) -> str:
+    actions = sum(stats.calls for stats in self.stats.values())
+    lines = [
+      f'games: {self.games}  actions: {actions}  time: {seconds:.2f}s  '
+      f'games/s: {self.games / seconds:.0f}  actions/s: {actions / seconds:.0f}',
+      f'storage held: {self.env.chain.storage_size()} bytes',
+      '',
+      f'{"action":<16}{"calls":>8}{"failed":>8}{"us/call":>9}{"reads":>8}{"writes":>8}{"deletes":>8}'
+      f'{"B written":>11}{"events":>8}{"B events":>10}{"iscore":>8}{"xfers":>7}{"steps":>9}'
+    ]
+    for name, stats in sorted(self.stats.items()):
+      mean = {field: total / stats.calls for field, total in stats.totals.items()}
+      lines.append(
+        f'{name:<16}{stats.calls:>8}{stats.failed:>8}{stats.seconds / stats.calls * 1e6:>9.0f}'
+        f'{mean["reads"]:>8.1f}{mean["writes"]:>8.1f}{mean["deletes"]:>8.1f}{mean["bytes_written"]:>11.1f}'
+        f'{mean["events"]:>8.1f}{mean["event_bytes"]:>10.1f}{mean["interface_calls"]:>8.1f}{mean["transfers"]:>7.1f}'
+        f'{mean["steps"]:>9.0f}')
+    return '\n'.join(lines)
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description='DAOlevels local benchmark')
+  parser.add_argument('--games', type=int, default=1000, help='games played per mode')
+  parser.add_argument('--modes', default='easy,medium,hard,custom', help=f'comma separated, any of {",".join(MODES)}')
+  parser.add_argument('--strategy', choices=['select', 'auto', 'batch'], default='select',
+                      help='select_tile per level, one auto_climb per game or select_tiles over four games')
+  parser.add_argument('--players', type=int, default=20)
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--batched-settlement', action='store_true', help='settle games with one settle_bet call')
+  parser.add_argument('--netting', type=int, default=None, metavar='EPOCH_BETS',
+                      help='net custom bets in epochs of EPOCH_BETS bets, 0 for one block')
+  parser.add_argument('--typed', action='store_true', help='use the typed externals instead of action')
+  parser.add_argument('--commit-reveal', type=int, default=0, metavar='SEEDS',
+                      help='commit select_tile moves to a house seed chain of SEEDS seeds')
+  parser.add_argument('--session', type=int, default=0, metavar='DEPOSIT',
+                      help='every player deposits DEPOSIT ICX once and bets from the session balance')
+  parser.add_argument('--profile', action='store_true', help='attribute the cost of each action to SCORE methods')
+  args = parser.parse_args()
+
+  env = DAOlevelsEnv(args.seed, args.players, batched_settlement=args.batched_settlement,
+                    netting_epoch_bets=args.netting, typed=args.typed, commit_reveal_seeds=args.commit_reveal,
+                    session_deposit=args.session * ICX)
+  profiler = Profiler(env.chain).install() if args.profile else None
+  benchmark = Benchmark(env, args.seed, profiler=profiler)
+  seconds = benchmark.run([MODES[mode] for mode in args.modes.split(',')], args.games, args.strategy)
+  print(benchmark.report(seconds))
+  if profiler is not None:
+    profiler.uninstall()
+    print('')
+    print(profiler.report())
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,211 @@
+"""
+Vectorized Monte Carlo simulator of DAOlevels return to player and treasury risk (requires numpy).
+
+Games are simulated with the SCORE's own tables: the row multipliers from levels/game/consts.py and
+the bet limits of Payout.max_bet_per_level / Payout.max_bet_custom_game, so the max level a bet is
+allowed to reach is the one _get_max_level would give it. For every mode and cash-out strategy it
+reports RTP, house edge, spread, the payout distribution and, over treasury paths of consecutive
+games, the worst drawdown and the probability of ruining the treasury.
+
+  pip install -r bench/requirements.txt
+  python bench/simulate_rtp.py --games 2000000 --modes easy,medium,hard,custom --bets lognormal:0:1
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from levels.game.consts import *
+from levels.game.payout import Payout
+
+ICX = 10 ** 18
+MODES = {'easy': 0, 'medium': 1, 'hard': 2, 'jackpot': 3, 'custom': 4}
+BATCH = 1000000
+
+
+# ================================================
+#  Game rules as vectors
+# ================================================
+def safe_probabilities(game_mode: int) -> np.ndarray:
+  # chance of surviving each of the MAX_ROW_HEIGHT levels
+  if game_mode == MODES['jackpot']:
+    # EASY odds, the last two levels have 3 bombs
+    return np.array([1 - bombs / MAX_BRICKS_PER_ROW for bombs in PROMO_BOMBS_PER_LEVEL])
+  bricks = MODE_BRICKS_PER_ROW[game_mode]
+  bombs = HARD_BOMBS_PER_LEVEL if game_mode == MODES['hard'] else 1
+  return np.full(MAX_ROW_HEIGHT, 1 - bombs / bricks)
+
+
+def row_multipliers(game_mode: int) -> np.ndarray:
+  if game_mode == MODES['jackpot']:
+    # the player receives the roulette part and the DAOlevels part of the jackpot
+    jackpot = PROMO_IB_TREASURY_MULTIPLIER + PROMO_LEVELS_TREASURY_MULTIPLIER
+    return np.array([0] * MAX_ROW_HEIGHT + [jackpot]) / MULTIPLIER_SCALE
+  return np.array(MODE_ROW_MULTIPLIER[game_mode]) / MULTIPLIER_SCALE
+
+
+def level_limits(game_mode: int, treasury_min: int) -> np.ndarray:
+  # max bets (ICX) of a game that can reach level 6, 5, ..., 1
+  if game_mode == MODES['jackpot']:
+    return np.full(MAX_ROW_HEIGHT, PROMO_ENTRY_VALUE / ICX)
+  return np.array(Payout.max_bet_per_level(treasury_min, game_mode)) / ICX
+
+
+def max_levels(bets: np.ndarray, limits: np.ndarray) -> np.ndarray:
+  # vector form of DAOlevels._get_max_level, bets above the level 1 limit must be clipped beforehand
+  return MAX_ROW_HEIGHT - np.searchsorted(limits, bets, side='left')
+
+
+def levels_survived(rng: np.random.Generator, games: int, probabilities: np.ndarray) -> np.ndarray:
+  safe = rng.random((games, len(probabilities))) < probabilities
+  # index of the first bomb, or every level when there is none
+  return np.where(safe.all(axis=1), len(probabilities), np.argmin(safe, axis=1))
+
+
+def sample_bets(rng: np.random.Generator, games: int, spec: str, max_bet: float) -> np.ndarray:
+  kind, *args = spec.split(':')
+  values = [float(arg) for arg in args]
+  if kind == 'fixed':
+    bets = np.full(games, values[0])
+  elif kind == 'uniform':
+    bets = rng.uniform(values[0], values[1], games)
+  elif kind == 'lognormal':
+    bets = rng.lognormal(values[0], values[1], games)
+  else:
+    raise ValueError(f'Unknown bet distribution: {spec}')
+  return np.clip(bets, BET_MIN / ICX, max_bet)
+
+
+def play(rng: np.random.Generator, game_mode: int, games: int, bets_spec: str, treasury_min: int,
+         cash_out_level: int, number_of_tiles: int) -> tuple:
+  """
+  Plays a batch of games
+  :return: (bets, payouts) in ICX
+  """
+  if game_mode == MODES['custom']:
+    max_bet = Payout.max_bet_custom_game(treasury_min, number_of_tiles) / ICX
+    bets = sample_bets(rng, games, bets_spec, max_bet)
+    multiplier = CUSTOM_MULTIPLIER[Payout.custom_group(number_of_tiles)] / MULTIPLIER_SCALE
+    won = rng.random(games) >= 1 / number_of_tiles
+    return bets, np.where(won, bets * multiplier, 0.0)
+
+  limits = level_limits(game_mode, treasury_min)
+  if game_mode == MODES['jackpot']:
+    bets = np.full(games, PROMO_ENTRY_VALUE / ICX)
+  else:
+    bets = sample_bets(rng, games, bets_spec, limits[-1])
+  # the game ends at the cash out level or at the max level the bet allows, whichever comes first
+  targets = np.minimum(max_levels(bets, limits), cash_out_level)
+  survived = levels_survived(rng, games, safe_probabilities(game_mode))
+  multipliers = row_multipliers(game_mode)
+  return bets, np.where(survived >= targets, bets * multipliers[targets], 0.0)
+
+
+# ================================================
+#  Statistics
+# ================================================
+class Summary:
+  def __init__(self):
+    self.games = 0
+    self.wagered = 0.0
+    self.paid = 0.0
+    self.net_squares = 0.0
+    self.wins = 0
+    self.multiples = dict()
+
+  def add(self, bets: np.ndarray, payouts: np.ndarray) -> None:
+    self.games += len(bets)
+    self.wagered += bets.sum()
+    self.paid += payouts.sum()
+    # player result per unit bet
+    net = payouts / bets - 1
+    self.net_squares += (net ** 2).sum()
+    self.wins += int((payouts > 0).sum())
+    multiples, counts = np.unique(np.round(payouts / bets, 4), return_counts=True)
+    for multiple, count in zip(multiples, counts):
+      self.multiples[float(multiple)] = self.multiples.get(float(multiple), 0) + int(count)
+
+  @property
+  def rtp(self) -> float:
+    return self.paid / self.wagered
+
+  @property
+  def spread(self) -> float:
+    # standard deviation of the player result per unit bet
+    mean = self.paid / self.wagered - 1
+    return float(np.sqrt(max(self.net_squares / self.games - mean ** 2, 0)))
+
+
+def treasury_risk(rng: np.random.Generator, game_mode: int, paths: int, games_per_path: int, bets_spec: str,
+                  treasury_min: int, treasury: float, cash_out_level: int, number_of_tiles: int) -> tuple:
+  """
+  Plays paths of consecutive games against the treasury
+  :return: (probability of ruin, median worst drawdown, 99th percentile worst drawdown) in ICX
+  """
+  bets, payouts = play(rng, game_mode, paths * games_per_path, bets_spec, treasury_min, cash_out_level,
+                       number_of_tiles)
+  house = np.cumsum((bets - payouts).reshape(paths, games_per_path), axis=1)
+  peaks = np.maximum.accumulate(np.maximum(house, 0), axis=1)
+  drawdowns = (peaks - house).max(axis=1)
+  ruined = (house.min(axis=1) <= -treasury).mean()
+  return float(ruined), float(np.median(drawdowns)), float(np.percentile(drawdowns, 99))
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description='DAOlevels RTP and treasury risk simulator')
+  parser.add_argument('--games', type=int, default=1000000, help='games simulated per mode and strategy')
+  parser.add_argument('--modes', default='easy,medium,hard,custom', help=f'comma separated, any of {",".join(MODES)}')
+  parser.add_argument('--cash-out', default='1,2,3,4,5,6',
+                      help='comma separated cash out levels, 6 plays every game to its max level (auto climb)')
+  parser.add_argument('--tiles', default='8,12,16,20,24', help='custom game tile counts')
+  parser.add_argument('--bets', default='fixed:1', help='fixed:ICX, uniform:low:high or lognormal:mu:sigma (ICX)')
+  parser.add_argument('--treasury-min', type=float, default=100000, help='roulette treasury_min in ICX')
+  parser.add_argument('--treasury', type=float, default=None, help='treasury balance for ruin, default treasury_min')
+  parser.add_argument('--paths', type=int, default=2000, help='treasury paths for the ruin estimate')
+  parser.add_argument('--path-games', type=int, default=1000, help='consecutive games per treasury path')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+
+  rng = np.random.default_rng(args.seed)
+  treasury_min = int(args.treasury_min * ICX)
+  treasury = args.treasury if args.treasury is not None else args.treasury_min
+
+  print(f'{"mode":<8}{"strategy":<14}{"games":>10}{"RTP":>9}{"edge":>9}{"spread":>9}{"P(win)":>9}'
+        f'{"P(ruin)":>9}{"dd p50":>11}{"dd p99":>11}  top payouts (multiple: share)')
+  started = time.perf_counter()
+  simulated = 0
+  for mode_name in args.modes.split(','):
+    game_mode = MODES[mode_name]
+    if game_mode == MODES['custom']:
+      strategies = [(f'{tiles} tiles', MAX_ROW_HEIGHT, tiles) for tiles in map(int, args.tiles.split(','))]
+    elif game_mode == MODES['jackpot']:
+      strategies = [('no cash out', MAX_ROW_HEIGHT, 0)]
+    else:
+      strategies = [(f'cash out @{level}', level, 0) for level in map(int, args.cash_out.split(','))]
+
+    for label, cash_out_level, number_of_tiles in strategies:
+      summary = Summary()
+      for offset in range(0, args.games, BATCH):
+        bets, payouts = play(rng, game_mode, min(BATCH, args.games - offset), args.bets, treasury_min,
+                             cash_out_level, number_of_tiles)
+        summary.add(bets, payouts)
+      ruin, drawdown_median, drawdown_p99 = treasury_risk(rng, game_mode, args.paths, args.path_games, args.bets,
+                                                          treasury_min, treasury, cash_out_level, number_of_tiles)
+      simulated += summary.games + args.paths * args.path_games
+      top = sorted(summary.multiples.items(), key=lambda item: -item[1])[:4]
+      top_text = ', '.join(f'{multiple:g}x: {count / summary.games:.3f}' for multiple, count in top)
+      print(f'{mode_name:<8}{label:<14}{summary.games:>10}{summary.rtp:>9.4f}{1 - summary.rtp:>9.4f}'
+            f'{summary.spread:>9.3f}{summary.wins / summary.games:>9.4f}{ruin:>9.4f}'
+            f'{drawdown_median:>11.1f}{drawdown_p99:>11.1f}  {top_text}')
+
+  seconds = time.perf_counter() - started
+  print(f'\n{simulated} games in {seconds:.2f}s ({simulated / seconds:,.0f} games/s), drawdowns in ICX')
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,456 @@
+"""
+Off-chain indexer of DAOlevels games.
+
+Reads exported blocks of the DAOlevels SCORE from a directory of JSON files, replays the eventlogs of
+every successful transaction to rebuild each game with the GameModel schema and stores the games and
+their moves in SQLite. Files are read in name order, one at a time, and written with bulk inserts in
+one SQLite transaction per file together with the height of the last indexed block, so a run picks up
+where the previous one stopped.
+
+  python indexer/event_indexer.py fixtures/ --db daolevels.sqlite --stats
+
+An exported file holds a list of blocks in the ICON JSON-RPC layout:
+
+  [{"height": 120, "timestamp": 1600000000000000, "transactions": [
+    {"txHash": "0x..", "from": "hx..", "to": "cx..", "value": "0xde0b6b3a7640000", "status": "0x1",
+     "data": {"method": "action", "params": {"model": "{\"name\": \"select_tile\", ...}"}},
+     "eventLogs": [{"scoreAddress": "cx..", "indexed": ["SelectedSquareResult(int,str)", "0x2"],
+                    "data": ["SAFE! - you are now on level: 1"]}]}]}]
+
+bench/export_eventlogs.py writes such files from games played on the local chain.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from levels.game.consts import *
+from levels.game.events import *
+from levels.game.payout import Payout
+
+JACKPOT = 3
+CUSTOM = 4
+
+OPEN = 'open'
+LOST = 'lost'
+WON = 'won'
+CASHED_OUT = 'cashed_out'
+CLOSED = 'closed'
+REFUNDED = 'refunded'
+FORFEITED = 'forfeited'
+# typed externals: method -> (action name, action param of each typed param)
+TYPED_ACTIONS = {
+  'create_game': ('create_new_game', {'mode': 'game_mode', 'bet': 'bet_amount'}),
+  'select_tile': ('select_tile', {'slot': 'active_game_num', 'square': 'square_id', 'seed': 'user_seed'}),
+  'cash_out': ('cash_out', {'slot': 'active_game_num'}),
+  'resolve_move': ('resolve_move', {'slot': 'active_game_num'}),
+  'custom_bet': ('custom_bet', {'tiles': 'number_of_tiles', 'square': 'square_id', 'seed': 'user_seed',
+                                'bet': 'bet_amount'})
+}
+# game status after each outcome code of the GameOutcome eventlog
+STATUS = [OPEN, LOST, WON, CASHED_OUT, WON, CLOSED, REFUNDED, FORFEITED]
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+  game_key TEXT PRIMARY KEY,
+  game_id INTEGER,
+  player_address TEXT NOT NULL,
+  game_mode INTEGER NOT NULL,
+  bet_amount TEXT NOT NULL,
+  max_level_allowed INTEGER NOT NULL,
+  active_game_num INTEGER NOT NULL,
+  level INTEGER NOT NULL,
+  balance TEXT NOT NULL,
+  status TEXT NOT NULL,
+  payout TEXT NOT NULL,
+  game_started_datetime INTEGER NOT NULL,
+  started_height INTEGER NOT NULL,
+  finished_height INTEGER,
+  pending_square INTEGER
+);
+CREATE INDEX IF NOT EXISTS games_player ON games (player_address, status);
+CREATE INDEX IF NOT EXISTS games_mode ON games (game_mode, status);
+CREATE INDEX IF NOT EXISTS games_open_slot ON games (player_address, active_game_num) WHERE status = 'open';
+
+CREATE TABLE IF NOT EXISTS moves (
+  game_key TEXT NOT NULL,
+  height INTEGER NOT NULL,
+  tx_hash TEXT NOT NULL,
+  level INTEGER NOT NULL,
+  square_id INTEGER,
+  bomb_placed_on INTEGER NOT NULL,
+  result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS moves_game ON moves (game_key);
+
+CREATE TABLE IF NOT EXISTS checkpoint (
+  score_address TEXT PRIMARY KEY,
+  height INTEGER NOT NULL
+);
+'''
+
+GAME_COLUMNS = ['game_key', 'game_id', 'player_address', 'game_mode', 'bet_amount', 'max_level_allowed',
+                'active_game_num', 'level', 'balance', 'status', 'payout', 'game_started_datetime',
+                'started_height', 'finished_height', 'pending_square']
+# amounts are stored as decimal text, they do not fit the 64 bit integers of SQLite
+AMOUNT_COLUMNS = ['bet_amount', 'balance', 'payout']
+
+
+class Block:
+  def __init__(self, height: int, timestamp: int, transactions: list):
+    self.height = height
+    self.timestamp = timestamp
+    self.transactions = transactions
+
+
+class EventIndexer:
+  def __init__(self, db_path: str, score_address: str = None):
+    self._connection = sqlite3.connect(db_path)
+    self._connection.executescript(SCHEMA)
+    self._migrate()
+    self._score_address = score_address
+    # (player_address, active_game_num) -> open game, loaded once and kept in step with the store
+    self._open_games = dict()
+    self._dirty = dict()
+    self._moves = list()
+    self.checkpoint = self._load_checkpoint()
+    self._load_open_games()
+
+  def close(self) -> None:
+    self._connection.close()
+
+  # ================================================
+  #  Ingestion
+  # ================================================
+  def index_directory(self, directory: str) -> int:
+    blocks = 0
+    for name in sorted(os.listdir(directory)):
+      if name.endswith('.json'):
+        blocks += self.index_file(os.path.join(directory, name))
+    return blocks
+
+  def index_file(self, path: str) -> int:
+    with open(path) as file:
+      blocks = [Block(block['height'], block['timestamp'], block['transactions']) for block in json.load(file)]
+    indexed = 0
+    for block in blocks:
+      if block.height <= self.checkpoint:
+        continue
+      for tx in block.transactions:
+        self._index_transaction(block, tx)
+      self.checkpoint = block.height
+      indexed += 1
+    if indexed:
+      self._flush()
+    return indexed
+
+  def _index_transaction(self, block: Block, tx: dict) -> None:
+    if int(tx.get('status', '0x1'), 16) != 1:
+      # reverted transactions left no state behind
+      return
+    if self._score_address is not None and tx.get('to') != self._score_address:
+      return
+    data = tx.get('data') or {}
+    if not isinstance(data, dict):
+      return
+    if data.get('method') == 'sweep_expired':
+      self._index_sweep(block, tx)
+      return
+    if data.get('method') in TYPED_ACTIONS:
+      name, params = self._typed_action(data)
+    elif data.get('method') == 'action':
+      model = json.loads(data['params']['model'])
+      name = model['name']
+      params = model['params']
+    else:
+      return
+    player_address = tx['from']
+    event_logs = tx.get('eventLogs', [])
+    # blocks from before the typed eventlogs only have the text ones, their outcomes are worked out from
+    # the result strings and the payout tables
+    typed = [event for event in map(decode_eventlog, event_logs) if event is not None]
+    opened = [event for event in typed if isinstance(event, GameOpenedEvent)]
+    outcomes = [event for event in typed if isinstance(event, GameOutcomeEvent)]
+    events = [self._decode_event(event) for event in event_logs]
+    results = [args for event_name, args in events if event_name == 'SelectedSquareResult']
+
+    if name == 'create_new_game':
+      for event in opened:
+        self._start_game(block, event.game_id, player_address, event.mode, event.bet_amount, event.max_level,
+                         event.slot, block.timestamp)
+      if not opened:
+        for event_name, args in events:
+          if event_name == 'NewGameStarted':
+            details = json.loads(args[0])
+            self._start_game(block, details['game_id'], player_address, details['game_mode'], details['bet_amount'],
+                             details['max_level_allowed'], details['active_game_num'],
+                             details['game_started_datetime'])
+    elif name in ('select_tile', 'auto_climb', 'resolve_move', 'cash_out'):
+      game = self._open_games.get((player_address, params['active_game_num']))
+      if game is not None:
+        self._index_moves(block, tx, game, name, params, event_logs)
+    elif name == 'select_tiles':
+      # one select_tile on each of several games, the eventlogs of each move are told apart by game id
+      game_logs = self._split_by_game(event_logs)
+      for active_game_num, square_id, _ in params['moves']:
+        game = self._open_games.get((player_address, int(active_game_num)))
+        if game is not None:
+          self._index_moves(block, tx, game, 'select_tile', {'square_id': square_id},
+                            game_logs.get(game['game_id'], []))
+    elif name == 'custom_bet':
+      for index, (bomb_placed_on, result) in enumerate(results):
+        if outcomes:
+          outcome, payout = outcomes[index].outcome, outcomes[index].payout
+        elif result.startswith('LOST'):
+          outcome, payout = OUTCOME_LOST, 0
+        else:
+          outcome, payout = OUTCOME_WON, Payout.custom(self._bet_amount(tx, params), params['number_of_tiles'])
+        self._custom_bet(block, tx, params, bomb_placed_on, result, outcome, payout)
+
+  def _index_moves(self, block: Block, tx: dict, game: dict, name: str, params: dict, event_logs: list) -> None:
+    typed = [event for event in map(decode_eventlog, event_logs) if event is not None]
+    outcomes = [event for event in typed if isinstance(event, GameOutcomeEvent)]
+    events = [self._decode_event(event) for event in event_logs]
+    results = [args for event_name, args in events if event_name == 'SelectedSquareResult']
+    # in commit-reveal mode a move waits for a house seed and is resolved first by the next action on its game
+    square_ids = [game['pending_square']] if game['pending_square'] is not None else []
+    game['pending_square'] = None
+    committed = [args for event_name, args in events if event_name == 'MoveCommitted']
+    if committed:
+      game['pending_square'] = committed[0][3]
+      self._dirty[game['game_key']] = game
+    elif name == 'select_tile':
+      square_ids.append(params['square_id'])
+    elif name == 'auto_climb':
+      square_ids.extend(params['square_ids'])
+    for index, (square_id, (bomb_placed_on, result)) in enumerate(zip(square_ids, results)):
+      outcome = outcomes[index] if outcomes else self._legacy_outcome(game, result)
+      self._moves.append((game['game_key'], block.height, tx['txHash'], game['level'] + 1, square_id,
+                          bomb_placed_on, result))
+      self._apply(block, game, outcome.level, outcome.outcome, outcome.payout)
+    # outcomes without a SelectedSquareResult: the cash out of an auto climb or a game closed by the promo
+    for outcome in outcomes[len(results):]:
+      if game['status'] == OPEN:
+        self._apply(block, game, outcome.level, outcome.outcome, outcome.payout)
+    cashed_out = name == 'cash_out' or (name == 'auto_climb' and params.get('cash_out'))
+    if not outcomes and cashed_out and game['status'] == OPEN:
+      self._apply(block, game, game['level'], OUTCOME_CASHED_OUT, game['balance'])
+
+  @staticmethod
+  def _split_by_game(event_logs: list) -> dict:
+    # every move ends with its GameOutcome or MoveCommitted eventlog, the eventlogs before it belong to it
+    game_logs = dict()
+    pending = list()
+    for event_log in event_logs:
+      pending.append(event_log)
+      event_name, args = EventIndexer._decode_event(event_log)
+      game_id = args[0] if event_name in ('GameOutcome', 'MoveCommitted') else None
+      if game_id is not None:
+        game_logs.setdefault(game_id, []).extend(pending)
+        pending = list()
+    return game_logs
+
+  @staticmethod
+  def _typed_action(data: dict) -> tuple:
+    # name and params of the action model the typed external stands for
+    name, names = TYPED_ACTIONS[data['method']]
+    params = dict()
+    for typed_name, param in data.get('params', {}).items():
+      params[names[typed_name]] = param if typed_name == 'seed' else int(param, 16)
+    return name, params
+
+  @staticmethod
+  def _bet_amount(tx: dict, params: dict) -> int:
+    # a bet taken from the session balance is passed as bet_amount, otherwise it is the ICX sent
+    return params.get('bet_amount') or int(tx.get('value', '0x0'), 16)
+
+  def _index_sweep(self, block: Block, tx: dict) -> None:
+    # abandoned games finished by the game admin, they are only known by game id
+    outcomes = [event for event in map(decode_eventlog, tx.get('eventLogs', [])) if isinstance(event, GameOutcomeEvent)]
+    open_games = {game['game_id']: game for game in self._open_games.values()}
+    for outcome in outcomes:
+      game = open_games.get(outcome.game_id)
+      if game is not None:
+        self._apply(block, game, outcome.level, outcome.outcome, outcome.payout)
+
+  @staticmethod
+  def _decode_event(event: dict) -> tuple:
+    signature = event['indexed'][0]
+    name, types = signature[:-1].split('(')
+    types = types.split(',') if types else []
+    values = event['indexed'][1:] + event.get('data', [])
+    args = list()
+    for value_type, value in zip(types, values):
+      if value_type in ('int', 'bool'):
+        args.append(int(value, 16))
+      else:
+        args.append(value)
+    return name, args
+
+  @staticmethod
+  def _legacy_outcome(game: dict, result: str) -> GameOutcomeEvent:
+    bet_amount = game['bet_amount']
+    game_mode = game['game_mode']
+    level = game['level'] + 1
+    if result.startswith('LOST'):
+      return GameOutcomeEvent(game['game_id'], game['player_address'], game_mode, game['level'], OUTCOME_LOST, 0)
+    if result.startswith('SAFE'):
+      balance = 0 if game_mode == JACKPOT else Payout.level(bet_amount, game_mode, level)
+      return GameOutcomeEvent(game['game_id'], game['player_address'], game_mode, level, OUTCOME_SAFE, balance)
+    if 'JACKPOT' in result:
+      payout = Payout.apply(bet_amount, PROMO_IB_TREASURY_MULTIPLIER) + \
+               Payout.apply(bet_amount, PROMO_LEVELS_TREASURY_MULTIPLIER)
+      return GameOutcomeEvent(game['game_id'], game['player_address'], game_mode, level, OUTCOME_JACKPOT, payout)
+    payout = Payout.level(bet_amount, game_mode, level)
+    return GameOutcomeEvent(game['game_id'], game['player_address'], game_mode, level, OUTCOME_WON, payout)
+
+  # ================================================
+  #  Game lifecycle
+  # ================================================
+  def _start_game(self, block: Block, game_id: int, player_address: str, game_mode: int, bet_amount: int,
+                  max_level_allowed: int, active_game_num: int, game_started_datetime: int) -> None:
+    game = {
+      'game_key': str(game_id),
+      'game_id': game_id,
+      'player_address': player_address,
+      'game_mode': game_mode,
+      'bet_amount': bet_amount,
+      'max_level_allowed': max_level_allowed,
+      'active_game_num': active_game_num,
+      'level': 0,
+      'balance': 0,
+      'status': OPEN,
+      'payout': 0,
+      'game_started_datetime': game_started_datetime,
+      'started_height': block.height,
+      'finished_height': None,
+      'pending_square': None
+    }
+    self._open_games[(game['player_address'], game['active_game_num'])] = game
+    self._dirty[game['game_key']] = game
+
+  def _apply(self, block: Block, game: dict, level: int, outcome: int, payout: int) -> None:
+    game['level'] = level
+    if outcome == OUTCOME_SAFE:
+      game['balance'] = payout
+    else:
+      game['status'] = STATUS[outcome]
+      game['payout'] = payout
+      game['finished_height'] = block.height
+      del self._open_games[(game['player_address'], game['active_game_num'])]
+    self._dirty[game['game_key']] = game
+
+  def _custom_bet(self, block: Block, tx: dict, params: dict, bomb_placed_on: int, result: str, outcome: int,
+                  payout: int) -> None:
+    game = {
+      'game_key': f"custom:{tx['txHash']}",
+      'game_id': None,
+      'player_address': tx['from'],
+      'game_mode': CUSTOM,
+      'bet_amount': self._bet_amount(tx, params),
+      'max_level_allowed': 1,
+      'active_game_num': 0,
+      'level': 0 if outcome == OUTCOME_LOST else 1,
+      'balance': 0,
+      'status': STATUS[outcome],
+      'payout': payout,
+      'game_started_datetime': block.timestamp,
+      'started_height': block.height,
+      'finished_height': block.height,
+      'pending_square': None
+    }
+    self._dirty[game['game_key']] = game
+    self._moves.append((game['game_key'], block.height, tx['txHash'], 1, params['square_id'], bomb_placed_on, result))
+
+  # ================================================
+  #  Store
+  # ================================================
+  def _migrate(self) -> None:
+    # stores created before commit-reveal have no pending_square column
+    columns = [row[1] for row in self._connection.execute('PRAGMA table_info(games)')]
+    if 'pending_square' not in columns:
+      with self._connection:
+        self._connection.execute('ALTER TABLE games ADD COLUMN pending_square INTEGER')
+
+  def _load_checkpoint(self) -> int:
+    row = self._connection.execute('SELECT height FROM checkpoint WHERE score_address = ?',
+                                   (self._score_address or '',)).fetchone()
+    return row[0] if row else 0
+
+  def _load_open_games(self) -> None:
+    cursor = self._connection.execute(f'SELECT {", ".join(GAME_COLUMNS)} FROM games WHERE status = ?', (OPEN,))
+    for row in cursor:
+      game = dict(zip(GAME_COLUMNS, row))
+      for column in AMOUNT_COLUMNS:
+        game[column] = int(game[column])
+      self._open_games[(game['player_address'], game['active_game_num'])] = game
+
+  def _flush(self) -> None:
+    rows = [tuple(str(game[column]) if column in AMOUNT_COLUMNS else game[column] for column in GAME_COLUMNS)
+            for game in self._dirty.values()]
+    with self._connection:
+      self._connection.executemany(
+        f'INSERT OR REPLACE INTO games ({", ".join(GAME_COLUMNS)}) VALUES ({", ".join("?" * len(GAME_COLUMNS))})',
+        rows)
+      self._connection.executemany('INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?, ?)', self._moves)
+      self._connection.execute('INSERT OR REPLACE INTO checkpoint VALUES (?, ?)',
+                               (self._score_address or '', self.checkpoint))
+    self._dirty = dict()
+    self._moves = list()
+
+  # ================================================
+  #  Aggregates
+  # ================================================
+  def player_stats(self, player_address: str = None) -> list:
+    return self._aggregate('player_address', player_address)
+
+  def mode_stats(self, game_mode: int = None) -> list:
+    return self._aggregate('game_mode', game_mode)
+
+  def _aggregate(self, key: str, value) -> list:
+    # amounts are summed in Python, SQLite would overflow or round them
+    query = f'SELECT {key}, status, bet_amount, payout FROM games'
+    args = ()
+    if value is not None:
+      query += f' WHERE {key} = ?'
+      args = (value,)
+    stats = dict()
+    for group, status, bet_amount, payout in self._connection.execute(query, args):
+      entry = stats.setdefault(group, {key: group, 'games': 0, 'open': 0, 'won': 0, 'lost': 0, 'cashed_out': 0,
+                                       'closed': 0, 'refunded': 0, 'forfeited': 0, 'wagered': 0, 'paid': 0})
+      entry['games'] += 1
+      entry[status] += 1
+      if status != OPEN:
+        entry['wagered'] += int(bet_amount)
+        entry['paid'] += int(payout)
+    return sorted(stats.values(), key=lambda entry: -entry['games'])
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description='DAOlevels eventlog indexer')
+  parser.add_argument('directory', help='directory of exported block JSON files')
+  parser.add_argument('--db', default='daolevels.sqlite', help='SQLite file, created when missing')
+  parser.add_argument('--score', default=None, help='only index transactions sent to this SCORE address')
+  parser.add_argument('--stats', action='store_true', help='print per mode and top player aggregates')
+  args = parser.parse_args()
+
+  indexer = EventIndexer(args.db, args.score)
+  blocks = indexer.index_directory(args.directory)
+  print(f'indexed {blocks} blocks, checkpoint at height {indexer.checkpoint}')
+  if args.stats:
+    for entry in indexer.mode_stats():
+      rtp = entry['paid'] / entry['wagered'] if entry['wagered'] else 0
+      print(f'mode {entry["game_mode"]}: {entry["games"]} games, {entry["open"]} open, {entry["won"]} won, '
+            f'{entry["cashed_out"]} cashed out, {entry["lost"]} lost, RTP {rtp:.4f}')
+    for entry in indexer.player_stats()[:10]:
+      print(f'{entry["player_address"]}: {entry["games"]} games, wagered {entry["wagered"] / 10 ** 18:.2f} ICX, '
+            f'paid {entry["paid"] / 10 ** 18:.2f} ICX')
+  indexer.close()
+
+
+if __name__ == '__main__':
+  main()
@@ -4,12 +4,29 @@
 
 # How many concurrent games can be played per address
 MAX_OPEN_GAMES = 4
+# max number of finished games returned per page by get_finished_games
+MAX_FINISHED_GAMES_PAGE = 50
+# max number of addresses get_open_games_by_addresses accepts in one call
+MAX_BULK_PLAYERS = 100
+# fields of the open game summaries of get_open_games_by_addresses, bit i of the field mask selects field i
+OPEN_GAME_FIELDS = ['game_id', 'active_game_num', 'game_mode', 'level', 'max_level_allowed', 'bet_amount', 'balance',
+                    'game_started_datetime']
+# seconds after which an open game is considered abandoned and can be swept, unless the admin sets another expiry
+GAME_EXPIRY = 30 * 24 * 60 * 60
+# shortest expiry the admin can set, long enough for a player to come back to a game
+MIN_GAME_EXPIRY = 7 * 24 * 60 * 60
+# max number of games sweep_expired finishes in one call
+MAX_SWEEP_BATCH = 20
+# max number of entries of the global open game index read by one walk
+MAX_INDEX_SCAN = 200
 # max number of levels a game has
 MAX_ROW_HEIGHT = 6
 # how many bricks per row
 MAX_BRICKS_PER_ROW = 4
+# FIXED POINT SCALE OF EVERY MULTIPLIER BELOW (1000000 = 1x)
+MULTIPLIER_SCALE = 1000000
 # EACH ROW PAYOUT MULTIPLIER
-ROW_MULTIPLIER = [0, 1.3133, 1.64, 2.1, 2.688, 3.44, 4.4]
+ROW_MULTIPLIER = [0, 1313300, 1640000, 2100000, 2688000, 3440000, 4400000]
 # SETS THE MIN BET ALLOWS (0.1 ICX)
 BET_MIN = 100000000000000000
 # PROMO ENTRY VALUE IS 20 ICX
@@ -22,26 +39,118 @@ PROMO_MAX_ROW_HEIGHT = 6
 # 500 ICX
 PROMO_WIN_AMOUNT = 500000000000000000000
 # PROMO PAYOUT
-PROMO_ROW_MULTIPLIER = [0, 0, 0, 0, 0, 0, 100]
+PROMO_ROW_MULTIPLIER = [0, 0, 0, 0, 0, 0, 100000000]
 # MULTIPLIER APPLIES TO A WINNER ON A PROMO GAME 49.250 OBTAINED FROM IB TREASURY
-PROMO_IB_TREASURY_MULTIPLIER = 49.250
+PROMO_IB_TREASURY_MULTIPLIER = 49250000
 # MULTIPLIER APPLIES TO A WINNER ON A PROMO GAME 50.75 obtained FROM LEVELS TREASURY
-PROMO_LEVELS_TREASURY_MULTIPLIER = 50.75
+PROMO_LEVELS_TREASURY_MULTIPLIER = 50750000
 # MEDIUM GAME CONSTS
 MEDIUM_MAX_BRICKS_PER_ROW = 3
 # MEDIUM BOMBS PER ROW
 MEDIUM_BOMBS_PER_LEVEL = 1
 # MEDIUM ROW MULTIPLIER
-MEDIUM_ROW_MULTIPLIER = [0, 1.47735, 2.117, 3.0803, 4.4818, 6.521, 9.4881]
+MEDIUM_ROW_MULTIPLIER = [0, 1477350, 2117000, 3080300, 4481800, 6521000, 9488100]
 # HARD GAME CONSTS
 HARD_MAX_BRICKS_PER_ROW = 3
 # HARD BOMBS PER ROW
 HARD_BOMBS_PER_LEVEL = 2
 # HARD ROW MULTIPLIER
-HARD_ROW_MULTIPLIER = [0, 2.9547, 8.4681, 24.6422, 71.7087, 208.6724, 607.2366]
+HARD_ROW_MULTIPLIER = [0, 2954700, 8468100, 24642200, 71708700, 208672400, 607236600]
+# NUMBER OF TILES ALLOWED IN A CUSTOM GAME
+CUSTOM_TILE_COUNTS = [8, 12, 16, 20, 24]
 # CUSTOM MAX BRICKS
 MAX_CUSTOM_BRICKS = 24
 # CUSTOM MULTIPLIERS PER GROUP [8, 12, 16, 20, 24]
-CUSTOM_MULTIPLIER = [0, 1.1257, 1.0745, 1.0507, 1.0368, 1.0278]
-
-
+CUSTOM_MULTIPLIER = [0, 1125700, 1074500, 1050700, 1036800, 1027800]
+# ROW MULTIPLIERS INDEXED BY GAME MODE [EASY, MEDIUM, HARD]
+MODE_ROW_MULTIPLIER = [ROW_MULTIPLIER, MEDIUM_ROW_MULTIPLIER, HARD_ROW_MULTIPLIER]
+# TILES PER ROW INDEXED BY GAME MODE [EASY, MEDIUM, HARD]
+MODE_BRICKS_PER_ROW = [MAX_BRICKS_PER_ROW, MEDIUM_MAX_BRICKS_PER_ROW, HARD_MAX_BRICKS_PER_ROW]
+# BET LIMIT FACTORS (x100) OF A GAME THAT CAN REACH LEVEL 6, 5, 4, 3, 2, 1
+# max bet = treasury_min * 150 * factor // (68134 * (10000 - factor)), see Payout.max_bet
+EASY_LEVEL_LIMITS = [1700, 2300, 3100, 4200, 5600, 7500]
+MEDIUM_LEVEL_LIMITS = [800, 1300, 1900, 2900, 4400, 6600]
+HARD_LEVEL_LIMITS = [13, 41, 120, 300, 1100, 3300]
+# BET LIMIT FACTORS INDEXED BY GAME MODE [EASY, MEDIUM, HARD]
+MODE_LEVEL_LIMITS = [EASY_LEVEL_LIMITS, MEDIUM_LEVEL_LIMITS, HARD_LEVEL_LIMITS]
+# CUSTOM BET LIMIT FACTORS (x100) PER GROUP [8, 12, 16, 20, 24]
+CUSTOM_LIMITS = [0, 8600, 8800, 9000, 9200, 9400]
+# NUMBER OF BLOCKS THE CACHED BET LIMITS STAY VALID WHEN NO WINDOW HAS BEEN SET (ROUGHLY 1 HOUR)
+LIMITS_REFRESH_WINDOW = 1800
+# OUTCOMES OF A MOVE, INDEXES INTO MODE_STEP_COST
+STEP_BRANCH_SAFE = 0
+STEP_BRANCH_LOSE = 1
+STEP_BRANCH_WIN = 2
+STEP_BRANCH_NAMES = ['safe', 'lose', 'win']
+# ESTIMATED STEPS OF THE WORK AN OUTCOME OF A MOVE DOES OVER A SAFE MOVE ON THE SAME LEVEL [SAFE, LOSE, WIN], WITHOUT
+# THE CALLS OF ITS SETTLEMENT (0 = NO SUCH OUTCOME)
+# measured with bench/calibrate_steps.py on the default step schedule, from moves played on every level from the
+# same game. A custom bet has no safe outcome, its work is over the custom_bet entry of ACTION_STEP_COST
+# LOSE: the most any loss did, rounded up. WIN: the least any win did over a loss from the same game, rounded down,
+# added to LOSE. A loss is padded to nothing and the other outcomes up to the loss, see StepCost.move
+# LOSE: FundTransfer event, result event and moving the record to the history
+# WIN: LOSE plus the payout, JACKPOT also transfers the promo part to the player
+EASY_STEP_COST = [0, 0, 27000]
+MEDIUM_STEP_COST = EASY_STEP_COST
+HARD_STEP_COST = EASY_STEP_COST
+JACKPOT_STEP_COST = [0, 0, 53000]
+CUSTOM_STEP_COST = [0, 2000, 29000]
+# STEP COSTS INDEXED BY GAME MODE [EASY, MEDIUM, HARD, JACKPOT, CUSTOM]
+MODE_STEP_COST = [EASY_STEP_COST, MEDIUM_STEP_COST, HARD_STEP_COST, JACKPOT_STEP_COST, CUSTOM_STEP_COST]
+# MODE_STEP_COST OF A BET FROM THE SESSION BALANCE, SETTLED IN THE SESSION LEDGER, INDEXED BY GAME MODE
+# measured the same way, the ledger makes no calls
+SESSION_SETTLEMENT_STEP_COST = [[0, 184000, 201000], [0, 187000, 205000], [0, 188000, 206000], [0, 192000, 226000],
+                                [0, 224000, 241000]]
+# MODE_STEP_COST OF A CUSTOM BET RECORDED IN THE NETTING LEDGER, measured the same way
+NETTING_SETTLEMENT_STEP_COST = [0, 166000, 204000]
+# DEFAULT STEP SCHEDULE OF THE NETWORK, USED BY estimate_action_cost AND THE STEP PADDING
+STEP_SCHEDULE_DEFAULT = 100000
+STEP_SCHEDULE_INPUT_BYTE = 200
+STEP_SCHEDULE_CONTRACT_CALL = 25000
+STEP_SCHEDULE_SET_BYTE = 320
+STEP_SCHEDULE_API_CALL = 10000
+# STEPS CHARGED FOR ONE STEP PADDING UNIT WHEN THE OWNER HAS NOT SET ONE: sha3_256 OF A 32 BYTE DIGEST, THE API CALL
+# AND A TENTH MORE FOR THE 32 BYTES HASHED. PADDING ONLY EVER RAISES AN OUTCOME, A UNIT CHARGED MORE PADS MORE
+PADDING_UNIT_COST = STEP_SCHEDULE_API_CALL + STEP_SCHEDULE_API_CALL * 32 // 320
+# ESTIMATED STEPS THE ROULETTE SCORE SPENDS IN ONE SETTLEMENT CALL ON TOP OF THE CALL ITSELF
+# not measured: the roulette of the bench does no work in its calls, this is the margin left for the bookkeeping
+# and eventlogs of the deployed roulette score. A loss is charged it in the step padding, so it has to be at least
+# the work of the deployed roulette score, estimate_action_cost charges every settlement call with it
+ROULETTE_CALL_STEP_COST = 60000
+# APPROXIMATE STEPS OF THE WORK AN ACTION DOES WHATEVER THE OUTCOME OF ITS MOVES: STORAGE READS, THE DRAW, THE
+# WRITES OF EVERY CALL, THE JSON IT READS AND WRITES AND THE NEW GAME RECORD OF create_new_game
+# select_tiles AND auto_climb ARE CHARGED THE select_tile FIGURE FOR EVERY MOVE THEY PLAY, OR COMMIT_MOVE_STEP_COST
+# FOR A COMMITTED ONE, THEIR OWN ENTRY IS WHAT THE ACTION ADDS TO ITS MOVES
+# measured with bench/calibrate_steps.py: select_tile and custom_bet with the step tables above, the others are the
+# steps the estimate of the most expensive action played on the bench was short of without them. Only the step
+# tables bound anything, the rest is for estimate_action_cost which does not promise a bound
+ACTION_STEP_COST = {
+  'create_new_game': 970000,
+  'select_tile': 109000,
+  'cash_out': 68000,
+  'resolve_move': 140000,
+  'custom_bet': 437000,
+  'auto_climb': 72000,
+  'select_tiles': 126000
+}
+# ESTIMATED STEPS OF COMMITTING A MOVE TO THE HOUSE SEED CHAIN: THE PENDING MOVE RECORD AND ITS MoveCommitted EVENT
+COMMIT_MOVE_STEP_COST = 156000
+# ESTIMATED STEPS OF A SESSION BALANCE CHANGE: THE BALANCE, THE TOTAL, THE LEDGER AND ITS SessionBalanceChanged EVENT
+SESSION_STEP_COST = 165000
+# ESTIMATED STEPS OF RECORDING A CUSTOM BET IN THE NETTING LEDGER: READING AND WRITING THE LEDGER
+NETTING_STEP_COST = 219000
+# NUMBER OF BLOCKS THE SESSION LEDGER COLLECTS RESULTS BEFORE ITS NET IS SETTLED WITH THE ROULETTE (ROUGHLY 1 HOUR)
+SESSION_SETTLE_BLOCKS = 1800
+# OUTCOME CODES OF THE GameOutcome EVENTLOG
+OUTCOME_SAFE = 0
+OUTCOME_LOST = 1
+OUTCOME_WON = 2
+OUTCOME_CASHED_OUT = 3
+OUTCOME_JACKPOT = 4
+# the game was closed without a result, e.g. the promo ended
+OUTCOME_CLOSED = 5
+# an abandoned game was swept, before the first move the bet is refunded, after it the game is cashed out
+# into the session balance of the player, or forfeited when it can not be cashed out
+OUTCOME_REFUNDED = 6
+OUTCOME_FORFEITED = 7
+OUTCOME_NAMES = ['safe', 'lost', 'won', 'cashed_out', 'jackpot', 'closed', 'refunded', 'forfeited']
@@ -0,0 +1,70 @@
+from .consts import *
+
+# ================================================
+#  Typed eventlogs of DAOlevels
+# ================================================
+# Decoder of the GameOpened and GameOutcome eventlogs as returned by the ICON JSON-RPC API, shared by
+# off-chain consumers. It does not import iconservice so it can be used outside of the SCORE.
+#
+#   GameOpened(game_id, player, mode, slot, bet_amount, max_level)
+#   GameOutcome(game_id, player, mode, level, outcome, payout)
+#
+# game_id and player are indexed. Custom bets are not stored as games and have game_id 0.
+# payout is the amount sent to the player for OUTCOME_WON, OUTCOME_CASHED_OUT and OUTCOME_JACKPOT, paid into the
+# session balance for a game cashed out by the expiry sweep, the bet refunded for OUTCOME_REFUNDED
+# and the balance the game can be cashed out for after OUTCOME_SAFE.
+
+GAME_OPENED_SIGNATURE = 'GameOpened(int,Address,int,int,int,int)'
+GAME_OUTCOME_SIGNATURE = 'GameOutcome(int,Address,int,int,int,int)'
+
+
+class GameOpenedEvent(object):
+  __slots__ = ['game_id', 'player', 'mode', 'slot', 'bet_amount', 'max_level']
+
+  def __init__(self, game_id: int, player: str, mode: int, slot: int, bet_amount: int, max_level: int):
+    self.game_id = game_id
+    self.player = player
+    self.mode = mode
+    self.slot = slot
+    self.bet_amount = bet_amount
+    self.max_level = max_level
+
+
+class GameOutcomeEvent(object):
+  __slots__ = ['game_id', 'player', 'mode', 'level', 'outcome', 'payout']
+
+  def __init__(self, game_id: int, player: str, mode: int, level: int, outcome: int, payout: int):
+    self.game_id = game_id
+    self.player = player
+    self.mode = mode
+    self.level = level
+    self.outcome = outcome
+    self.payout = payout
+
+  @property
+  def outcome_name(self) -> str:
+    return OUTCOME_NAMES[self.outcome]
+
+  @property
+  def finished(self) -> bool:
+    return self.outcome != OUTCOME_SAFE
+
+
+_EVENTS = {
+  GAME_OPENED_SIGNATURE: GameOpenedEvent,
+  GAME_OUTCOME_SIGNATURE: GameOutcomeEvent
+}
+
+
+def decode_eventlog(eventlog: dict):
+  """
+  Decodes one eventlog of a transaction result
+  :param eventlog: {"scoreAddress": "cx..", "indexed": [signature, ...], "data": [...]}
+  :return: GameOpenedEvent, GameOutcomeEvent or None for any other eventlog
+  """
+  indexed = eventlog.get('indexed') or []
+  if not indexed or indexed[0] not in _EVENTS:
+    return None
+  game_id, player = indexed[1:3]
+  values = [int(value, 16) for value in eventlog.get('data', [])]
+  return _EVENTS[indexed[0]](int(game_id, 16), player, *values)
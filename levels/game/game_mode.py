@@ -0,0 +1,6 @@
+class GameMode:
+  EASY = 0
+  MEDIUM = 1
+  HARD = 2
+  JACKPOT = 3
+  CUSTOM = 4
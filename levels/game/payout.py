@@ -0,0 +1,64 @@
+from .consts import *
+from .game_mode import GameMode
+
+
+class Payout:
+  # ================================================
+  # Table driven settlement math, every amount is an integer in loop
+  # ================================================
+
+  @staticmethod
+  def apply(amount: int, multiplier: int) -> int:
+    # multipliers are fixed point with MULTIPLIER_SCALE as 1x
+    return amount * multiplier // MULTIPLIER_SCALE
+
+  @staticmethod
+  def level(bet_amount: int, game_mode: int, level: int) -> int:
+    # balance of an EASY, MEDIUM or HARD game sitting on level
+    return Payout.apply(bet_amount, MODE_ROW_MULTIPLIER[game_mode][level])
+
+  @staticmethod
+  def max_payout(bet_amount: int, game_mode: int, max_level_allowed: int) -> int:
+    # most a game can pay: the promo jackpot for JACKPOT games, the balance of its top level for the rest
+    if game_mode == GameMode.JACKPOT:
+      return Payout.apply(bet_amount, PROMO_IB_TREASURY_MULTIPLIER) + \
+             Payout.apply(bet_amount, PROMO_LEVELS_TREASURY_MULTIPLIER)
+    return Payout.level(bet_amount, game_mode, max_level_allowed)
+
+  @staticmethod
+  def custom(bet_amount: int, number_of_tiles: int) -> int:
+    return Payout.apply(bet_amount, CUSTOM_MULTIPLIER[Payout.custom_group(number_of_tiles)])
+
+  @staticmethod
+  def custom_group(number_of_tiles: int) -> int:
+    # index into the CUSTOM_* tables: 8 -> 1, 12 -> 2, 16 -> 3, 20 -> 4, 24 -> 5
+    return number_of_tiles // 4 - 1
+
+  @staticmethod
+  def max_bet(treasury_min: int, limit_factor: int) -> int:
+    # integer form of treasury_min * 1.5 * p / (68134 - 681.34 * p) with p = limit_factor / 100
+    return treasury_min * 150 * limit_factor // (68134 * (10000 - limit_factor))
+
+  @staticmethod
+  def max_bet_per_level(treasury_min: int, game_mode: int) -> list:
+    # max bets of a game that can reach level 6, 5, 4, 3, 2, 1
+    return [Payout.max_bet(treasury_min, limit_factor) for limit_factor in MODE_LEVEL_LIMITS[game_mode]]
+
+  @staticmethod
+  def max_bet_custom_game(treasury_min: int, number_of_tiles: int) -> int:
+    return Payout.max_bet(treasury_min, CUSTOM_LIMITS[Payout.custom_group(number_of_tiles)])
+
+  @staticmethod
+  def max_game_payout(treasury_min: int) -> int:
+    # most a single EASY, MEDIUM, HARD or custom game within the bet limits can pay
+    level_payouts = [Payout.level(max_bet, game_mode, MAX_ROW_HEIGHT - index)
+                     for game_mode in range(len(MODE_LEVEL_LIMITS))
+                     for index, max_bet in enumerate(Payout.max_bet_per_level(treasury_min, game_mode))]
+    custom_payouts = [Payout.custom(Payout.max_bet_custom_game(treasury_min, number_of_tiles), number_of_tiles)
+                      for number_of_tiles in CUSTOM_TILE_COUNTS]
+    return max(level_payouts + custom_payouts)
+
+  @staticmethod
+  def to_display(multipliers: list) -> list:
+    # multipliers as the decimal numbers shown to players
+    return [multiplier / MULTIPLIER_SCALE if multiplier else 0 for multiplier in multipliers]
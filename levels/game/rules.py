@@ -0,0 +1,74 @@
+from .consts import *
+from .game_mode import GameMode
+from .payout import Payout
+
+
+class GameRules(object):
+  # ================================================
+  # Rules of a level game mode
+  # ================================================
+  # One tile is drawn per level. On a row with a single bomb the drawn tile is the bomb, on a row with more
+  # bombs it is the only safe tile. Every list is indexed by the level being played, 0 for the first row,
+  # except multipliers which holds the balance of a game sitting on each level, 0 before the first move.
+  __slots__ = ['game_mode', 'tiles_per_row', 'bombs_per_level', 'multipliers', 'win_outcome', 'cash_out_level']
+
+  def __init__(self, game_mode: int, tiles_per_row: list, bombs_per_level: list, multipliers: list,
+               win_outcome: int = OUTCOME_WON, cash_out_level: int = 1):
+    self.game_mode = game_mode
+    self.tiles_per_row = tiles_per_row
+    self.bombs_per_level = bombs_per_level
+    self.multipliers = multipliers
+    # outcome of a safe tile on the last level of the game, the game's max_level_allowed
+    self.win_outcome = win_outcome
+    # lowest level a game can be cashed out on, 0 when it can never be cashed out
+    self.cash_out_level = cash_out_level
+
+  @staticmethod
+  def for_mode(game_mode: int) -> 'GameRules':
+    if game_mode < 0 or game_mode >= len(MODE_RULES):
+      raise ValueError(f'No level game rules for game mode {game_mode}')
+    return MODE_RULES[game_mode]
+
+  def tiles(self, level: int) -> int:
+    return self.tiles_per_row[level]
+
+  def is_safe(self, level: int, square_id: int, random_number: int) -> bool:
+    if self.bombs_per_level[level] == 1:
+      return square_id != random_number
+    return square_id == random_number
+
+  def resolve(self, level: int, max_level: int, square_id: int, random_number: int) -> int:
+    """
+    Outcome of selecting square_id on level when random_number was drawn
+    :return: OUTCOME_LOST, OUTCOME_SAFE or win_outcome when the game reaches max_level
+    """
+    if not self.is_safe(level, square_id, random_number):
+      return OUTCOME_LOST
+    if level + 1 == max_level:
+      return self.win_outcome
+    return OUTCOME_SAFE
+
+  def bombs(self, level: int, random_number: int) -> list:
+    # bomb tiles of a played level
+    if self.bombs_per_level[level] == 1:
+      return [random_number]
+    return [tile for tile in range(1, self.tiles(level) + 1) if tile != random_number]
+
+  def balance(self, bet_amount: int, level: int) -> int:
+    return Payout.apply(bet_amount, self.multipliers[level])
+
+  def can_cash_out(self, level: int) -> bool:
+    return 0 < self.cash_out_level <= level
+
+
+# RULES INDEXED BY GAME MODE [EASY, MEDIUM, HARD, JACKPOT]
+MODE_RULES = [
+  GameRules(GameMode.EASY, [MAX_BRICKS_PER_ROW] * MAX_ROW_HEIGHT, [1] * MAX_ROW_HEIGHT, ROW_MULTIPLIER),
+  GameRules(GameMode.MEDIUM, [MEDIUM_MAX_BRICKS_PER_ROW] * MAX_ROW_HEIGHT, [MEDIUM_BOMBS_PER_LEVEL] * MAX_ROW_HEIGHT,
+            MEDIUM_ROW_MULTIPLIER),
+  GameRules(GameMode.HARD, [HARD_MAX_BRICKS_PER_ROW] * MAX_ROW_HEIGHT, [HARD_BOMBS_PER_LEVEL] * MAX_ROW_HEIGHT,
+            HARD_ROW_MULTIPLIER),
+  # EASY rows with 3 bombs on the last two levels, the balance stays 0 until the jackpot is won
+  GameRules(GameMode.JACKPOT, [MAX_BRICKS_PER_ROW] * PROMO_MAX_ROW_HEIGHT, PROMO_BOMBS_PER_LEVEL,
+            PROMO_ROW_MULTIPLIER, win_outcome=OUTCOME_JACKPOT, cash_out_level=0)
+]
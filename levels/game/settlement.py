@@ -0,0 +1,35 @@
+from iconservice import *
+
+
+# ================================================
+#  Settlement of a game with the roulette treasury
+# ================================================
+class SettlementRecord(object):
+  def __init__(self, game_id: int, wager: int, rake: int = 0, payout: int = 0):
+    self.game_id = game_id
+    self.wager = wager
+    self.rake = rake
+    self.payout = payout
+
+
+class BatchedSettlement(object):
+  # sends the whole record through the single settle_bet call of the roulette score
+  def __init__(self, roulette_score: InterfaceScore):
+    self._roulette_score = roulette_score
+
+  def settle(self, record: SettlementRecord) -> None:
+    self._roulette_score.settle_bet(record.game_id, record.wager, record.rake, record.payout)
+
+
+class LegacySettlement(object):
+  # maps the record onto take_wager, take_rake and wager_payout for roulette scores without settle_bet
+  def __init__(self, roulette_score: InterfaceScore):
+    self._roulette_score = roulette_score
+
+  def settle(self, record: SettlementRecord) -> None:
+    self._roulette_score.take_wager(record.wager)
+    if record.rake > 0:
+      self._roulette_score.take_rake(record.rake, record.rake)
+    if record.payout > 0:
+      # send payout request to iconbet
+      self._roulette_score.wager_payout(record.payout)
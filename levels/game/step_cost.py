@@ -0,0 +1,66 @@
+from .consts import *
+
+
+class StepCost(object):
+  # ================================================
+  # Upper bound of the steps charged for the work of a game action
+  # ================================================
+  # MODE_STEP_COST holds the work of each outcome of a move over a safe move, the calls of its settlement are
+  # charged by the settlement path
+  __slots__ = ['batched_settlement']
+
+  def __init__(self, batched_settlement: bool):
+    # settle_bet replaces take_wager, take_rake and wager_payout
+    self.batched_settlement = batched_settlement
+
+  @staticmethod
+  def transaction(input_bytes: int) -> int:
+    # charged for every transaction before the SCORE runs
+    return STEP_SCHEDULE_DEFAULT + input_bytes * STEP_SCHEDULE_INPUT_BYTE
+
+  @staticmethod
+  def action(name: str) -> int:
+    return ACTION_STEP_COST[name]
+
+  @staticmethod
+  def outcome(game_mode: int, branch: int, levels_played: int = 0, table: list = None) -> int:
+    # work of one outcome of a move without its settlement calls, every level played adds a byte to the game
+    # record, table holds the work of each outcome of a settlement path other than the wallet
+    return (table or MODE_STEP_COST[game_mode])[branch] + levels_played * STEP_SCHEDULE_SET_BYTE
+
+  def move(self, game_mode: int, outcomes: dict, levels_played: int, table: list = None) -> dict:
+    """
+    Steps of every outcome of a move, settled with the roulette score unless table is given
+    A loss is charged the most it can cost, with the work the roulette score does in its calls, and every other
+    outcome the least it can cost. Padding the others up to the loss makes the cheapest outcome the player keeps
+    cost at least as much as a loss
+    :param outcomes: {branch: SettlementRecord of the outcome or None when it does not settle}
+    :return: {branch: steps}
+    """
+    costs = dict()
+    for branch, record in outcomes.items():
+      steps = self.outcome(game_mode, branch, levels_played, table)
+      if table is None:
+        steps += self.charged_settlement(record)
+        if branch == STEP_BRANCH_LOSE:
+          steps += self.settlement_calls(record.rake, record.payout) * ROULETTE_CALL_STEP_COST
+      costs[branch] = steps
+    return costs
+
+  def settlement_calls(self, rake: int = 0, payout: int = 0) -> int:
+    # calls to the roulette score settling a bet
+    if self.batched_settlement:
+      return 1
+    return 1 + (rake > 0) + (payout > 0)
+
+  def settlement(self, rake: int = 0, payout: int = 0) -> int:
+    # the wager transfer to the roulette score and the calls settling it
+    calls = self.settlement_calls(rake, payout)
+    return STEP_SCHEDULE_CONTRACT_CALL + calls * (STEP_SCHEDULE_CONTRACT_CALL + ROULETTE_CALL_STEP_COST)
+
+  def charged_settlement(self, record) -> int:
+    # steps charged to DAOlevels for the wager transfer and the settlement calls of a SettlementRecord, without
+    # the work the roulette score does inside them, 0 for an outcome that does not settle
+    if record is None:
+      return 0
+    return (1 + self.settlement_calls(record.rake, record.payout)) * STEP_SCHEDULE_CONTRACT_CALL
@@ -1,11 +1,20 @@
 from iconservice import *
 from .scorelib.id_factory import *
+from .scorelib.step_padding import *
 from .repository.game_repository import *
 from .repository.game_model import *
 from .repository.icon_bet_repository import *
 from .repository.promo_repository import *
+from .repository.limits_repository import *
+from .repository.netting_repository import *
+from .repository.seed_chain_repository import *
+from .repository.session_repository import *
 from .repository.game_model import GameMode
 from .scorelib.utils import Utils
+from .game.payout import Payout
+from .game.rules import GameRules
+from .game.settlement import *
+from .game.step_cost import StepCost
 
 TAG = 'DAOLevels'
 
@@ -30,6 +39,10 @@ class RouletteInterface(InterfaceScore):
   def take_rake(self, _amount: int, _payout: int) -> None:
     pass
 
+  @interface
+  def settle_bet(self, _game_id: int, _wager: int, _rake: int, _payout: int) -> None:
+    pass
+
 
 # ================================================
 #  Exceptions
@@ -65,7 +78,20 @@ class InvalidCustomTileRange(Exception):
 class DAOlevels(IconScoreBase):
   _NAME = "DAOlevels"
   _ADMIN_ADDRESS = "Admin_Address"
+  # read by nothing since moves are padded from their step cost, kept for set_loops and get_loops
   _CONSUME_STEP_COUNT = "consume_step_count"
+  # game actions: name -> (handler, cost estimator, required params, optional params with their defaults)
+  _ACTIONS = {
+    "create_new_game": ("_create_new_game_action", "_create_new_game_cost", ["game_mode"], [("bet_amount", 0)]),
+    "select_tile": ("_select_tile_action", "_select_tile_cost", ["active_game_num", "square_id", "user_seed"], []),
+    "cash_out": ("_cash_out_action", "_cash_out_cost", ["active_game_num"], []),
+    "resolve_move": ("_resolve_move_action", "_resolve_move_cost", ["active_game_num"], []),
+    "custom_bet": ("_custom_bet_action", "_custom_bet_cost", ["number_of_tiles", "square_id", "user_seed"],
+                   [("bet_amount", 0)]),
+    "select_tiles": ("_select_tiles_action", "_select_tiles_cost", ["moves"], []),
+    "auto_climb": ("_auto_climb_action", "_auto_climb_cost", ["active_game_num", "square_ids", "user_seed"],
+                   [("stop_at_level", 0), ("cash_out", False)])
+  }
 
   # ================================================
   #  Event Logs_CONSUME_LOOP_COUNT
@@ -78,6 +104,22 @@ class DAOlevels(IconScoreBase):
   def SelectedSquareResult(self, bomb_placed_on: int, result: str) -> None:
     pass
 
+  @eventlog(indexed=2)
+  def GameOpened(self, game_id: int, player: Address, mode: int, slot: int, bet_amount: int, max_level: int):
+    pass
+
+  @eventlog(indexed=2)
+  def GameOutcome(self, game_id: int, player: Address, mode: int, level: int, outcome: int, payout: int):
+    pass
+
+  @eventlog(indexed=2)
+  def MoveCommitted(self, game_id: int, player: Address, level: int, square_id: int, user_seed: str, seed_index: int):
+    pass
+
+  @eventlog(indexed=1)
+  def SessionBalanceChanged(self, player: Address, amount: int, balance: int, note: str):
+    pass
+
   @eventlog
   def ShowException(self, exception: str):
     pass
@@ -100,15 +142,100 @@ class DAOlevels(IconScoreBase):
 
   def __init__(self, db: IconScoreDatabase) -> None:
     self._name = DAOlevels._NAME
-    self._iconBetDB = IconBetDB(db)
-    self._promoDB = PromoDB(db)
-    self._consume_step_count = VarDB(self._CONSUME_STEP_COUNT, db, value_type=int)
-    self._roulette_score = self.create_interface_score(self._iconBetDB.iconbet_score.get(), RouletteInterface)
-    self._game_admin = VarDB(self._ADMIN_ADDRESS, db, value_type=Address)
     self._db = db
+    # database access objects and the roulette interface score are built on first use and kept for the call,
+    # calls that never touch them do not pay for them
+    self._icon_bet_db = None
+    self._promo_db = None
+    self._limits_db = None
+    self._netting_db = None
+    self._seed_chain_db = None
+    self._session_db = None
+    self._step_padding_db = None
+    self._game_admin_db = None
+    self._roulette_address_cache = None
+    self._roulette_score_cache = None
+    # game repository of the running action, its games are written once when the action ends
+    self._game_repository = None
+    # house seed of the committed move being resolved, draws are taken from it instead of the transaction
+    self._reveal_seed = None
+    # settlements of the games finished by a batch move, sent to the roulette score as one record at its end
+    self._batch_settlement = None
+    # set while sweep_expired finishes games, the roulette score pays the origin of the transaction so the
+    # games it settles are paid into the session balance of their player
+    self._sweeping = False
+    # step costs of the settlement path, read once per action
+    self._step_cost_model = None
 
     super().__init__(db)
 
+  @property
+  def _iconBetDB(self) -> IconBetDB:
+    if self._icon_bet_db is None:
+      self._icon_bet_db = IconBetDB(self._db)
+    return self._icon_bet_db
+
+  @property
+  def _promoDB(self) -> PromoDB:
+    if self._promo_db is None:
+      self._promo_db = PromoDB(self._db)
+    return self._promo_db
+
+  @property
+  def _limitsDB(self) -> LimitsDB:
+    if self._limits_db is None:
+      self._limits_db = LimitsDB(self._db)
+    return self._limits_db
+
+  @property
+  def _nettingDB(self) -> NettingDB:
+    if self._netting_db is None:
+      self._netting_db = NettingDB(self._db)
+    return self._netting_db
+
+  @property
+  def _seedChainDB(self) -> SeedChainDB:
+    if self._seed_chain_db is None:
+      self._seed_chain_db = SeedChainDB(self._db)
+    return self._seed_chain_db
+
+  @property
+  def _sessionDB(self) -> SessionDB:
+    if self._session_db is None:
+      self._session_db = SessionDB(self._db)
+    return self._session_db
+
+  @property
+  def _step_padding(self) -> StepPadding:
+    if self._step_padding_db is None:
+      self._step_padding_db = StepPadding(self._NAME, self._db, PADDING_UNIT_COST)
+    return self._step_padding_db
+
+  @property
+  def _step_cost(self) -> StepCost:
+    if self._step_cost_model is None:
+      self._step_cost_model = StepCost(self._iconBetDB.batched_settlement.get())
+    return self._step_cost_model
+
+  @property
+  def _game_admin(self) -> VarDB:
+    if self._game_admin_db is None:
+      self._game_admin_db = VarDB(self._ADMIN_ADDRESS, self._db, value_type=Address)
+    return self._game_admin_db
+
+  @property
+  def _roulette_address(self) -> Address:
+    # read once per call, the roulette score can not change during a transaction
+    if self._roulette_address_cache is None:
+      self._roulette_address_cache = self._iconBetDB.iconbet_score.get()
+    return self._roulette_address_cache
+
+  @property
+  def _roulette_score(self) -> RouletteInterface:
+    if self._roulette_score_cache is None:
+      self._roulette_score_cache = self.create_interface_score(self._roulette_address, RouletteInterface)
+    return self._roulette_score_cache
+
   def on_install(self) -> None:
     super().on_install()
     self._promoDB.promo_switch.set(False)
@@ -123,76 +250,112 @@ class DAOlevels(IconScoreBase):
   # ================================================
   #  Internal methods
   # ================================================
-  def _create_new_game(self, player_address: Address, bet_amount: int, datetime: int, game_mode: int):
-    if bet_amount < BET_MIN:
-      raise InvalidBetValue(f'Invalid Min Bet: Min allowed is {BET_MIN}')
-
-    if game_mode not in [GameMode.EASY,
-                         GameMode.MEDIUM,
-                         GameMode.HARD,
-                         GameMode.JACKPOT]:
-      raise InvalidGameMode("Invalid game mode entered")
-
+  def _create_new_game(self, player_address: Address, bet_amount: int, datetime: int, game_mode: int,
+                       session_funded: bool = False):
     try:
-      if game_mode == GameMode.JACKPOT:
-        jackpot_on = self._promoDB.promo_switch.get()
-        if not jackpot_on:
-          revert("Maximum amount of Jackpots has been won, Promo is over, returning funds")
-        if bet_amount != PROMO_ENTRY_VALUE:
-          revert("Promo entry fee is 5 ICX")
-        max_level = 6
-
-      else:
-        max_level = self._get_max_level(bet_amount, game_mode)
+      max_level = self._check_new_game(player_address, bet_amount, game_mode)
 
       # setup database access objects
-      game_repository = IGameRepository(self._db)
-      new_game_details = game_repository.create(player_address, bet_amount, datetime, max_level, game_mode)
+      game_repository = self._get_game_repository()
+      if session_funded:
+        self._debit_session(player_address, bet_amount, "Bet on a new game")
+      game = game_repository.create(player_address, bet_amount, datetime, game_mode, max_level, session_funded)
       # trigger new game started event
-      self.NewGameStarted(new_game_details)
+      self.NewGameStarted(str(game))
+      self.GameOpened(game.game_id, player_address, game_mode, game.active_game_num, bet_amount, max_level)
     except BaseException as e:
       self.ShowException(str(e))
       revert(str(e))
 
-  def _get_max_level(self, bet_amount: int, game_mode: int) -> int:
-    per_level = self._get_max_bet_per_level(game_mode)
-
-    if bet_amount <= int(per_level[0]):
-      # able to play all levels (currently set at 6)
-      return 6
-    if int(per_level[0]) < bet_amount <= int(per_level[1]):
-      return 5
-    if int(per_level[1]) < bet_amount <= int(per_level[2]):
-      return 4
-    if int(per_level[2]) < bet_amount <= int(per_level[3]):
-      return 3
-    if int(per_level[3]) < bet_amount <= int(per_level[4]):
-      return 2
-    if int(per_level[4]) < bet_amount <= int(per_level[5]):
-      return 1
+  def _game_outcome(self, game: GameModel, level: int, outcome: int, payout: int) -> None:
+    # typed companion of SelectedSquareResult, see game/events.py
+    self.GameOutcome(game.game_id, game.player_address, game.game_mode, level, outcome, payout)
+
+  def _get_game_repository(self) -> IGameRepository:
+    if self._game_repository is None:
+      self._game_repository = IGameRepository(self._db)
+    return self._game_repository
+
+  def _get_max_level(self, bet_amount: int, game_mode: int, persist: bool = True) -> int:
+    per_level = self._get_max_bet_per_level(game_mode, persist)
+    if not per_level:
+      raise InvalidGameMode("Invalid game mode entered")
+
+    # per_level holds the max bet of a game that can reach level 6, 5, 4, 3, 2, 1
+    for index, max_bet in enumerate(per_level):
+      if bet_amount <= max_bet:
+        return MAX_ROW_HEIGHT - index
 
     # if we get this far than we have an invalid bet amount so throw an error
-    raise InvalidBetValue(f'Invalid bet value. bet value needs to be between {BET_MIN} and {int(per_level[5])}')
+    raise InvalidBetValue(f'Invalid bet value. bet value needs to be between {BET_MIN} and {per_level[-1]}')
 
   def _get_treasury_min(self) -> int:
     treasury_min = self._roulette_score.get_treasury_min()
     return treasury_min
 
-  def _get_game_details(self, player_address: Address, active_game_num: int) -> str:
+  def _get_game_details(self, player_address: Address, active_game_num: int) -> dict:
     game_repository = IGameRepository(self._db)
-    game_details = str(game_repository.get(player_address, active_game_num))
-    return json_loads(game_details)
+    return game_repository.get(player_address, active_game_num).to_dict()
 
   def _get_open_games(self, player_address: Address) -> list:
     game_repository = IGameRepository(self._db)
     open_game_list = game_repository.get_open_games(player_address)
     return open_game_list
 
-  def _consume_steps(self, consumable: str) -> None:
-    consume_loops = self._consume_step_count.get()
-    for i in range(consume_loops):
-      json_object = json_loads(consumable)
-      json_dumps(json_object)
+  def _move_outcomes(self, game: GameModel, level: int, cash_out: bool = False) -> dict:
+    """
+    Outcomes a move played on level of game can have, a safe tile is cashed out when cash_out is set
+    :return: {branch: SettlementRecord of the outcome or None when it does not settle}
+    """
+    rules = GameRules.for_mode(game.game_mode)
+    rake = rules.balance(game.bet_amount, level)
+    outcomes = {STEP_BRANCH_LOSE: SettlementRecord(game.game_id, game.bet_amount, rake, 0)}
+    if cash_out or level + 1 == game.max_level_allowed:
+      payout = rules.balance(game.bet_amount, level + 1)
+      outcomes[STEP_BRANCH_WIN] = SettlementRecord(game.game_id, game.bet_amount, rake, payout)
+    else:
+      outcomes[STEP_BRANCH_SAFE] = None
+    return outcomes
+
+  def _custom_outcomes(self, bet_amount: int, number_of_tiles: int) -> dict:
+    return {
+      STEP_BRANCH_LOSE: SettlementRecord(0, bet_amount, 0, 0),
+      STEP_BRANCH_WIN: SettlementRecord(0, bet_amount, 0, Payout.custom(bet_amount, number_of_tiles))
+    }
+
+  def _move_costs(self, game: GameModel, level: int, cash_out: bool = False) -> dict:
+    table = SESSION_SETTLEMENT_STEP_COST[game.game_mode] if game.session_funded else None
+    return self._step_cost.move(game.game_mode, self._move_outcomes(game, level, cash_out), level + 1, table)
+
+  def _custom_costs(self, bet_amount: int, number_of_tiles: int, session_funded: bool, netting: bool) -> dict:
+    table = None
+    if session_funded:
+      table = SESSION_SETTLEMENT_STEP_COST[GameMode.CUSTOM]
+    elif netting:
+      table = NETTING_SETTLEMENT_STEP_COST
+    return self._step_cost.move(GameMode.CUSTOM, self._custom_outcomes(bet_amount, number_of_tiles), 0, table)
+
+  def _padding_units(self, costs: dict, branch: int) -> int:
+    # a loss is not padded, every other outcome is padded up to the most a loss can cost, so no outcome the player
+    # keeps costs less than a loss and a step limit can not be used to undo one
+    if branch == STEP_BRANCH_LOSE:
+      return 0
+    return self._step_padding.units(costs[STEP_BRANCH_LOSE], costs[branch])
+
+  def _move_padding_units(self, game: GameModel, level: int, branch: int, cash_out: bool = False) -> int:
+    return self._padding_units(self._move_costs(game, level, cash_out), branch)
+
+  def _custom_padding_units(self, bet_amount: int, number_of_tiles: int, branch: int, session_funded: bool,
+                            netting: bool) -> int:
+    return self._padding_units(self._custom_costs(bet_amount, number_of_tiles, session_funded, netting), branch)
+
+  def _pad_steps(self, game: GameModel, level: int, branch: int, cash_out: bool = False) -> None:
+    # pads an outcome the player keeps up to the most a loss of the move could have cost, with the settlement
+    # each of them makes, so a step limit can not be used to probe the result of a move
+    if self._reveal_seed is not None:
+      # a committed move is resolved from a seed already revealed, there is nothing left to probe
+      return
+    self._step_padding.burn(self._move_padding_units(game, level, branch, cash_out))
 
   def _select_tile(self, player_address: Address, active_game_num: int, square_id: int, user_seed: str):
     # this is the main betting function of the game
@@ -207,405 +370,897 @@ class DAOlevels(IconScoreBase):
     # if the player at any time lands on a safe square and is not on MAX_ROW_HEIGHT - 1 (second last row)
     # the player will increase in level
     # players are able to 'cash out' at at from level 1 onwards (except for jackpot mode)
-    game_repository = IGameRepository(self.db)
-    game = json_loads(game_repository.get(player_address, active_game_num))
-    current_level = int(game["level"])
-    game_max_height = int(game["max_level_allowed"])
-    game_mode = game["game_mode"]
-    bet_amount = int(game["bet_amount"])
-    rake_amount = int(game["balance"])
-
-    if active_game_num != game["active_game_num"]:
-      raise InvalidGameException(
-        f'active_game_num provided does not match any active_games initiated by player: active_game_num provided: {active_game_num}')
-
-    # make sure the tile selection input is a number
+    # the tiles, bombs, payouts and cash out level of every game mode come from its GameRules
+    game_repository = self._get_game_repository()
+    game = self._check_game(player_address, active_game_num)
+    square_id = self._check_square(game, square_id)
+    current_level = game.level
+    game_mode = game.game_mode
+    rake_amount = game.balance
+    rules = GameRules.for_mode(game_mode)
+    tiles = rules.tiles(current_level)
+
+    if game_mode == GameMode.JACKPOT and not self._promoDB.promo_switch.get():
+      self.GenericMessage("Maximum amount of Jackpots has been won, Promo is over")
+      self._game_outcome(game, current_level, OUTCOME_CLOSED, 0)
+      game_repository.remove_from_active_game(player_address, active_game_num, game)
+      return
+
+    random_number = self._get_random(tiles, user_seed)
+    outcome = rules.resolve(current_level, game.max_level_allowed, square_id, random_number)
+    if outcome == OUTCOME_LOST:
+      # player landed on bomb!
+      self._settle_game(game, rake_amount)
+      self._pad_steps(game, current_level, STEP_BRANCH_LOSE)
+      self.SelectedSquareResult(random_number, "LOST! - You landed on a Bomb!!")
+      self._game_outcome(game, current_level, OUTCOME_LOST, 0)
+      game_repository.remove_from_active_game(player_address, active_game_num, game)
+    elif outcome == OUTCOME_SAFE:
+      # player landed on a safe square!
+      self._pad_steps(game, current_level, STEP_BRANCH_SAFE)
+      game_repository.climb_level(game, random_number, square_id, self.now())
+      game_repository.save(player_address, active_game_num, game)
+      self.SelectedSquareResult(random_number, f"SAFE! - you are now on level: {game.level}")
+      self._game_outcome(game, game.level, OUTCOME_SAFE, game.balance)
+    else:
+      self._win_game(game_repository, player_address, active_game_num, game, random_number, rake_amount, outcome)
+
+  def _win_game(self, game_repository: IGameRepository, player_address: Address, active_game_num: int,
+                game: GameModel, random_number: int, rake_amount: int, outcome: int) -> None:
+    # the player cleared the last level of the game, pays the balance of that level
+    game_mode = game.game_mode
+    bet_amount = game.bet_amount
+    new_level = game.level + 1
+    payout = GameRules.for_mode(game_mode).balance(bet_amount, new_level)
+    from_ib_treasury = payout
+    if outcome == OUTCOME_JACKPOT:
+      self.SelectedSquareResult(random_number, "Congratulations you have won a JACKPOT!")
+      # treat the game like a normal 2% game and get roughly half of the winnings from IB, the promo part
+      # is paid by DAOlevels to make up the full jackpot
+      from_ib_treasury = Payout.apply(bet_amount, PROMO_IB_TREASURY_MULTIPLIER)
+    else:
+      self.SelectedSquareResult(random_number, "Congratulations you are a WINNER!")
+    self._pad_steps(game, game.level, STEP_BRANCH_WIN)
+    self._game_outcome(game, new_level, outcome, payout)
     try:
-      val = int(square_id)
-    except ValueError:
-      raise InvalidTileSelection("Must be an number")
-
-    if game_mode == GameMode.JACKPOT:
-
-      if square_id < 1 or square_id > MAX_BRICKS_PER_ROW:
-        raise InvalidTileSelection("Select a number 1-4")
-
-      jackpot_on = self._promoDB.promo_switch.get()
-      if jackpot_on:
-        # ---------------------
-        # LOGIC FOR JACKPOT MODE
-        # EASY MODE + LAST 2 LEVELS HAS 3 BOMBS
-        # ----------------------
-        random_number = int(self._get_random(MAX_BRICKS_PER_ROW, user_seed))
-        # JACKPOT
-        if current_level == 5 or current_level == 4:
-          # we are now in the hard part of the game last 2 rows
-          if square_id == random_number:
-            # 1 step closer!
-            new_level = current_level + 1
-            if new_level == PROMO_MAX_ROW_HEIGHT:
-              promo_wins = self._promoDB.promo_jackpot_wins.get() + 1
-              self.SelectedSquareResult(random_number, "Congratulations you have won a JACKPOT!")
-              try:
-                # treat the game like a normal 2% game and get roughly half of the winnings from IB
-                from_ib_treasury = bet_amount * float(PROMO_IB_TREASURY_MULTIPLIER)
-                self._take_wager_and_payout(bet_amount, int(from_ib_treasury), rake_amount)
-                # the promo part is we also give players another payout to make up the full 500ICX
-                from_levels_treasury = bet_amount * float(PROMO_LEVELS_TREASURY_MULTIPLIER)
-                self.icx.transfer(player_address, int(from_levels_treasury))
-                game_repository.remove_from_active_game(player_address, active_game_num)
-              except BaseException as e:
-                revert(str(e))
-              if promo_wins == 8:
-                # turn promo off
-                self._promoDB.promo_switch.set(False)
-                # reset number of jackpot wins back to 0 for when we want to turn on a promo again
-                self._promoDB.promo_jackpot_wins.set(0)
-              else:
-                self._promoDB.promo_jackpot_wins.set(promo_wins)
-            else:
-              self._consume_steps(json_dumps(game))
-              new_level = current_level + 1
-              game_repository.increase_level(player_address, active_game_num, random_number, square_id)
-              self.SelectedSquareResult(random_number, f"SAFE! - You are now on level: {new_level}")
-          else:
-            self._take_wager(bet_amount, rake_amount)
-            self.SelectedSquareResult(random_number, f"LOST! - Safe square was {random_number}")
-            game_repository.remove_from_active_game(player_address, active_game_num)
-        else:
-          # lower levels
-          if square_id == random_number:
-            # player landed on bomb!
-            self._take_wager(bet_amount, rake_amount)
-            self.SelectedSquareResult(random_number, "LOST! - You landed on a Bomb!!")
-            game_repository.remove_from_active_game(player_address, active_game_num)
-          else:
-            self._consume_steps(json_dumps(game))
-            new_level = current_level + 1
-            game_repository.increase_level(player_address, active_game_num, random_number, square_id)
-            self.SelectedSquareResult(random_number, f"SAFE! - You are now on level: {new_level}")
-      else:
-        self.GenericMessage("Maximum amount of Jackpots has been won, Promo is over")
-        game_repository.remove_from_active_game(player_address, active_game_num)
-
-    # easy mode
-    # 4 tiles per row
-    # 1 bomb per row
-    elif game_mode == GameMode.EASY:
-
-      if square_id < 1 or square_id > MAX_BRICKS_PER_ROW:
-        raise InvalidTileSelection("Select a number 1-4")
+      self._settle_game(game, rake_amount, from_ib_treasury)
+      if payout > from_ib_treasury:
+        self._pay_player(game, payout - from_ib_treasury, "Paying the promo part of a jackpot")
+      game_repository.remove_from_active_game(player_address, active_game_num, game)
+    except BaseException as e:
+      Logger.debug(f'Send failed. Exception: {e}', TAG)
+      revert(f'Network problem. Winnings not sent. Returning funds. {str(e)}')
 
-      random_number = int(self._get_random(MAX_BRICKS_PER_ROW, user_seed))
-      if square_id == random_number:
-        # player landed on bomb!
-        self._take_wager(bet_amount, rake_amount)
-        self.SelectedSquareResult(random_number, "LOST! - You landed on a Bomb!!")
-        game_repository.remove_from_active_game(player_address, active_game_num)
-      else:
-        # player landed on a safe square!
-        new_level = current_level + 1
-        if new_level == game_max_height:
-          self.SelectedSquareResult(random_number, "Congratulations you are a WINNER!")
-          payout = bet_amount * float(ROW_MULTIPLIER[new_level])
-          try:
-            self._take_wager_and_payout(bet_amount, int(payout), rake_amount)
-            game_repository.remove_from_active_game(player_address, active_game_num)
-          except BaseException as e:
-            Logger.debug(f'Send failed. Exception: {e}', TAG)
-            revert(f'Network problem. Winnings not sent. Returning funds. {str(e)}')
-        else:
-          self._consume_steps(json_dumps(game))
-          game_repository.increase_level_and_balance(player_address, active_game_num, random_number, square_id)
-          self.SelectedSquareResult(random_number, f"SAFE! - you are now on level: {new_level}")
-
-    # medium mode
-    # 3 tiles per row
-    # 1 bomb per row
-    elif game_mode == GameMode.MEDIUM:
-
-      if square_id < 1 or square_id > MEDIUM_MAX_BRICKS_PER_ROW:
-        raise InvalidTileSelection("Select a number 1-3")
-
-      random_number = int(self._get_random(MEDIUM_MAX_BRICKS_PER_ROW, user_seed))
-      if square_id == random_number:
-        # player landed on bomb!
-        self._take_wager(bet_amount, rake_amount)
-        self.SelectedSquareResult(random_number, "LOST! - You landed on a Bomb!!")
-        game_repository.remove_from_active_game(player_address, active_game_num)
-      else:
-        # player landed on a safe square!
-        new_level = current_level + 1
-        if new_level == game_max_height:
-          self.SelectedSquareResult(random_number, "Congratulations you are a WINNER!")
-          payout = bet_amount * float(MEDIUM_ROW_MULTIPLIER[new_level])
-          try:
-            self._take_wager_and_payout(bet_amount, int(payout), rake_amount)
-            game_repository.remove_from_active_game(player_address, active_game_num)
-          except BaseException as e:
-            Logger.debug(f'Send failed. Exception: {e}', TAG)
-            revert(f'Network problem. Winnings not sent. Returning funds. {str(e)}')
-        else:
-          self._consume_steps(json_dumps(game))
-          game_repository.increase_level_and_balance(player_address, active_game_num, random_number, square_id)
-          self.SelectedSquareResult(random_number, f"SAFE! - you are now on level: {new_level}")
-
-    # hard mode
-    # 3 tiles per row
-    # 2 bomb per row
-    elif game_mode == GameMode.HARD:
-
-      if square_id < 1 or square_id > HARD_MAX_BRICKS_PER_ROW:
-        raise InvalidTileSelection("Select a number 1-3")
-
-      random_number = int(self._get_random(HARD_MAX_BRICKS_PER_ROW, user_seed))
-      if square_id == random_number:
-        # player landed on a safe square!
-        new_level = current_level + 1
-        if new_level == game_max_height:
-          self.SelectedSquareResult(random_number, "Congratulations you are a WINNER!")
-          payout = bet_amount * float(HARD_ROW_MULTIPLIER[new_level])
-          try:
-            self._take_wager_and_payout(bet_amount, int(payout), rake_amount)
-            game_repository.remove_from_active_game(player_address, active_game_num)
-          except BaseException as e:
-            Logger.debug(f'Send failed. Exception: {e}', TAG)
-            revert(f'Network problem. Winnings not sent. Returning funds. {str(e)}')
-        else:
-          self._consume_steps(json_dumps(game))
-          game_repository.increase_level_and_balance(player_address, active_game_num, random_number, square_id)
-          self.SelectedSquareResult(random_number, f"SAFE! - you are now on level: {new_level}")
+    if outcome == OUTCOME_JACKPOT:
+      promo_wins = self._promoDB.promo_jackpot_wins.get() + 1
+      if promo_wins == 8:
+        # turn promo off
+        self._promoDB.promo_switch.set(False)
+        # reset number of jackpot wins back to 0 for when we want to turn on a promo again
+        self._promoDB.promo_jackpot_wins.set(0)
       else:
-        # player landed on bomb!
-        self._take_wager(bet_amount, rake_amount)
-        self.SelectedSquareResult(random_number, "LOST! - You landed on a Bomb!!")
-        game_repository.remove_from_active_game(player_address, active_game_num)
+        self._promoDB.promo_jackpot_wins.set(promo_wins)
 
   def _process_cash_out(self, player_address: Address, active_game_num: int):
-    game_repository = IGameRepository(self.db)
-    game = json_loads(game_repository.get(player_address, active_game_num))
-    game_mode = game["game_mode"]
-    current_level = int(game["level"])
-    bet_amount = int(game["bet_amount"])
-    balance = int(game["balance"])
-    rake_amount = 0
+    game_repository = self._get_game_repository()
+    game = self._check_game(player_address, active_game_num)
+    self._cash_out_game(game_repository, player_address, active_game_num, game)
+
+  def _cash_out_game(self, game_repository: IGameRepository, player_address: Address, active_game_num: int,
+                     game: GameModel):
+    current_level = game.level
+    balance = game.balance
+    rules = self._check_cash_out(game)
+
+    # send accrued balance to player, the rake is the balance the game had a level below
+    rake_amount = rules.balance(game.bet_amount, current_level - 1)
+    try:
+      self._settle_game(game, rake_amount, balance)
+      self._game_outcome(game, current_level, OUTCOME_CASHED_OUT, balance)
+      game_repository.remove_from_active_game(player_address, active_game_num, game)
+    except BaseException as e:
+      Logger.debug(f'Send failed. Exception: {e}', TAG)
+      revert(str(e))
 
-    if game_mode == GameMode.JACKPOT:
-      revert("You are not able to cash out during a promo game")
-    # check if the player is on the correct level to cash out
-
-    if current_level > 0:
-      # send accrued balance to player
-      if current_level > 1:
-        if game_mode == GameMode.EASY:
-          rake_amount = bet_amount * float(ROW_MULTIPLIER[current_level - 1])
-        elif game_mode == GameMode.MEDIUM:
-          rake_amount = bet_amount * float(MEDIUM_ROW_MULTIPLIER[current_level - 1])
-        elif game_mode == GameMode.HARD:
-          rake_amount = bet_amount * float(HARD_ROW_MULTIPLIER[current_level - 1])
-      try:
-        self._take_wager_and_payout(bet_amount, balance, int(rake_amount))
-        game_repository.remove_from_active_game(player_address, active_game_num)
-      except BaseException as e:
-        Logger.debug(f'Send failed. Exception: {e}', TAG)
-        revert(str(e))
+  def _auto_climb(self, player_address: Address, active_game_num: int, square_ids: list, user_seed: str,
+                  stop_at_level: int = 0, cash_out: bool = False):
+    # plays several select_tile moves of an EASY, MEDIUM or HARD game in one transaction
+    # the tiles are resolved in order against the in memory game until the player loses, wins, runs out of
+    # square_ids or reaches stop_at_level, the game is then settled or saved once
+    # with cash_out set a game still open after the climb is cashed out straight away
+    # square_ids come checked by _check_auto_climb
+    game_repository = self._get_game_repository()
+    game = game_repository.get(player_address, active_game_num)
+    game_mode = game.game_mode
+    game_max_height = game.max_level_allowed
+    rules = GameRules.for_mode(game_mode)
+
+    target_level = game_max_height
+    if 0 < stop_at_level < game_max_height:
+      target_level = stop_at_level
+    if game.level >= target_level:
+      # a committed move resolved first can leave the game on stop_at_level
+      revert(f'The game is on level {game.level} already, there is nothing to climb')
+
+    for square_id in square_ids:
+      current_level = game.level
+      if current_level >= target_level:
+        break
+
+      rake_amount = game.balance
+      # every level gets its own draw, the level keeps draws within the transaction independent
+      random_number = self._get_random(rules.tiles(current_level), f"{user_seed}:{current_level}")
+      outcome = rules.resolve(current_level, game_max_height, square_id, random_number)
+      if outcome == OUTCOME_LOST:
+        self._settle_game(game, rake_amount)
+        self._pad_steps(game, current_level, STEP_BRANCH_LOSE, cash_out)
+        self.SelectedSquareResult(random_number, "LOST! - You landed on a Bomb!!")
+        self._game_outcome(game, current_level, OUTCOME_LOST, 0)
+        game_repository.remove_from_active_game(player_address, active_game_num, game)
+        return
+
+      if outcome != OUTCOME_SAFE:
+        self._win_game(game_repository, player_address, active_game_num, game, random_number, rake_amount, outcome)
+        return
+
+      game_repository.climb_level(game, random_number, square_id, self.now())
+      self.SelectedSquareResult(random_number, f"SAFE! - you are now on level: {game.level}")
+      self._game_outcome(game, game.level, OUTCOME_SAFE, game.balance)
+
+    # the climb ends on a safe tile of the level below, a cash out settles like a win of that move
+    last_level = max(game.level - 1, 0)
+    if cash_out:
+      self._pad_steps(game, last_level, STEP_BRANCH_WIN, True)
+      self._cash_out_game(game_repository, player_address, active_game_num, game)
     else:
-      raise InvalidLevelToCashOut(f'You are not allowed cash out at level: {current_level}')
-
-  def _custom_bet(self, bet_amount: int, number_of_tiles: int, square_id: int, user_seed: str = '') -> None:
-    self._valid_custom_game(number_of_tiles, square_id)
+      self._pad_steps(game, last_level, STEP_BRANCH_SAFE)
+      game_repository.save(player_address, active_game_num, game)
 
-    if bet_amount < BET_MIN:
-      revert(f'Invalid Min Bet: Min allowed is {BET_MIN}')
-
-    max_bet_allowed = self._get_max_bet_custom_game(number_of_tiles)
-    if bet_amount > max_bet_allowed:
-      revert(f'Invalid Max Bet: Max allowed is {max_bet_allowed}')
+  def _custom_bet(self, bet_amount: int, number_of_tiles: int, square_id: int, user_seed: str = '',
+                  session_funded: bool = False) -> None:
+    number_of_tiles, square_id = self._check_custom_bet(number_of_tiles, square_id, bet_amount)
 
+    if session_funded:
+      self._debit_session(self.msg.sender, bet_amount, "Custom bet")
+    netting = not session_funded and self._nettingDB.netting_on.get()
     random_number = int(self._get_random(number_of_tiles, user_seed))
     payout = 0
     if square_id == random_number:
       # player landed on bomb!
       try:
-        self._take_wager(bet_amount, 0)
+        self._settle_custom_bet(bet_amount, 0, session_funded, netting)
+        self._step_padding.burn(
+          self._custom_padding_units(bet_amount, number_of_tiles, STEP_BRANCH_LOSE, session_funded, netting))
         self.SelectedSquareResult(random_number, "LOST! - You landed on a Bomb!!")
+        self.GameOutcome(0, self.msg.sender, GameMode.CUSTOM, 0, OUTCOME_LOST, 0)
       except BaseException as e:
         revert(f'Send failed. Exception: {e}')
     else:
       self.SelectedSquareResult(random_number, "Congratulations you are a WINNER!")
-      if number_of_tiles == 8:
-        payout = bet_amount * float(CUSTOM_MULTIPLIER[1])
-      elif number_of_tiles == 12:
-        payout = bet_amount * float(CUSTOM_MULTIPLIER[2])
-      elif number_of_tiles == 16:
-        payout = bet_amount * float(CUSTOM_MULTIPLIER[3])
-      elif number_of_tiles == 20:
-        payout = bet_amount * float(CUSTOM_MULTIPLIER[4])
-      elif number_of_tiles == 24:
-        payout = bet_amount * float(CUSTOM_MULTIPLIER[5])
-
+      payout = Payout.custom(bet_amount, number_of_tiles)
+      self.GameOutcome(0, self.msg.sender, GameMode.CUSTOM, 1, OUTCOME_WON, payout)
       try:
-        self._take_wager_and_payout(bet_amount, int(payout), 0)
+        self._settle_custom_bet(bet_amount, payout, session_funded, netting)
+        self._step_padding.burn(
+          self._custom_padding_units(bet_amount, number_of_tiles, STEP_BRANCH_WIN, session_funded, netting))
       except BaseException as e:
         revert(f'Send failed. Exception: {e}')
 
-  def _valid_custom_game(self, number_of_tiles: int, square_id: int) -> None:
-    try:
-      val = int(square_id)
-    except ValueError:
-      revert("Bet failed returning funds")
-      raise InvalidTileSelection("Must be an number")
-
-    try:
-      val = int(number_of_tiles)
-    except ValueError:
-      revert("Number of tiles must be a number")
-
-    if square_id < 1 or square_id > MAX_CUSTOM_BRICKS:
-      revert("Select a number 1-24")
-
-    if number_of_tiles not in [8, 12, 16, 20, 24]:
-      revert("Number of tiles must be either 8, 12, 16, 20, 24")
+  def _settle_custom_bet(self, bet_amount: int, payout: int, session_funded: bool = False,
+                         netting: bool = False) -> None:
+    if session_funded:
+      # custom bets are not stored as games, they settle without a game id
+      self._settle_session(0, self.msg.sender, bet_amount, 0, payout)
+      return
+    # with netting on the bet is only recorded in the ledger of the open epoch, DAOlevels keeps the wager
+    # and pays the win itself, the roulette score only sees the net result when the epoch closes
+    # a bet that would take the float of DAOlevels over its limit is settled straight away
+    if netting:
+      ledger = self._get_netting_ledger()
+      if self._netting_epoch_due(ledger):
+        ledger = self._close_netting_epoch(ledger)
+      exposure = ledger["payout"] + payout - ledger["wager"] - bet_amount
+      if exposure <= self._nettingDB.float_limit.get():
+        ledger["bets"] += 1
+        ledger["wager"] += bet_amount
+        ledger["payout"] += payout
+        self._nettingDB.ledger.set(json_dumps(ledger))
+        if payout > 0:
+          self.FundTransfer(self.msg.sender, payout, "Paying custom bet from the netting ledger")
+          self.icx.transfer(self.msg.sender, payout)
+        return
+      self._nettingDB.ledger.set(json_dumps(ledger))
+    # custom bets are not stored as games, they settle without a game id
+    self._settle(0, bet_amount, 0, payout)
+
+  def _get_netting_ledger(self) -> dict:
+    ledger = self._nettingDB.ledger.get()
+    if not ledger:
+      return self._new_netting_ledger(0)
+    return json_loads(ledger)
+
+  def _new_netting_ledger(self, carried_payout: int) -> dict:
+    ledger = {
+      'block_height': self.block_height,
+      'bets': 0,
+      'wager': 0,
+      'payout': carried_payout
+    }
+    return ledger
+
+  def _netting_epoch_due(self, ledger: dict) -> bool:
+    epoch_bets = self._nettingDB.epoch_bets.get()
+    if epoch_bets == 0:
+      return ledger["block_height"] != self.block_height
+    return ledger["bets"] >= epoch_bets
+
+  def _close_netting_epoch(self, ledger: dict) -> dict:
+    # pushes the net wager of the epoch to the roulette score, a net payout was paid from the DAOlevels
+    # balance and is carried into the next epoch to be netted against its wagers
+    net = ledger["wager"] - ledger["payout"]
+    if net > 0:
+      self._settle(0, net, 0)
+    return self._new_netting_ledger(max(-net, 0))
+
+  def _settle_game(self, game: GameModel, rake_amount: int, payout_amount: int = 0) -> None:
+    if game.session_funded or (self._sweeping and payout_amount > 0):
+      self._settle_session(game.game_id, game.player_address, game.bet_amount, rake_amount, payout_amount)
+    else:
+      self._settle(game.game_id, game.bet_amount, rake_amount, payout_amount)
 
-    if square_id > number_of_tiles:
-      revert("square selection is greater than number of tiles")
+  def _pay_player(self, game: GameModel, amount: int, note: str) -> None:
+    # ICX DAOlevels pays itself, into the session balance when the game was bet from it
+    if game.session_funded:
+      self._credit_session(game.player_address, amount, note)
+    else:
+      self.icx.transfer(game.player_address, amount)
 
-  def _get_max_bet_custom_game(self, number_of_tiles: int) -> int:
-    _treasury_min = self._roulette_score.get_treasury_min()
-    max_bet = 0
-    if number_of_tiles == 8:
-      max_bet = int((_treasury_min * 1.5 * 86) // (68134 - 681.34 * 86))
-    elif number_of_tiles == 12:
-      max_bet = int((_treasury_min * 1.5 * 88) // (68134 - 681.34 * 88))
-    elif number_of_tiles == 16:
-      max_bet = int((_treasury_min * 1.5 * 90) // (68134 - 681.34 * 90))
-    elif number_of_tiles == 20:
-      max_bet = int((_treasury_min * 1.5 * 92) // (68134 - 681.34 * 92))
-    elif number_of_tiles == 24:
-      max_bet = int((_treasury_min * 1.5 * 94) // (68134 - 681.34 * 94))
-
-    return max_bet
-
-  def _take_wager_and_payout(self, bet_amount: int, payout_amount: int, rake_amount: int) -> None:
-    self.FundTransfer(self._iconBetDB.iconbet_score.get(), bet_amount, "Sending icx to Roulette")
-    # send wager to iconbet
-    self.icx.transfer(self._iconBetDB.iconbet_score.get(), bet_amount)
-    self._roulette_score.take_wager(bet_amount)
-    if rake_amount > 0:
-      self._roulette_score.take_rake(rake_amount, rake_amount)
-    # send payout request to iconbet
-    self._roulette_score.wager_payout(payout_amount)
-
-  def _take_wager(self, bet_amount: int, rake_amount: int) -> None:
-    self.FundTransfer(self._iconBetDB.iconbet_score.get(), bet_amount, "Sending icx to Roulette")
+  def _bet_source(self, value: int, bet_amount: int) -> tuple:
+    """
+    A bet is paid with the ICX sent along, or when none is sent with bet_amount taken from the session balance
+    :return: (bet amount, whether it comes from the session balance)
+    """
+    if value > 0:
+      if bet_amount:
+        revert('Send the bet or take it from the session balance, not both')
+      return value, False
+    return bet_amount, bet_amount > 0
+
+  def _credit_session(self, player_address: Address, amount: int, note: str) -> None:
+    session = self._sessionDB
+    balance = session.balances[player_address] + amount
+    session.balances[player_address] = balance
+    session.total_balances.set(session.total_balances.get() + amount)
+    self.SessionBalanceChanged(player_address, amount, balance, note)
+
+  def _debit_session(self, player_address: Address, amount: int, note: str) -> None:
+    session = self._sessionDB
+    balance = self._check_session_balance(player_address, amount)
+    session.balances[player_address] = balance - amount
+    session.total_balances.set(session.total_balances.get() - amount)
+    self.SessionBalanceChanged(player_address, -amount, balance - amount, note)
+
+  def _settle_session(self, game_id: int, player_address: Address, bet_amount: int, rake_amount: int,
+                      payout: int) -> None:
+    # a bet taken from a session balance is only recorded in the session ledger and its payout paid into the
+    # balance, no ICX moves until the ledger is settled with the roulette score
+    # a bet that would take the float of DAOlevels over its limit is settled straight away, the roulette
+    # score pays its win to the player's wallet, except for a game settled by the sweep which always pays
+    # into the session balance
+    ledger = self._get_session_ledger()
+    if self._session_epoch_due(ledger):
+      ledger = self._close_session_epoch(ledger)
+    exposure = ledger["payout"] + payout - ledger["wager"] - bet_amount
+    if exposure > self._sessionDB.float_limit.get() and not self._sweeping:
+      self._sessionDB.ledger.set(json_dumps(ledger))
+      self._settle(game_id, bet_amount, rake_amount, payout)
+      return
+    ledger["bets"] += 1
+    ledger["wager"] += bet_amount
+    ledger["rake"] += rake_amount
+    ledger["payout"] += payout
+    self._sessionDB.ledger.set(json_dumps(ledger))
+    if payout > 0:
+      self._credit_session(player_address, payout, "Paying bet into the session balance")
+
+  def _get_session_ledger(self) -> dict:
+    ledger = self._sessionDB.ledger.get()
+    if not ledger:
+      return self._new_session_ledger(0, 0)
+    return json_loads(ledger)
+
+  def _new_session_ledger(self, carried_rake: int, carried_payout: int) -> dict:
+    ledger = {
+      'block_height': self.block_height,
+      'bets': 0,
+      'wager': 0,
+      'rake': carried_rake,
+      'payout': carried_payout
+    }
+    return ledger
+
+  def _session_epoch_due(self, ledger: dict) -> bool:
+    settle_blocks = self._sessionDB.settle_blocks.get() or SESSION_SETTLE_BLOCKS
+    return self.block_height >= ledger["block_height"] + settle_blocks
+
+  def _close_session_epoch(self, ledger: dict) -> dict:
+    # pushes the net wager of the ledger to the roulette score, a net payout stays in the session balances and
+    # is carried with its rake into the next ledger to be netted against its wagers
+    net = ledger["wager"] - ledger["payout"]
+    if net > 0:
+      self._settle(0, net, ledger["rake"])
+      return self._new_session_ledger(0, 0)
+    return self._new_session_ledger(ledger["rake"], -net)
+
+  def _get_max_bet_custom_game(self, number_of_tiles: int, persist: bool = True) -> int:
+    limits = self._get_limits(persist)
+    return limits["custom"].get(str(number_of_tiles), 0)
+
+  def _settle(self, game_id: int, bet_amount: int, rake_amount: int, payout_amount: int = 0) -> None:
+    if self._batch_settlement is not None:
+      self._batch_settlement.append(SettlementRecord(game_id, bet_amount, rake_amount, payout_amount))
+      return
+    roulette_address = self._roulette_address
+    self.FundTransfer(roulette_address, bet_amount, "Sending icx to Roulette")
     # send wager to iconbet
-    self.icx.transfer(self._iconBetDB.iconbet_score.get(), bet_amount)
-    self._roulette_score.take_wager(bet_amount)
-    if rake_amount > 0:
-      self._roulette_score.take_rake(rake_amount, rake_amount)
+    self.icx.transfer(roulette_address, bet_amount)
+    record = SettlementRecord(game_id, bet_amount, rake_amount, payout_amount)
+    if self._step_cost.batched_settlement:
+      BatchedSettlement(self._roulette_score).settle(record)
+    else:
+      LegacySettlement(self._roulette_score).settle(record)
 
   def _get_random(self, brick_count: int, user_seed: str = '', ) -> int:
     # generates a random number between 1 - max options per bet
 
     if self.msg.sender.is_contract:
       revert("ICONbet: SCORE cant play games")
-    
+
+    if self._reveal_seed is not None:
+      return self._seed_draw(self._reveal_seed, brick_count, user_seed)
+
     seed = (str(bytes.hex(self.tx.hash)) + str(self.now()) + user_seed)
     brick = (int.from_bytes(sha3_256(seed.encode()), "big") % brick_count + 1) / 1
     return int(brick)
 
-  def _get_max_bet_per_level(self, game_mode: int) -> list:
-    _treasury_min = self._roulette_score.get_treasury_min()
-    max_bet_level = list()
-
-    if game_mode == GameMode.EASY:
-      # level 6
-      sixth_limit = int((_treasury_min * 1.5 * 17) // (68134 - 681.34 * 17))
-      max_bet_level.append(sixth_limit)
-
-      # level 5
-      fifth_limit = int((_treasury_min * 1.5 * 23) // (68134 - 681.34 * 23))
-      max_bet_level.append(fifth_limit)
-
-      # level 4
-      fourth_limit = int((_treasury_min * 1.5 * 31) // (68134 - 681.34 * 31))
-      max_bet_level.append(fourth_limit)
-
-      # level 3
-      third_limit = int((_treasury_min * 1.5 * 42) // (68134 - 681.34 * 42))
-      max_bet_level.append(third_limit)
-
-      # level 2
-      second_limit = int((_treasury_min * 1.5 * 56) // (68134 - 681.34 * 56))
-      max_bet_level.append(second_limit)
+  @staticmethod
+  def _seed_draw(link: bytes, brick_count: int, draw_seed: str) -> int:
+    # draw of a committed move, draw_seed binds it to the game, its level and the user seed
+    return int.from_bytes(sha3_256(link + draw_seed.encode()), "big") % brick_count + 1
+
+  def _commit_move(self, player_address: Address, active_game_num: int, square_id: int, user_seed: str) -> None:
+    # commit-reveal mode: the move is stored against the house seed after the next one and resolved once that
+    # seed is revealed. The next seed may already sit in the mempool in a reveal_seed transaction, the one after
+    # it can only be known once the next one is in a block, so nobody knows the draw when the move is sent
+    game = self._check_game(player_address, active_game_num)
+    square_id = self._check_square(game, square_id)
+    seed_index = self._check_commit_seed()
+    self._seedChainDB.pending_moves[f'{player_address}:{active_game_num}'] = json_dumps(
+      [game.game_id, seed_index, square_id, user_seed, game.level, self.now()])
+    self.MoveCommitted(game.game_id, player_address, game.level, square_id, user_seed, seed_index)
+
+  def _resolve_pending_move(self, player_address: Address, active_game_num: int) -> bool:
+    """
+    Resolves the committed move of a game slot once its house seed is revealed
+    :return: False when the resolved move finished the game
+    """
+    pending_moves = self._seedChainDB.pending_moves
+    key = f'{player_address}:{active_game_num}'
+    pending = pending_moves[key]
+    if not pending:
+      return True
+    game_id, seed_index, square_id, user_seed, level, _ = json_loads(pending)
+    game_repository = self._get_game_repository()
+    game = game_repository.session(player_address).find(active_game_num)
+    if game is None or game.game_id != game_id:
+      # left over from a game finished by the admin sweep
+      pending_moves.remove(key)
+      return True
+    if seed_index > self._seedChainDB.revealed.get():
+      revert(f'The move is waiting for house seed {seed_index}')
+
+    pending_moves.remove(key)
+    self._reveal_seed = self._seedChainDB.links[seed_index]
+    self._select_tile(player_address, active_game_num, square_id, f'{game_id}:{level}:{user_seed}')
+    self._reveal_seed = None
+    return game_repository.session(player_address).find(active_game_num) is not None
+
+  def _get_max_bet_per_level(self, game_mode: int, persist: bool = True) -> list:
+    limits = self._get_limits(persist)
+    return limits["levels"].get(str(game_mode), [])
+
+  def _get_limits(self, persist: bool = True) -> dict:
+    """
+    Returns the cached bet limits table, rebuilding it from the roulette treasury once the refresh window has passed
+    :param persist: store a rebuilt table, readonly calls must pass False
+    :type persist: bool
+    :return: dict with the per level limits of each game mode and the custom game limits
+    """
+    limits = self._cached_limits()
+    if limits is None:
+      limits = self._build_limits(self._get_treasury_min(), persist)
+    return limits
+
+  def _cached_limits(self) -> dict:
+    # the stored bet limits table, None once the refresh window has passed
+    limits_table = self._limitsDB.limits_table.get()
+    if limits_table:
+      limits = json_loads(limits_table)
+      if self.block_height < limits["block_height"] + limits["refresh_window"]:
+        return limits
+    return None
+
+  def _build_limits(self, treasury_min: int, persist: bool = True) -> dict:
+    limits = {
+      'treasury_min': treasury_min,
+      'block_height': self.block_height,
+      'refresh_window': self._limitsDB.refresh_window.get() or LIMITS_REFRESH_WINDOW,
+      'levels': {str(game_mode): Payout.max_bet_per_level(treasury_min, game_mode)
+                 for game_mode in [GameMode.EASY, GameMode.MEDIUM, GameMode.HARD]},
+      'custom': {str(number_of_tiles): Payout.max_bet_custom_game(treasury_min, number_of_tiles)
+                 for number_of_tiles in CUSTOM_TILE_COUNTS},
+      'max_payout': Payout.max_game_payout(treasury_min)
+    }
+    if persist:
+      self._limitsDB.limits_table.set(json_dumps(limits))
+    return limits
 
-      # level 1
-      one_limit = int((_treasury_min * 1.5 * 75) // (68134 - 681.34 * 75))
-      max_bet_level.append(one_limit)
+  def _validate_action(self, action_model: dict) -> None:
+    """
+       Sanity checks for the action model passed in
+       :param action_model: JSON metadata of the game
+       :type action_model: dict
+       :return:
+     """
+    method_name = action_model["name"]
+    if method_name not in DAOlevels._ACTIONS:
+      revert(f'There is no valid action method: {method_name} for this game')
 
-    elif game_mode == GameMode.MEDIUM:
-      # level 6
-      sixth_limit = int((_treasury_min * 1.5 * 8) // (68134 - 681.34 * 8))
-      max_bet_level.append(sixth_limit)
+  @staticmethod
+  def _action_args(method_name: str, params: dict) -> list:
+    _, _, required, optional = DAOlevels._ACTIONS[method_name]
+    return [params[name] for name in required] + [params.get(name, default) for name, default in optional]
 
-      # level 5
-      fifth_limit = int((_treasury_min * 1.5 * 13) // (68134 - 681.34 * 13))
-      max_bet_level.append(fifth_limit)
+  def _dispatch(self, method_name: str, *args) -> None:
+    # single entry point of every game action, from action or from the typed externals
+    if not self._iconBetDB.game_on.get():
+      revert(f'DAOlevels game is turned off')
 
-      # level 4
-      fourth_limit = int((_treasury_min * 1.5 * 19) // (68134 - 681.34 * 19))
-      max_bet_level.append(fourth_limit)
+    handler_name, _, _, _ = DAOlevels._ACTIONS[method_name]
+    # every game touched by the action is read once and written back once at the end
+    self._game_repository = IGameRepository(self._db)
+    getattr(self, handler_name)(*args)
+    self._game_repository.flush()
+    self._game_repository = None
+
+  def _create_new_game_action(self, game_mode: int, bet_amount: int) -> None:
+    bet_amount, session_funded = self._bet_source(self.msg.value, bet_amount)
+    self._create_new_game(self.msg.sender, bet_amount, self.now(), game_mode, session_funded)
+
+  def _select_tile_action(self, active_game_num: int, square_id: int, user_seed: str) -> None:
+    player_address = self.msg.sender
+    if not self._resolve_pending_move(player_address, active_game_num):
+      return
+    if self._seedChainDB.commit_reveal.get():
+      game = self._get_game_repository().get(player_address, active_game_num)
+      # jackpot games keep drawing from the transaction, their payout can only reach the player in their own call
+      if game.game_mode != GameMode.JACKPOT:
+        self._commit_move(player_address, active_game_num, square_id, user_seed)
+        return
+    self._select_tile(player_address, active_game_num, square_id, user_seed)
+
+  def _select_tiles_action(self, moves: list) -> None:
+    # one select_tile on each of several game slots of the player, the games are read and written once by the
+    # action and the games it finishes are settled with the roulette score as one record, or as few as keep each
+    # payout within the most a single game can pay
+    moves = self._check_moves(moves)
+    self._batch_settlement = list()
+    for active_game_num, square_id, user_seed in moves:
+      # the slot keeps the draws of moves sent with the same user seed independent
+      self._select_tile_action(active_game_num, square_id, f"{user_seed}:{active_game_num}")
+    records = self._batch_settlement
+    self._batch_settlement = None
+    for batch in self._settlement_batches(records):
+      game_id = batch[0].game_id if len(batch) == 1 else 0
+      self._settle(game_id, sum(record.wager for record in batch), sum(record.rake for record in batch),
+                   sum(record.payout for record in batch))
+
+  def _settlement_batches(self, records: list, persist: bool = True) -> list:
+    """
+    Groups the records of one action into settlements whose summed payout stays within the most a single game can
+    pay, so the roulette score is never asked for a payout the bet limits would not allow. A record paying more
+    than that on its own is settled alone.
+    :return: list of lists of SettlementRecord
+    """
+    if len(records) < 2:
+      return [records] if records else []
+    max_payout = self._get_limits(persist)["max_payout"]
+    batches = [[]]
+    payout = 0
+    for record in records:
+      if batches[-1] and payout + record.payout > max_payout:
+        batches.append([])
+        payout = 0
+      batches[-1].append(record)
+      payout += record.payout
+    return batches
+
+  def _resolve_move_action(self, active_game_num: int) -> None:
+    if not self._seedChainDB.pending_moves[f'{self.msg.sender}:{active_game_num}']:
+      revert('There is no move waiting for a house seed')
+    self._resolve_pending_move(self.msg.sender, active_game_num)
+
+  def _cash_out_action(self, active_game_num: int) -> None:
+    if self._resolve_pending_move(self.msg.sender, active_game_num):
+      self._process_cash_out(self.msg.sender, active_game_num)
+
+  def _custom_bet_action(self, number_of_tiles: int, square_id: int, user_seed: str, bet_amount: int) -> None:
+    bet_amount, session_funded = self._bet_source(self.msg.value, bet_amount)
+    self._custom_bet(bet_amount, number_of_tiles, square_id, user_seed, session_funded)
+
+  def _auto_climb_action(self, active_game_num: int, square_ids: list, user_seed: str, stop_at_level: int,
+                         cash_out: bool) -> None:
+    # checked before a committed move is resolved, like the cost estimate does
+    square_ids = self._check_auto_climb(self._check_game(self.msg.sender, active_game_num), square_ids,
+                                        stop_at_level)
+    if not self._resolve_pending_move(self.msg.sender, active_game_num):
+      return
+    self._auto_climb(self.msg.sender, active_game_num, square_ids, user_seed, stop_at_level, cash_out)
 
-      # level 3
-      third_limit = int((_treasury_min * 1.5 * 29) // (68134 - 681.34 * 29))
-      max_bet_level.append(third_limit)
+  # ================================================
+  #  Action checks
+  # ================================================
+  # checks of the parameters of an action against the current state, shared by the action handlers and their
+  # cost estimates so an estimate reverts wherever the action would
+  def _check_new_game(self, player_address: Address, bet_amount: int, game_mode: int, persist: bool = True) -> int:
+    """
+    :return: the highest level the bet can reach
+    """
+    if bet_amount < BET_MIN:
+      raise InvalidBetValue(f'Invalid Min Bet: Min allowed is {BET_MIN}')
+    if game_mode not in [GameMode.EASY, GameMode.MEDIUM, GameMode.HARD, GameMode.JACKPOT]:
+      raise InvalidGameMode("Invalid game mode entered")
+    if self._get_game_repository().session(player_address).free_slot() == 0:
+      raise MaxConcurrentGamesReached(f"No more than {MAX_OPEN_GAMES} concurrent games can be played at once")
 
-      # level 2
-      second_limit = int((_treasury_min * 1.5 * 44) // (68134 - 681.34 * 44))
-      max_bet_level.append(second_limit)
+    if game_mode == GameMode.JACKPOT:
+      if not self._promoDB.promo_switch.get():
+        revert("Maximum amount of Jackpots has been won, Promo is over, returning funds")
+      if bet_amount != PROMO_ENTRY_VALUE:
+        revert("Promo entry fee is 5 ICX")
+      return PROMO_MAX_ROW_HEIGHT
+    return self._get_max_level(bet_amount, game_mode, persist)
+
+  def _check_game(self, player_address: Address, active_game_num: int) -> GameModel:
+    return self._get_game_repository().get(player_address, active_game_num)
+
+  @staticmethod
+  def _check_square(game: GameModel, square_id: int) -> int:
+    # the tile picked on the level game is on
+    try:
+      square_id = int(square_id)
+    except (TypeError, ValueError):
+      raise InvalidTileSelection("Must be an number")
+    tiles = GameRules.for_mode(game.game_mode).tiles(game.level)
+    if square_id < 1 or square_id > tiles:
+      raise InvalidTileSelection(f"Select a number 1-{tiles}")
+    return square_id
 
-      # level 1
-      one_limit = int((_treasury_min * 1.5 * 66) // (68134 - 681.34 * 66))
-      max_bet_level.append(one_limit)
+  @staticmethod
+  def _check_moves(moves: list) -> list:
+    """
+    :return: the moves of select_tiles as (active_game_num, square_id, user_seed)
+    """
+    if not moves or len(moves) > MAX_OPEN_GAMES:
+      raise InvalidTileSelection(f"Select between 1 and {MAX_OPEN_GAMES} tiles")
+    try:
+      moves = [(int(active_game_num), square_id, str(user_seed)) for active_game_num, square_id, user_seed in moves]
+    except (TypeError, ValueError):
+      raise InvalidTileSelection("Each move must be [active_game_num, square_id, user_seed]")
+    slots = [active_game_num for active_game_num, _, _ in moves]
+    if len(set(slots)) != len(slots):
+      raise InvalidGameException("Only one move per game can be sent")
+    return moves
+
+  @staticmethod
+  def _check_cash_out(game: GameModel) -> GameRules:
+    rules = GameRules.for_mode(game.game_mode)
+    if rules.cash_out_level == 0:
+      revert("You are not able to cash out during a promo game")
+    if not rules.can_cash_out(game.level):
+      raise InvalidLevelToCashOut(f'You are not allowed cash out at level: {game.level}')
+    return rules
 
-    elif game_mode == GameMode.HARD:
-      # level 6
-      sixth_limit = int((_treasury_min * 1.5 * 0.13) // (68134 - 681.34 * 0.13))
-      max_bet_level.append(sixth_limit)
+  def _check_auto_climb(self, game: GameModel, square_ids: list, stop_at_level: int = 0) -> list:
+    """
+    :return: the tiles to climb with, as numbers each within the tiles of the level it is played on
+    """
+    rules = GameRules.for_mode(game.game_mode)
+    if rules.cash_out_level == 0:
+      revert("You are not able to auto climb during a promo game")
+    if self._seedChainDB.commit_reveal.get():
+      # every move of the climb would be drawn from the transaction
+      revert("You are not able to auto climb while moves are committed to house seeds, use select_tile")
+    if not isinstance(square_ids, list) or not square_ids or len(square_ids) > MAX_ROW_HEIGHT:
+      raise InvalidTileSelection(f"Select between 1 and {MAX_ROW_HEIGHT} tiles")
+    if 0 < stop_at_level <= game.level:
+      revert(f'The game is on level {game.level} already, there is nothing to climb')
 
-      # level 5
-      fifth_limit = int((_treasury_min * 1.5 * 0.41) // (68134 - 681.34 * 0.41))
-      max_bet_level.append(fifth_limit)
+    try:
+      square_ids = [int(square_id) for square_id in square_ids]
+    except (TypeError, ValueError):
+      raise InvalidTileSelection("Must be an number")
+    for offset, square_id in enumerate(square_ids):
+      tiles = rules.tiles(min(game.level + offset, game.max_level_allowed - 1))
+      if square_id < 1 or square_id > tiles:
+        raise InvalidTileSelection(f"Select a number 1-{tiles}")
+    return square_ids
 
-      # level 4
-      fourth_limit = int((_treasury_min * 1.5 * 1.2) // (68134 - 681.34 * 1.2))
-      max_bet_level.append(fourth_limit)
+  def _check_custom_bet(self, number_of_tiles: int, square_id: int, bet_amount: int, persist: bool = True) -> tuple:
+    """
+    :return: (number_of_tiles, square_id) as numbers
+    """
+    try:
+      square_id = int(square_id)
+    except (TypeError, ValueError):
+      revert("Bet failed returning funds")
+    try:
+      number_of_tiles = int(number_of_tiles)
+    except (TypeError, ValueError):
+      revert("Number of tiles must be a number")
 
-      # level 3
-      third_limit = int((_treasury_min * 1.5 * 3) // (68134 - 681.34 * 3))
-      max_bet_level.append(third_limit)
+    if square_id < 1 or square_id > MAX_CUSTOM_BRICKS:
+      revert("Select a number 1-24")
+    if number_of_tiles not in CUSTOM_TILE_COUNTS:
+      revert("Number of tiles must be either 8, 12, 16, 20, 24")
+    if square_id > number_of_tiles:
+      revert("square selection is greater than number of tiles")
 
-      # level 2
-      second_limit = int((_treasury_min * 1.5 * 11) // (68134 - 681.34 * 11))
-      max_bet_level.append(second_limit)
+    if bet_amount < BET_MIN:
+      revert(f'Invalid Min Bet: Min allowed is {BET_MIN}')
+    max_bet_allowed = self._get_max_bet_custom_game(number_of_tiles, persist)
+    if bet_amount > max_bet_allowed:
+      revert(f'Invalid Max Bet: Max allowed is {max_bet_allowed}')
+    return number_of_tiles, square_id
 
-      # level 1
-      one_limit = int((_treasury_min * 1.5 * 33) // (68134 - 681.34 * 33))
-      max_bet_level.append(one_limit)
+  def _check_session_balance(self, player_address: Address, amount: int) -> int:
+    """
+    :return: the session balance of the player, at least amount
+    """
+    balance = self._sessionDB.balances[player_address]
+    if amount > balance:
+      revert(f'Session balance too low: {balance}')
+    return balance
 
-    return max_bet_level
+  def _check_commit_seed(self) -> int:
+    """
+    :return: the index of the house seed a move sent now is committed to
+    """
+    seed_chain = self._seedChainDB
+    if seed_chain.remaining.get() < 2:
+      revert("No house seed left to commit the move to, try again later")
+    return seed_chain.revealed.get() + 2
 
-  def _validate_action(self, action_model: dict) -> None:
+  # ================================================
+  #  Action cost estimates
+  # ================================================
+  # every estimator takes the player, the ICX sent and the arguments of its action handler, runs the checks of the
+  # handler against the current state and returns the steps of each outcome the action can have, without the
+  # steps charged for the transaction itself. The steps come from the step tables of consts.py, not from running
+  # the handler, so they are an approximation and not a bound, see estimate_action_cost
+  def _estimate_padding(self, game: GameModel, level: int, branch: int, cash_out: bool = False) -> int:
+    return self._move_padding_units(game, level, branch, cash_out) * self._step_padding.unit_cost
+
+  def _estimate_outcome(self, game: GameModel, branch: int, level: int, padded: bool = True,
+                        cash_out: bool = False) -> tuple:
     """
-       Sanity checks for the action model passed in
-       :param action_model: JSON metadata of the game
-       :type action_model: dict
-       :return:
-     """
-    valid_methods = ["create_new_game", "cash_out", "select_tile", "custom_bet"]
-    method_name = action_model["name"]
-    if method_name not in valid_methods:
-      revert(f'There is no valid action method: {method_name} for this game')
+    Steps of one outcome of a move played on level of game
+    :return: (steps without the settlement, SettlementRecord of the outcome or None when it does not settle)
+    """
+    steps = self._step_cost.outcome(game.game_mode, branch, level + 1)
+    if padded:
+      steps += self._estimate_padding(game, level, branch, cash_out)
+    return steps, self._move_outcomes(game, level, cash_out)[branch]
+
+  def _estimate_moves(self, game: GameModel, padded: bool = True) -> dict:
+    # outcomes of a select_tile on game: a loss, and a safe tile or a win on the last level of the game
+    branch = STEP_BRANCH_WIN if game.level + 1 == game.max_level_allowed else STEP_BRANCH_SAFE
+    return {STEP_BRANCH_NAMES[outcome]: self._estimate_outcome(game, outcome, game.level, padded)
+            for outcome in (STEP_BRANCH_LOSE, branch)}
+
+  def _estimate_branches(self, steps: int, moves: dict, session_funded: bool) -> dict:
+    return {name: steps + move_steps + self._estimate_settlement([record], session_funded)
+            for name, (move_steps, record) in moves.items()}
+
+  def _estimate_settlement(self, records: list, session_funded: bool) -> int:
+    # the records of one action reach the roulette score as one settlement, session funded bets go to the ledger
+    records = [record for record in records if record is not None]
+    if not records:
+      return 0
+    if session_funded:
+      return sum(self._estimate_session_settlement(record) for record in records)
+    return sum(self._step_cost.settlement(sum(record.rake for record in batch), sum(record.payout for record in batch))
+               for batch in self._settlement_batches(records, False))
+
+  def _estimate_session_settlement(self, record: SettlementRecord) -> int:
+    ledger = self._get_session_ledger()
+    steps = SESSION_STEP_COST
+    if self._session_epoch_due(ledger):
+      net = ledger["wager"] - ledger["payout"]
+      if net > 0:
+        steps += self._step_cost.settlement(ledger["rake"])
+        ledger = self._new_session_ledger(0, 0)
+      else:
+        ledger = self._new_session_ledger(ledger["rake"], -net)
+    if ledger["payout"] + record.payout - ledger["wager"] - record.wager > self._sessionDB.float_limit.get():
+      steps += self._step_cost.settlement(record.rake, record.payout)
+    return steps
+
+  def _estimate_custom_settlement(self, record: SettlementRecord, session_funded: bool) -> int:
+    if session_funded:
+      return self._estimate_session_settlement(record)
+    if not self._nettingDB.netting_on.get():
+      return self._step_cost.settlement(0, record.payout)
+    ledger = self._get_netting_ledger()
+    steps = NETTING_STEP_COST
+    if self._netting_epoch_due(ledger):
+      net = ledger["wager"] - ledger["payout"]
+      if net > 0:
+        steps += self._step_cost.settlement()
+      ledger = self._new_netting_ledger(max(-net, 0))
+    if ledger["payout"] + record.payout - ledger["wager"] - record.wager <= self._nettingDB.float_limit.get():
+      return steps + (STEP_SCHEDULE_CONTRACT_CALL if record.payout > 0 else 0)
+    return steps + self._step_cost.settlement(0, record.payout)
+
+  def _estimate_pending_move(self, player_address: Address, active_game_num: int) -> dict:
+    # outcomes of the committed move the action resolves first, empty when the slot has none
+    pending = self._seedChainDB.pending_moves[f'{player_address}:{active_game_num}']
+    if not pending:
+      return {}
+    game_id, seed_index, _, _, _, _ = json_loads(pending)
+    game = self._get_game_repository().session(player_address).find(active_game_num)
+    if game is None or game.game_id != game_id:
+      return {}
+    if seed_index > self._seedChainDB.revealed.get():
+      revert(f'The move is waiting for house seed {seed_index}')
+    # the move is resolved from a revealed seed, it is not padded
+    return self._estimate_branches(0, self._estimate_moves(game, False), game.session_funded)
+
+  def _estimate_limits(self) -> int:
+    # the first action reading the bet limits after the refresh window asks the roulette for the treasury and
+    # stores the rebuilt table
+    if self._cached_limits() is not None:
+      return 0
+    limits = self._build_limits(self._get_treasury_min(), False)
+    return STEP_SCHEDULE_CONTRACT_CALL + len(json_dumps(limits).encode()) * STEP_SCHEDULE_SET_BYTE
+
+  def _estimate_session_debit(self, player_address: Address, bet_amount: int, session_funded: bool) -> int:
+    if not session_funded:
+      return 0
+    self._check_session_balance(player_address, bet_amount)
+    return SESSION_STEP_COST
+
+  def _create_new_game_cost(self, player_address: Address, value: int, game_mode: int, bet_amount: int) -> dict:
+    bet_amount, session_funded = self._bet_source(value, bet_amount)
+    self._check_new_game(player_address, bet_amount, game_mode, False)
+    steps = self._step_cost.action('create_new_game')
+    if game_mode != GameMode.JACKPOT:
+      steps += self._estimate_limits()
+    return {'open': steps + self._estimate_session_debit(player_address, bet_amount, session_funded)}
+
+  def _select_tile_cost(self, player_address: Address, value: int, active_game_num: int, square_id: int,
+                        user_seed: str) -> dict:
+    game = self._check_game(player_address, active_game_num)
+    self._check_square(game, square_id)
+    steps = max(self._estimate_pending_move(player_address, active_game_num).values(), default=0)
+    if self._seedChainDB.commit_reveal.get() and game.game_mode != GameMode.JACKPOT:
+      # the move is only recorded, the draw and the game record are left to the move resolving it
+      self._check_commit_seed()
+      return {'commit': steps + COMMIT_MOVE_STEP_COST}
+    steps += self._step_cost.action('select_tile')
+    return self._estimate_branches(steps, self._estimate_moves(game), game.session_funded)
+
+  def _cash_out_cost(self, player_address: Address, value: int, active_game_num: int) -> dict:
+    game = self._check_game(player_address, active_game_num)
+    rules = self._check_cash_out(game)
+    steps = self._step_cost.action('cash_out') + max(
+      self._estimate_pending_move(player_address, active_game_num).values(), default=0)
+    # a cash out settles like a win
+    record = SettlementRecord(game.game_id, game.bet_amount, rules.balance(game.bet_amount, game.level - 1),
+                              game.balance)
+    steps += self._step_cost.outcome(game.game_mode, STEP_BRANCH_WIN, game.level)
+    return {'cash_out': steps + self._estimate_settlement([record], game.session_funded)}
+
+  def _resolve_move_cost(self, player_address: Address, value: int, active_game_num: int) -> dict:
+    branches = self._estimate_pending_move(player_address, active_game_num)
+    if not branches:
+      revert('There is no move waiting for a house seed')
+    steps = self._step_cost.action('resolve_move')
+    return {name: steps + branch_steps for name, branch_steps in branches.items()}
+
+  def _custom_bet_cost(self, player_address: Address, value: int, number_of_tiles: int, square_id: int,
+                       user_seed: str, bet_amount: int) -> dict:
+    bet_amount, session_funded = self._bet_source(value, bet_amount)
+    number_of_tiles, _ = self._check_custom_bet(number_of_tiles, square_id, bet_amount, False)
+    steps = self._step_cost.action('custom_bet') + self._estimate_limits() + \
+            self._estimate_session_debit(player_address, bet_amount, session_funded)
+    netting = not session_funded and self._nettingDB.netting_on.get()
+    unit_cost = self._step_padding.unit_cost
+    branches = dict()
+    for branch, record in self._custom_outcomes(bet_amount, number_of_tiles).items():
+      padding = self._custom_padding_units(bet_amount, number_of_tiles, branch, session_funded, netting) * unit_cost
+      branches[STEP_BRANCH_NAMES[branch]] = steps + self._step_cost.outcome(GameMode.CUSTOM, branch) + padding + \
+                                            self._estimate_custom_settlement(record, session_funded)
+    return branches
+
+  def _auto_climb_cost(self, player_address: Address, value: int, active_game_num: int, square_ids: list,
+                       user_seed: str, stop_at_level: int, cash_out: bool) -> dict:
+    game = self._check_game(player_address, active_game_num)
+    square_ids = self._check_auto_climb(game, square_ids, stop_at_level)
+    rules = GameRules.for_mode(game.game_mode)
+
+    target_level = game.max_level_allowed
+    if 0 < stop_at_level < target_level:
+      target_level = stop_at_level
+    moves = max(min(len(square_ids), target_level - game.level), 0)
+    climbed = game.level + moves
+    # every move draws, each safe tile is charged as if played on the highest level
+    steps = self._step_cost.action('auto_climb') + moves * self._step_cost.action('select_tile') + max(
+      self._estimate_pending_move(player_address, active_game_num).values(), default=0)
+    safe_move = self._step_cost.outcome(game.game_mode, STEP_BRANCH_SAFE, climbed)
+    branches = dict()
+    if moves > 0:
+      final = STEP_BRANCH_WIN if climbed == game.max_level_allowed else STEP_BRANCH_LOSE
+      for branch in sorted({STEP_BRANCH_LOSE, final}):
+        move_steps, record = self._estimate_outcome(game, branch, climbed - 1, True, cash_out)
+        branches[STEP_BRANCH_NAMES[branch]] = steps + (moves - 1) * safe_move + move_steps + \
+                                              self._estimate_settlement([record], game.session_funded)
+    if climbed < game.max_level_allowed:
+      last_level = max(climbed - 1, 0)
+      if cash_out and rules.can_cash_out(climbed):
+        record = SettlementRecord(game.game_id, game.bet_amount, rules.balance(game.bet_amount, climbed - 1),
+                                  rules.balance(game.bet_amount, climbed))
+        branches['cash_out'] = steps + moves * safe_move + \
+                               self._step_cost.outcome(game.game_mode, STEP_BRANCH_WIN, climbed) + \
+                               self._estimate_padding(game, last_level, STEP_BRANCH_WIN, True) + \
+                               self._estimate_settlement([record], game.session_funded)
+      else:
+        branches['safe'] = steps + moves * safe_move + self._estimate_padding(game, last_level, STEP_BRANCH_SAFE)
+    return branches
+
+  def _select_tiles_cost(self, player_address: Address, value: int, moves: list) -> dict:
+    moves = self._check_moves(moves)
+    # a batch of several games is settled in payouts the bet limits allow
+    steps = self._step_cost.action('select_tiles')
+    if len(moves) > 1:
+      steps += self._estimate_limits()
+    commit_reveal = self._seedChainDB.commit_reveal.get()
+    games = list()
+    for active_game_num, square_id, _ in moves:
+      game = self._check_game(player_address, active_game_num)
+      self._check_square(game, square_id)
+      steps += max(self._estimate_pending_move(player_address, active_game_num).values(), default=0)
+      if commit_reveal and game.game_mode != GameMode.JACKPOT:
+        self._check_commit_seed()
+        games.append((game, {'commit': (COMMIT_MOVE_STEP_COST, None)}))
+      else:
+        steps += self._step_cost.action('select_tile')
+        games.append((game, self._estimate_moves(game)))
+
+    # every branch is the batch where each move has that outcome, a move that can not have it takes its
+    # other outcome, the games finished by the batch are settled once
+    branches = dict()
+    for name in {name for _, outcomes in games for name in outcomes}:
+      branch_steps = steps
+      records = list()
+      session_records = list()
+      for game, outcomes in games:
+        outcome = outcomes.get(name) or [outcome for key, outcome in outcomes.items() if key != 'lose'][0]
+        branch_steps += outcome[0]
+        (session_records if game.session_funded else records).append(outcome[1])
+      branches[name] = branch_steps + self._estimate_settlement(records, False) + \
+                       self._estimate_settlement(session_records, True)
+    return branches
 
   # ================================================
   #  External methods
@@ -613,63 +1268,137 @@ class DAOlevels(IconScoreBase):
   @payable
   @external
   def action(self, model: str):
-    if not self._iconBetDB.game_on.get():
-      revert(f'DAOlevels game is turned off')
-
+    # JSON form of the typed externals below, kept for existing clients
     action_model = json_loads(model)
     self._validate_action(action_model)
     method_name = action_model["name"]
+    self._dispatch(method_name, *self._action_args(method_name, action_model["params"]))
 
-    if method_name == "create_new_game":
-      bet_amount = self.msg.value
-      datetime = self.now()
-      player_address = self.msg.sender
-      game_mode = action_model["params"]["game_mode"]
-      self._create_new_game(player_address, bet_amount, datetime, game_mode)
+  @payable
+  @external
+  def create_game(self, mode: int, bet: int = 0) -> None:
+    self._dispatch("create_new_game", mode, bet)
 
-    if method_name == "select_tile":
-      player_address = self.msg.sender
-      active_game_num = action_model["params"]["active_game_num"]
-      square_id = action_model["params"]["square_id"]
-      user_seed = action_model["params"]["user_seed"]
-      self._select_tile(player_address, active_game_num, square_id, user_seed)
+  @external
+  def select_tile(self, slot: int, square: int, seed: str = '') -> None:
+    self._dispatch("select_tile", slot, square, seed)
 
-    if method_name == "cash_out":
-      player_address = self.msg.sender
-      active_game_num = action_model["params"]["active_game_num"]
-      self._process_cash_out(player_address, active_game_num)
+  @external
+  def cash_out(self, slot: int) -> None:
+    self._dispatch("cash_out", slot)
 
-    if method_name == "custom_bet":
-      bet_amount = self.msg.value
-      square_id = action_model["params"]["square_id"]
-      user_seed = action_model["params"]["user_seed"]
-      number_of_tiles = action_model["params"]["number_of_tiles"]
-      self._custom_bet(bet_amount, number_of_tiles, square_id, user_seed)
+  @external
+  def resolve_move(self, slot: int) -> None:
+    self._dispatch("resolve_move", slot)
+
+  @payable
+  @external
+  def custom_bet(self, tiles: int, square: int, seed: str = '', bet: int = 0) -> None:
+    self._dispatch("custom_bet", tiles, square, seed, bet)
+
+  @external(readonly=True)
+  def estimate_action_cost(self, model: str, player_address: Address = None, value: int = 0) -> dict:
+    """
+    Estimates the steps action(model) is charged when player_address sends it now with value ICX, for every
+    outcome it can have. The checks of the action run against the current state and revert like the action would.
+    The estimate is an approximation, not a bound: the step tables it is built from are measured on a fresh bench
+    with the default step schedule, they do not follow the JSON of the ledgers, the game index and the pending
+    moves as it grows, and the work of the roulette score is the unmeasured ROULETTE_CALL_STEP_COST. Send the
+    action with a step limit a tenth above the estimate.
+    :param model: the model passed to action
+    :param player_address: the player sending the action, the caller when not given
+    :param value: ICX sent with the action
+    :return: {"action": name, "branches": {outcome: steps}, "step_limit": the most of them}
+    """
+    if not self._iconBetDB.game_on.get():
+      revert(f'DAOlevels game is turned off')
+    action_model = json_loads(model)
+    self._validate_action(action_model)
+    method_name = action_model["name"]
+    if player_address is None:
+      player_address = self.msg.sender
+    if player_address is None:
+      revert('player_address is required')
+
+    _, estimator_name, _, _ = DAOlevels._ACTIONS[method_name]
+    args = self._action_args(method_name, action_model["params"])
+    # the action external is charged for its whole JSON-RPC data field
+    steps = StepCost.transaction(len(json_dumps({'method': 'action', 'params': {'model': model}}).encode()))
+    branches = {name: steps + branch_steps
+                for name, branch_steps in getattr(self, estimator_name)(player_address, value, *args).items()}
+    response = {
+      'action': method_name,
+      'branches': branches,
+      'step_limit': max(branches.values())
+    }
+    return response
 
   @external(readonly=True)
   def get_open_games_by_address(self, player_address: Address) -> list:
     return self._get_open_games(player_address)
 
+  @external(readonly=True)
+  def get_open_games_by_addresses(self, player_addresses: str, field_mask: int = 0) -> dict:
+    """
+    Returns the open games of several players at once, packed as rows of the fields selected by field_mask.
+    :param player_addresses: comma delimited addresses, at most MAX_BULK_PLAYERS
+    :param field_mask: bit i selects OPEN_GAME_FIELDS[i], 0 selects every field
+    :return: {"fields": [...], "games": {address: [[value, ...], ...]}}
+    """
+    addresses = [address for address in player_addresses.split(",") if address]
+    if len(addresses) > MAX_BULK_PLAYERS:
+      revert(f'No more than {MAX_BULK_PLAYERS} addresses can be queried at once')
+    if field_mask < 0 or field_mask >= 1 << len(OPEN_GAME_FIELDS):
+      revert('Invalid field mask')
+    fields = [field for index, field in enumerate(OPEN_GAME_FIELDS) if field_mask == 0 or field_mask & (1 << index)]
+
+    game_repository = IGameRepository(self._db)
+    games = dict()
+    for address in addresses:
+      try:
+        player_address = Address.from_string(address.strip())
+      except BaseException:
+        revert(f'Invalid address: {address}')
+      games[str(player_address)] = game_repository.get_open_game_summaries(player_address, fields)
+    response = {
+      'fields': fields,
+      'games': games
+    }
+    return response
+
+  @external(readonly=True)
+  def get_finished_games(self, player_address: Address, offset: int = 0, limit: int = 10) -> list:
+    """
+    Returns a page of the player's finished games, newest first.
+    :param player_address: Address of the player
+    :param offset: number of finished games to skip
+    :param limit: page size, at most MAX_FINISHED_GAMES_PAGE
+    :return: list of game details
+    """
+    if offset < 0 or limit < 1 or limit > MAX_FINISHED_GAMES_PAGE:
+      revert(f'Invalid page: offset must be positive and limit between 1 and {MAX_FINISHED_GAMES_PAGE}')
+    game_repository = IGameRepository(self._db)
+    return game_repository.get_finished_games(player_address, offset, limit)
+
+  @external(readonly=True)
+  def get_finished_game_count(self, player_address: Address) -> int:
+    game_repository = IGameRepository(self._db)
+    return game_repository.get_finished_game_count(player_address)
+
   @external(readonly=True)
   def get_level_multipliers(self, game_mode: int = 0) -> str:
-    if game_mode == GameMode.EASY:
-      return json_dumps(ROW_MULTIPLIER)
-    elif game_mode == GameMode.MEDIUM:
-      return json_dumps(MEDIUM_ROW_MULTIPLIER)
-    elif game_mode == GameMode.HARD:
-      return json_dumps(HARD_ROW_MULTIPLIER)
-    elif game_mode == GameMode.JACKPOT:
-      return json_dumps(PROMO_ROW_MULTIPLIER)
+    if GameMode.EASY <= game_mode <= GameMode.JACKPOT:
+      return json_dumps(Payout.to_display(GameRules.for_mode(game_mode).multipliers))
     elif game_mode == GameMode.CUSTOM:
-      return json_dumps(CUSTOM_MULTIPLIER)
+      return json_dumps(Payout.to_display(CUSTOM_MULTIPLIER))
 
   @external(readonly=True)
   def get_max_level_by_bet(self, bet_amount: int, game_mode: int = 0) -> int:
-    return self._get_max_level(bet_amount, game_mode)
+    return self._get_max_level(bet_amount, game_mode, False)
 
   @external(readonly=True)
   def get_max_bet_custom_game(self, number_of_tiles: int) -> int:
-    return self._get_max_bet_custom_game(number_of_tiles)
+    return self._get_max_bet_custom_game(number_of_tiles, False)
 
   @external(readonly=True)
   def get_max_bet_allowed(self, game_mode: int = 0) -> str:
@@ -677,7 +1406,55 @@ class DAOlevels(IconScoreBase):
       li = [PROMO_ENTRY_VALUE, PROMO_ENTRY_VALUE, PROMO_ENTRY_VALUE, PROMO_ENTRY_VALUE, PROMO_ENTRY_VALUE,
             PROMO_ENTRY_VALUE]
       return json_dumps(li)
-    return json_dumps(self._get_max_bet_per_level(game_mode))
+    return json_dumps(self._get_max_bet_per_level(game_mode, False))
+
+  @external(readonly=True)
+  def get_limits(self) -> dict:
+    """
+    Returns the bet limits table used by the bet paths, including the treasury_min and block height it was built from
+    :return: dict
+    """
+    return self._get_limits(False)
+
+  @external
+  def refresh_limits(self) -> None:
+    """
+    Rebuilds the bet limits table from the current roulette treasury. Can only be invoked by the game admin.
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the refresh_limits method')
+    self._build_limits(self._get_treasury_min())
+
+  @external
+  def set_treasury_min(self, treasury_min: int) -> None:
+    """
+    Rebuilds the bet limits table from a pushed treasury_min, saving the roulette call.
+    Can only be invoked by the roulette score or the game admin.
+    :param treasury_min: current treasury minimum of the roulette score
+    :type treasury_min: int
+    """
+    if self.msg.sender != self._iconBetDB.iconbet_score.get() and self.msg.sender != self._game_admin.get():
+      revert('Only the roulette score or the game admin can call the set_treasury_min method')
+    self._build_limits(treasury_min)
+
+  @external
+  def set_limits_refresh_window(self, blocks: int) -> None:
+    """
+    Sets how many blocks the bet limits table stays valid. Can only be invoked by the game admin.
+    :param blocks: number of blocks, at least 1
+    :type blocks: int
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the set_limits_refresh_window method')
+    if blocks < 1:
+      revert('Refresh window must be at least 1 block')
+    self._limitsDB.refresh_window.set(blocks)
+    # the current table carries the old window, rebuild it on the next bet
+    self._limitsDB.limits_table.remove()
+
+  @external(readonly=True)
+  def get_limits_refresh_window(self) -> int:
+    return self._limitsDB.refresh_window.get() or LIMITS_REFRESH_WINDOW
 
   @external(readonly=True)
   def get_min_bet_allowed(self) -> int:
@@ -694,6 +1471,261 @@ class DAOlevels(IconScoreBase):
     if self.msg.sender == self.owner:
       self._iconBetDB.iconbet_score.set(score)
 
+  @external
+  def set_batched_settlement(self, on: bool) -> None:
+    """
+    Settles games with the single settle_bet call of the roulette score instead of take_wager, take_rake and
+    wager_payout. Only turn it on once the roulette score implements settle_bet. The function can only be
+    invoked by score owner.
+    :param on: True to use settle_bet
+    """
+    if self.msg.sender != self.owner:
+      revert('Only the owner can call set_batched_settlement method')
+    self._iconBetDB.batched_settlement.set(on)
+
+  @external(readonly=True)
+  def get_batched_settlement(self) -> bool:
+    return self._iconBetDB.batched_settlement.get()
+
+  @external
+  def set_custom_netting(self, on: bool, epoch_bets: int = 0, float_limit: int = 0) -> None:
+    """
+    Nets custom bets in epochs before they are settled with the roulette score. An epoch lasts one block, or
+    epoch_bets bets when it is set. float_limit is the most DAOlevels may pay out of its own balance above the
+    wagers it holds. The open epoch is closed first. The function can only be invoked by the game admin.
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the set_custom_netting method')
+    if epoch_bets < 0 or float_limit < 0:
+      revert('epoch_bets and float_limit can not be negative')
+    self._nettingDB.ledger.set(json_dumps(self._close_netting_epoch(self._get_netting_ledger())))
+    self._nettingDB.netting_on.set(on)
+    self._nettingDB.epoch_bets.set(epoch_bets)
+    self._nettingDB.float_limit.set(float_limit)
+
+  @external
+  def close_custom_epoch(self) -> None:
+    """
+    Closes the open netting epoch and settles its net wager with the roulette score. The function can only be
+    invoked by the game admin.
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the close_custom_epoch method')
+    self._nettingDB.ledger.set(json_dumps(self._close_netting_epoch(self._get_netting_ledger())))
+
+  @external(readonly=True)
+  def get_custom_netting(self) -> dict:
+    """
+      A function to return the netting settings and the pending exposure of the open epoch
+      :return: dict
+    """
+    ledger = self._get_netting_ledger()
+    response = {
+      'on': self._nettingDB.netting_on.get(),
+      'epoch_bets': self._nettingDB.epoch_bets.get(),
+      'float_limit': self._nettingDB.float_limit.get(),
+      'epoch_block_height': ledger["block_height"],
+      'bets': ledger["bets"],
+      'pending_wager': ledger["wager"],
+      'pending_payout': ledger["payout"],
+      'exposure': max(ledger["payout"] - ledger["wager"], 0)
+    }
+    return response
+
+  @payable
+  @external
+  def deposit(self) -> None:
+    """
+    Adds the ICX sent to the caller's session balance. create_game and custom_bet take a bet from it when
+    they are called with a bet amount and no ICX.
+    """
+    if self.msg.value <= 0:
+      revert('Send the ICX to deposit')
+    self._credit_session(self.msg.sender, self.msg.value, "Deposit")
+
+  @external
+  def withdraw(self, amount: int = 0) -> None:
+    """
+    Sends ICX from the caller's session balance back to their wallet.
+    :param amount: ICX to withdraw, 0 withdraws the whole balance
+    """
+    if amount < 0:
+      revert('amount can not be negative')
+    if amount == 0:
+      amount = self._sessionDB.balances[self.msg.sender]
+      if amount == 0:
+        revert('The session balance is empty')
+    self._debit_session(self.msg.sender, amount, "Withdraw")
+    self.FundTransfer(self.msg.sender, amount, "Withdrawing session balance")
+    self.icx.transfer(self.msg.sender, amount)
+
+  @external(readonly=True)
+  def get_session_balance(self, player_address: Address) -> int:
+    return self._sessionDB.balances[player_address]
+
+  @external
+  def set_session_settlement(self, blocks: int = 0, float_limit: int = 0) -> None:
+    """
+    Sets how many blocks the session ledger collects results before its net is settled with the roulette
+    score, 0 restores the default, and float_limit, the most DAOlevels may pay into session balances above
+    the wagers it took from them. The open ledger is settled first. The function can only be invoked by the
+    game admin.
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the set_session_settlement method')
+    if blocks < 0 or float_limit < 0:
+      revert('blocks and float_limit can not be negative')
+    self._sessionDB.ledger.set(json_dumps(self._close_session_epoch(self._get_session_ledger())))
+    self._sessionDB.settle_blocks.set(blocks)
+    self._sessionDB.float_limit.set(float_limit)
+
+  @external
+  def close_session_epoch(self) -> None:
+    """
+    Settles the net wager of the session ledger with the roulette score. The function can only be invoked by
+    the game admin.
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the close_session_epoch method')
+    self._sessionDB.ledger.set(json_dumps(self._close_session_epoch(self._get_session_ledger())))
+
+  @external(readonly=True)
+  def get_session_ledger(self) -> dict:
+    """
+      A function to return the session settings, the ICX held for session balances and the unsettled ledger
+      :return: dict
+    """
+    ledger = self._get_session_ledger()
+    response = {
+      'settle_blocks': self._sessionDB.settle_blocks.get() or SESSION_SETTLE_BLOCKS,
+      'float_limit': self._sessionDB.float_limit.get(),
+      'total_balances': self._sessionDB.total_balances.get(),
+      'ledger_block_height': ledger["block_height"],
+      'bets': ledger["bets"],
+      'pending_wager': ledger["wager"],
+      'pending_rake': ledger["rake"],
+      'pending_payout': ledger["payout"],
+      'exposure': max(ledger["payout"] - ledger["wager"], 0)
+    }
+    return response
+
+  @external
+  def sweep_expired(self, limit: int = MAX_SWEEP_BATCH) -> int:
+    """
+    Finishes up to limit open games whose last move is older than the game expiry, oldest first. A move committed
+    to a house seed that is revealed is resolved first, as the player would have; a game whose committed move
+    still waits for its seed is left open, since only the house knows its draw. A game without a move, committed
+    or played, has its
+    bet refunded. A game past its first level is cashed out like the player would: the rake is taken and the
+    balance is paid into the player's session balance, from where it can be withdrawn, since the roulette score
+    pays wins to the sender of the transaction. The session float limit does not apply to these payouts.
+    JACKPOT games can not be cashed out, past their first level they are forfeited and settled like a loss.
+    Every game finished emits GameOutcome with OUTCOME_REFUNDED, OUTCOME_CASHED_OUT or OUTCOME_FORFEITED.
+    The function can only be invoked by the game admin.
+    :param limit: most games finished, at most MAX_SWEEP_BATCH
+    :return: number of games finished
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the sweep_expired method')
+    if limit < 1 or limit > MAX_SWEEP_BATCH:
+      revert(f'limit must be between 1 and {MAX_SWEEP_BATCH}')
+
+    self._game_repository = IGameRepository(self._db)
+    game_repository = self._game_repository
+    moved_before = self.now() - game_repository.get_game_expiry() * 1000000
+    expired = game_repository.get_expired_games(
+      moved_before, limit, lambda player_address, slot: self._is_expired(player_address, slot, moved_before))
+    self._sweeping = True
+    for game_id, player_address, active_game_num, started in expired:
+      game = game_repository.get(player_address, active_game_num)
+      bet_amount = game.bet_amount
+      if not self._resolve_pending_move(player_address, active_game_num):
+        continue
+      if game.level == 0:
+        if not game.session_funded:
+          # a refund into the session balance moves no ICX, SessionBalanceChanged records it
+          self.FundTransfer(player_address, bet_amount, "Refunding expired game")
+        self._pay_player(game, bet_amount, "Refunding expired game")
+        self._game_outcome(game, 0, OUTCOME_REFUNDED, bet_amount)
+        game_repository.remove_from_active_game(player_address, active_game_num, game)
+      elif GameRules.for_mode(game.game_mode).can_cash_out(game.level):
+        self._cash_out_game(game_repository, player_address, active_game_num, game)
+      else:
+        self._forfeit_game(game_repository, player_address, active_game_num, game)
+    self._sweeping = False
+    game_repository.flush()
+    self._game_repository = None
+    return len(expired)
+
+  def _is_expired(self, player_address: Address, active_game_num: int, moved_before: int) -> bool:
+    # no move was played or committed on the game since moved_before, and no committed move waits for its seed
+    game = self._get_game_repository().get(player_address, active_game_num)
+    if game.last_move_datetime >= moved_before:
+      return False
+    pending = self._seedChainDB.pending_moves[f'{player_address}:{active_game_num}']
+    if not pending:
+      return True
+    game_id, seed_index, _, _, _, committed = json_loads(pending)
+    if game_id != game.game_id:
+      # left over from a game finished by an earlier sweep
+      return True
+    return committed < moved_before and seed_index <= self._seedChainDB.revealed.get()
+
+  def _forfeit_game(self, game_repository: IGameRepository, player_address: Address, active_game_num: int,
+                    game: GameModel) -> None:
+    # the expired game is settled like a loss
+    self._settle_game(game, game.balance)
+    self._game_outcome(game, game.level, OUTCOME_FORFEITED, 0)
+    game_repository.remove_from_active_game(player_address, active_game_num, game)
+
+  @external
+  def set_game_expiry(self, seconds: int) -> None:
+    """
+    Sets the seconds after the last move of an open game it can be swept, at least MIN_GAME_EXPIRY, 0 restores
+    the default. The function can only be invoked by the game admin.
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the set_game_expiry method')
+    if seconds != 0 and seconds < MIN_GAME_EXPIRY:
+      revert(f'Game expiry must be at least {MIN_GAME_EXPIRY} seconds')
+    IGameRepository(self._db).set_game_expiry(seconds)
+
+  @external(readonly=True)
+  def get_game_expiry(self) -> int:
+    return IGameRepository(self._db).get_game_expiry()
+
+  @external(readonly=True)
+  def get_active_game_count(self) -> int:
+    return IGameRepository(self._db).get_active_game_count()
+
+  @external(readonly=True)
+  def get_exposure(self) -> dict:
+    """
+    Returns the running totals of the open games of each game mode: number of games, sum of bets, sum of
+    balances and sum of the most each game can still pay.
+    :return: dict keyed by game mode
+    """
+    return IGameRepository(self._db).get_exposure()
+
+  @external(readonly=True)
+  def get_oldest_active_games(self, limit: int = 10) -> list:
+    """
+    Returns the oldest open games across all players.
+    :param limit: page size, at most MAX_FINISHED_GAMES_PAGE
+    :return: list of {"game_id", "player_address", "active_game_num", "game_started_datetime"}
+    """
+    if limit < 1 or limit > MAX_FINISHED_GAMES_PAGE:
+      revert(f'limit must be between 1 and {MAX_FINISHED_GAMES_PAGE}')
+    games = list()
+    for game_id, player_address, active_game_num, started in IGameRepository(self._db).get_oldest_active_games(limit):
+      games.append({
+        'game_id': game_id,
+        'player_address': player_address,
+        'active_game_num': active_game_num,
+        'game_started_datetime': started
+      })
+    return games
+
   @external(readonly=True)
   def get_roulette_score(self) -> Address:
     """
@@ -785,23 +1817,187 @@ class DAOlevels(IconScoreBase):
     """
     return self._game_admin.get()
 
+  @external
+  def set_padding_unit_cost(self, steps: int) -> None:
+    """
+      A function to set the number of steps charged for one step padding unit
+      :return: None
+    """
+    if self.msg.sender != self.owner:
+      revert('Only the owner can call set_padding_unit_cost method')
+    if steps < 1:
+      revert('Padding unit cost must be at least 1 step')
+    self._step_padding.set_unit_cost(steps)
+
   @external
   def set_loops(self, loops: int) -> None:
     """
-      A function to set the number of loops required
+      Deprecated: moves are padded from the step cost of their outcomes, see set_padding_unit_cost. The value is
+      only stored for get_loops, so existing admin tooling keeps working
       :return: None
     """
     if self.msg.sender != self.owner:
       revert('Only the owner can call set_loop method')
-    self._consume_step_count.set(loops)
+    VarDB(self._CONSUME_STEP_COUNT, self._db, value_type=int).set(loops)
 
   @external(readonly=True)
   def get_loops(self) -> int:
     """
-      A function to return the number of loops
+      Deprecated: returns the value stored by set_loops, it no longer changes the steps of a move
       :return: int
     """
-    return self._consume_step_count.get()
+    return VarDB(self._CONSUME_STEP_COUNT, self._db, value_type=int).get()
+
+  @external(readonly=True)
+  def get_step_padding(self, game_mode: int = 0, level: int = 0) -> dict:
+    """
+      A function to return the estimated cost of each outcome of a move played on level of a game, bet from the
+      wallet and settled with the roulette score, and the padding applied to it
+      :return: dict
+    """
+    if game_mode < GameMode.EASY or game_mode > GameMode.CUSTOM:
+      revert('Invalid game mode entered')
+    if game_mode == GameMode.CUSTOM:
+      outcomes = self._custom_outcomes(BET_MIN, CUSTOM_TILE_COUNTS[0])
+      levels_played = 0
+    else:
+      if level < 0 or level >= MAX_ROW_HEIGHT:
+        revert('Invalid level entered')
+      bet_amount = PROMO_ENTRY_VALUE if game_mode == GameMode.JACKPOT else BET_MIN
+      game = GameModel(0, self.owner, bet_amount, 0, 0, game_mode, MAX_ROW_HEIGHT, level=level)
+      outcomes = self._move_outcomes(game, level)
+      levels_played = level + 1
+    costs = self._step_cost.move(game_mode, outcomes, levels_played)
+    unit_cost = self._step_padding.unit_cost
+    branches = dict()
+    for branch, cost in costs.items():
+      units = self._padding_units(costs, branch)
+      branches[STEP_BRANCH_NAMES[branch]] = {
+        'cost': cost,
+        'padding_units': units,
+        'padded_cost': cost + units * unit_cost
+      }
+    response = {
+      'game_mode': game_mode,
+      'level': level,
+      'budget': costs[STEP_BRANCH_LOSE],
+      'unit_cost': unit_cost,
+      'branches': branches
+    }
+    return response
+
+  @external
+  def commit_seed_chain(self, commitment: bytes, length: int) -> None:
+    """
+    Commits the house to a chain of length seeds. The house picks a secret s0, hashes it length times,
+    s(i+1) = sha3_256(s(i)), and commits the last hash. The seeds are then revealed backwards, each one hashing
+    to the one revealed before it. A new chain can only be committed once the current one is used up. The
+    function can only be invoked by the game admin.
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the commit_seed_chain method')
+    if len(commitment) != 32 or length < 1:
+      revert('commitment must be a 32 byte hash and length at least 1')
+    seed_chain = self._seedChainDB
+    if seed_chain.remaining.get() > 0:
+      revert(f'{seed_chain.remaining.get()} seeds of the current chain are not revealed yet')
+    seed_chain.tip.set(commitment)
+    seed_chain.remaining.set(length)
+    seed_chain.commitments[seed_chain.revealed.get() + 1] = commitment
+
+  @external
+  def reveal_seed(self, seed: bytes) -> None:
+    """
+    Reveals the next seed of the committed chain, the moves committed to it can then be resolved. The function
+    can only be invoked by the game admin.
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the reveal_seed method')
+    seed_chain = self._seedChainDB
+    if seed_chain.remaining.get() < 1:
+      revert('There is no committed seed left to reveal')
+    if sha3_256(seed) != seed_chain.tip.get():
+      revert('The seed does not hash to the last revealed seed')
+    seed_index = seed_chain.revealed.get() + 1
+    seed_chain.links[seed_index] = seed
+    seed_chain.tip.set(seed)
+    seed_chain.revealed.set(seed_index)
+    seed_chain.remaining.set(seed_chain.remaining.get() - 1)
+
+  @external
+  def set_commit_reveal(self, on: bool) -> None:
+    """
+    With commit-reveal on select_tile commits the move to the house seed after the next one and the player
+    resolves it with resolve_move, or their next move, once the seed is revealed. auto_climb is rejected while it
+    is on. Moves already committed can still be resolved after it is turned off. The function can only be invoked
+    by the game admin.
+    """
+    if self.msg.sender != self._game_admin.get():
+      revert('Only the game admin can call the set_commit_reveal method')
+    self._seedChainDB.commit_reveal.set(on)
+
+  @external(readonly=True)
+  def get_seed_chain(self) -> dict:
+    """
+      A function to return the state of the committed seed chain
+      :return: dict
+    """
+    seed_chain = self._seedChainDB
+    tip = seed_chain.tip.get()
+    response = {
+      'commit_reveal': seed_chain.commit_reveal.get(),
+      'revealed': seed_chain.revealed.get(),
+      'remaining': seed_chain.remaining.get(),
+      'tip': '0x' + tip.hex() if tip else ''
+    }
+    return response
+
+  @external(readonly=True)
+  def get_pending_move(self, player_address: Address, slot: int) -> dict:
+    """
+      A function to return the move of a game slot waiting for a house seed
+      :return: dict, empty when there is none
+    """
+    pending = self._seedChainDB.pending_moves[f'{player_address}:{slot}']
+    if not pending:
+      return {}
+    game_id, seed_index, square_id, user_seed, level, committed = json_loads(pending)
+    response = {
+      'game_id': game_id,
+      'seed_index': seed_index,
+      'square_id': square_id,
+      'user_seed': user_seed,
+      'level': level,
+      'committed_datetime': committed,
+      'revealed': seed_index <= self._seedChainDB.revealed.get()
+    }
+    return response
+
+  @external(readonly=True)
+  def verify_move(self, seed_index: int, game_id: int, level: int, user_seed: str, game_mode: int) -> dict:
+    """
+    Recomputes the draw of a committed move from the values of its MoveCommitted eventlog and checks the house
+    seed it used against the chain: the seed must hash to the seed revealed before it, or to the commitment
+    for the first seed of a chain.
+    :return: dict with the seeds, whether the seed is valid and the drawn tile
+    """
+    if game_mode < GameMode.EASY or game_mode > GameMode.HARD:
+      revert('Invalid game mode entered')
+    if level < 0 or level >= MAX_ROW_HEIGHT:
+      revert(f'level must be between 0 and {MAX_ROW_HEIGHT - 1}')
+    seed_chain = self._seedChainDB
+    if seed_index < 1 or seed_index > seed_chain.revealed.get():
+      revert(f'House seed {seed_index} is not revealed yet')
+    link = seed_chain.links[seed_index]
+    parent = seed_chain.commitments[seed_index] or seed_chain.links[seed_index - 1]
+    response = {
+      'seed': '0x' + link.hex(),
+      'parent': '0x' + parent.hex(),
+      'valid': sha3_256(link) == parent,
+      'random_number': self._seed_draw(link, GameRules.for_mode(game_mode).tiles(level),
+                                       f'{game_id}:{level}:{user_seed}')
+    }
+    return response
 
   def fallback(self):
     pass
@@ -0,0 +1,53 @@
+from iconservice import *
+
+
+class ActiveGameIndexDB:
+  _NAME = 'ActiveGameIndexDB'
+  _GAME_IDS = 'GAME_IDS'
+  _ENTRIES = 'ENTRIES'
+  _CURSOR = 'CURSOR'
+  _COUNT = 'COUNT'
+  _EXPIRY = 'EXPIRY'
+  _EXPOSURE_TOTALS = 'EXPOSURE_TOTALS'
+
+  def __init__(self, db: IconScoreDatabase):
+    name = ActiveGameIndexDB._NAME
+    # holds the id of every game in the order the games were created
+    self._game_ids = ArrayDB(f'{name}_{self._GAME_IDS}', db, value_type=int)
+    # holds the games still open as JSON, removed when the game finishes
+    #   entries[1232] = '["hx...", 2, 1600000000000000]'  (player address, active_game_num, game_started_datetime)
+    self._entries = DictDB(f'{name}_{self._ENTRIES}', db, value_type=str)
+    # holds the position in game_ids before which every game has finished
+    self._cursor = VarDB(f'{name}_{self._CURSOR}', db, value_type=int)
+    # holds the number of games open across all players
+    self._count = VarDB(f'{name}_{self._COUNT}', db, value_type=int)
+    # holds the seconds after which an open game can be swept, 0 = use the default
+    self._expiry = VarDB(f'{name}_{self._EXPIRY}', db, value_type=int)
+    # holds the running totals of the open games of each game mode, one integer per total
+    #   exposure_totals[0]['balances'] = 41000000000000000000
+    #   (open_games, bets, balances, max_payouts: the sum of the most each game can pay)
+    self._exposure_totals = DictDB(f'{name}_{self._EXPOSURE_TOTALS}', db, value_type=int, depth=2)
+
+  @property
+  def game_ids(self):
+    return self._game_ids
+
+  @property
+  def entries(self):
+    return self._entries
+
+  @property
+  def cursor(self):
+    return self._cursor
+
+  @property
+  def count(self):
+    return self._count
+
+  @property
+  def expiry(self):
+    return self._expiry
+
+  @property
+  def exposure_totals(self):
+    return self._exposure_totals
@@ -1,42 +1,154 @@
 from iconservice import *
-from ..scorelib.utils import Utils
+from ..game.game_mode import GameMode
+from ..game.rules import GameRules
 
 
-class GameMode:
-  EASY = 0
-  MEDIUM = 1
-  HARD = 2
-  JACKPOT = 3
-  CUSTOM = 4
+class InvalidGameRecord(Exception):
+  pass
 
-class GameModel:
+
+class GameModel(object):
+  # ================================================
+  # Game of a player as held in memory and in GameDB
+  # ================================================
+  # Storage layout, version 2 (big endian), 62 byte header followed by one byte per level played:
+  #   [0]      version
+  #   [1:9]    game_id
+  #   [9]      level
+  #   [10]     max_level_allowed
+  #   [11]     game_mode
+  #   [12]     active_game_num
+  #   [13:29]  bet_amount
+  #   [29:45]  balance
+  #   [45:53]  game_started_datetime
+  #   [53:61]  last_move_datetime
+  #   [61]     flags, FLAG_SESSION_FUNDED | FLAG_INDEXED
+  #   [62:]    history, high nibble = selected tile, low nibble = random number drawn for that level
+  # The player address is not stored, GameDB is already keyed by it.
+  STORAGE_VERSION = 2
+  STORAGE_HEADER_SIZE = 62
+  _LEGACY_JSON_PREFIX = b'{'
+  # the bet was taken from the player's session balance and the game settles into it
+  FLAG_SESSION_FUNDED = 1
+  # the game is in the global open game index and the exposure totals
+  FLAG_INDEXED = 2
+
+  __slots__ = ['game_id', 'player_address', 'level', 'max_level_allowed', 'game_mode', 'active_game_num',
+               'bet_amount', 'balance', 'game_started_datetime', 'last_move_datetime', 'session_funded', 'indexed',
+               'history']
 
   def __init__(self, game_id: int, player_address: Address, bet_amount: int, active_game_num: int,
-               game_start_datetime: int, game_mode: int, max_level_allowed=0, balance=0, level=0):
-    self._game_id = game_id
-    self._player_address = player_address
-    self._level = level
-    self._bet_amount = bet_amount
-    self._active_game_num = active_game_num
-    self._balance = balance
-    self._game_started_datetime = game_start_datetime
-    self._max_level_allowed = max_level_allowed
-    self._game_mode = game_mode
-    self._bombs = ""
-    self._selected_tiles = ""
+               game_started_datetime: int, game_mode: int, max_level_allowed: int = 0, balance: int = 0,
+               level: int = 0, session_funded: bool = False, indexed: bool = False, history: list = None,
+               last_move_datetime: int = 0):
+    self.game_id = game_id
+    self.player_address = player_address
+    self.level = level
+    self.max_level_allowed = max_level_allowed
+    self.game_mode = game_mode
+    self.active_game_num = active_game_num
+    self.bet_amount = bet_amount
+    self.balance = balance
+    self.game_started_datetime = game_started_datetime
+    # time of the last move played, the game expires that long after it
+    self.last_move_datetime = last_move_datetime or game_started_datetime
+    self.session_funded = session_funded
+    self.indexed = indexed
+    # [selected tile, random number drawn] of every level played
+    self.history = history if history is not None else list()
 
-  def __str__(self):
-    response = {
-      'game_id': self._game_id,
-      'player_address': f"{self._player_address}",
-      'level': self._level,
-      'max_level_allowed': self._max_level_allowed,
-      'bet_amount': self._bet_amount,
-      'balance': self._balance,
-      'active_game_num': self._active_game_num,
-      'game_mode': self._game_mode,
-      'game_started_datetime': self._game_started_datetime,
-      'bombs': self._bombs,
-      'selected_tiles': self._selected_tiles
+  @staticmethod
+  def from_storage(data: bytes, player_address: Address) -> 'GameModel':
+    if not data:
+      raise InvalidGameRecord("Empty game record")
+
+    if data[:1] == GameModel._LEGACY_JSON_PREFIX:
+      return GameModel._from_legacy_storage(data, player_address)
+
+    if data[0] != GameModel.STORAGE_VERSION:
+      raise InvalidGameRecord(f"Unknown game record version: {data[0]}")
+    flags = data[61]
+    history = data[GameModel.STORAGE_HEADER_SIZE:]
+
+    return GameModel(game_id=int.from_bytes(data[1:9], "big"),
+                     player_address=player_address,
+                     level=data[9],
+                     max_level_allowed=data[10],
+                     game_mode=data[11],
+                     active_game_num=data[12],
+                     bet_amount=int.from_bytes(data[13:29], "big"),
+                     balance=int.from_bytes(data[29:45], "big"),
+                     game_started_datetime=int.from_bytes(data[45:53], "big"),
+                     last_move_datetime=int.from_bytes(data[53:61], "big"),
+                     session_funded=bool(flags & GameModel.FLAG_SESSION_FUNDED),
+                     indexed=bool(flags & GameModel.FLAG_INDEXED),
+                     history=[[packed >> 4, packed & 0x0F] for packed in history])
+
+  def to_storage(self) -> bytes:
+    header = bytes([GameModel.STORAGE_VERSION]) + \
+             self.game_id.to_bytes(8, "big") + \
+             bytes([self.level, self.max_level_allowed, self.game_mode, self.active_game_num]) + \
+             self.bet_amount.to_bytes(16, "big") + \
+             self.balance.to_bytes(16, "big") + \
+             self.game_started_datetime.to_bytes(8, "big") + \
+             self.last_move_datetime.to_bytes(8, "big") + \
+             bytes([(GameModel.FLAG_SESSION_FUNDED if self.session_funded else 0) |
+                    (GameModel.FLAG_INDEXED if self.indexed else 0)])
+    history = bytes([(tile << 4) | random_number for tile, random_number in self.history])
+    return header + history
+
+  def to_dict(self) -> dict:
+    """
+    Expands the game into the JSON schema returned by the readonly getters
+    :return: dict with comma delimited bombs and selected_tiles strings
+    """
+    rules = GameRules.for_mode(self.game_mode)
+    selected_tiles = list()
+    bombs = list()
+    for level, (tile, random_number) in enumerate(self.history):
+      selected_tiles.append(str(tile))
+      bombs.append(":".join(str(bomb) for bomb in rules.bombs(level, random_number)))
+
+    return {
+      'game_id': self.game_id,
+      'player_address': f"{self.player_address}",
+      'level': self.level,
+      'max_level_allowed': self.max_level_allowed,
+      'bet_amount': self.bet_amount,
+      'balance': self.balance,
+      'active_game_num': self.active_game_num,
+      'game_mode': self.game_mode,
+      'game_started_datetime': self.game_started_datetime,
+      'bombs': ",".join(bombs),
+      'selected_tiles': ",".join(selected_tiles)
     }
-    return json_dumps(response)
+
+  def __str__(self):
+    return json_dumps(self.to_dict())
+
+  @staticmethod
+  def _from_legacy_storage(data: bytes, player_address: Address) -> 'GameModel':
+    # games started before the packed layout was introduced are stored as JSON
+    json_object = json_loads(data.decode())
+    selected_tiles = str(json_object["selected_tiles"])
+    bombs = str(json_object["bombs"])
+    history = list()
+    if selected_tiles:
+      for tile, bomb in zip(selected_tiles.split(","), bombs.split(",")):
+        bomb_tiles = [int(i) for i in bomb.split(":")]
+        if len(bomb_tiles) == 1:
+          random_number = bomb_tiles[0]
+        else:
+          random_number = [i for i in range(1, len(bomb_tiles) + 2) if i not in bomb_tiles][0]
+        history.append([int(tile), random_number])
+
+    return GameModel(game_id=int(json_object["game_id"]),
+                     player_address=player_address,
+                     level=int(json_object["level"]),
+                     max_level_allowed=int(json_object["max_level_allowed"]),
+                     game_mode=int(json_object["game_mode"]),
+                     active_game_num=int(json_object["active_game_num"]),
+                     bet_amount=int(json_object["bet_amount"]),
+                     balance=int(json_object["balance"]),
+                     game_started_datetime=int(json_object["game_started_datetime"]),
+                     history=history)
@@ -2,7 +2,10 @@ from ..scorelib.id_factory import *
 from ..scorelib.utils import *
 from iconservice import *
 from .game_model import *
+from .active_game_repository import *
 from ..game.consts import *
+from ..game.payout import Payout
+from ..game.rules import GameRules
 
 
 # ================================================
@@ -21,197 +24,365 @@ class IGameRepository(IdFactory):
   # ================================================
   # Interface to the game repository
   # ================================================
+  # Games are read through a GameSession per player, which keeps every record it has read or changed
+  # in memory. Changes are only written to storage by flush, which the SCORE calls once at the end
+  # of the transaction.
   _NAME = 'IGameRepository'
+  # running totals kept of the open games of each game mode
+  _EXPOSURE_FIELDS = ['open_games', 'bets', 'balances', 'max_payouts']
 
   def __init__(self, db: IconScoreDatabase):
     name = IGameRepository._NAME
     super().__init__(name, db)
     self._db = db
-
-  def get(self, player_address, active_game_num: int) -> str:
-    game_repository = GameDB(player_address, self._db)
-    return game_repository.active_games[str(active_game_num)]
-
-  def create(self, player_address: Address, bet_amount: int, datetime: int, game_mode: int, max_level: int) -> str:
-    active_game_num = 0
-    game_id = self.get_uid()
-    game_repository = GameDB(player_address, self._db)
-    active_games = game_repository.active_games
-    num_games_open = game_repository.number_of_open_games.get()
-    if num_games_open == MAX_OPEN_GAMES:
-      raise MaxConcurrentGamesReached(f"No more than 4 concurrent games can be played at once")
-
-    num_games_open = num_games_open + 1
-    for i in range(1, 5):
-      if str(i) not in active_games:
-        active_game_num = i
-        break
-
-    model = GameModel(game_id, player_address, bet_amount, active_game_num, datetime, max_level, game_mode)
-    active_games[str(active_game_num)] = str(model)
-    game_repository.number_of_open_games.set(num_games_open)
-
-    return active_games[str(active_game_num)]
-
-  def increase_level_and_balance(self, player_address: Address, active_game_num: int, random_number: int, square_id: int) -> None:
-    game_db = GameDB(player_address, self._db)
-    active_games = game_db.active_games
-    json_object = json_loads(active_games[str(active_game_num)])
-    new_level = int(json_object["level"]) + 1
-    balance = int(json_object["bet_amount"])
-    game_mode = json_object["game_mode"]
-    bomb = str(json_object["bombs"])
-    selected_tiles = str(json_object["selected_tiles"])
-
-    # check if bomb string is empty
-    if not bomb:
-      json_object["selected_tiles"] = str(square_id)
-      if game_mode != GameMode.HARD:
-        json_object["bombs"] = str(random_number)
-      else:
-        if random_number == 1:
-          json_object["bombs"] = "2:3"
-        elif random_number == 2:
-          json_object["bombs"] = "1:3"
-        elif random_number == 3:
-          json_object["bombs"] = "1:2"
-    else:
-      json_object["selected_tiles"] = selected_tiles + "," + str(square_id)
-      if game_mode != GameMode.HARD:
-        json_object["bombs"] = bomb + "," + str(random_number)
-      else:
-        if random_number == 1:
-          json_object["bombs"] = bomb + "," + "2:3"
-        elif random_number == 2:
-          json_object["bombs"] = bomb + "," + "1:3"
-        elif random_number == 3:
-          json_object["bombs"] = bomb + "," + "1:2"
-
-    new_balance = 0
-    if game_mode == GameMode.EASY:
-      new_balance = (balance * float(ROW_MULTIPLIER[new_level]))
-    elif game_mode == GameMode.MEDIUM:
-      new_balance = (balance * float(MEDIUM_ROW_MULTIPLIER[new_level]))
-    elif game_mode == GameMode.HARD:
-      new_balance = (balance * float(HARD_ROW_MULTIPLIER[new_level]))
-
-    Logger.info(f"New balance is: {new_balance}", "BALANCE")
-    Logger.info(f"New LEVEL is: {new_level}", "LEVEL")
-    json_object["level"] = new_level
-    json_object["balance"] = int(new_balance)
-    game_db.active_games[str(active_game_num)] = json_dumps(json_object)
-
-  def increase_level(self, player_address: Address, active_game_num: int, random_number: int, square_id: int):
-    game_db = GameDB(player_address, self._db)
-    active_games = game_db.active_games
-    json_object = json_loads(active_games[str(active_game_num)])
-    bomb = str(json_object["bombs"])
-    selected_tiles = str(json_object["selected_tiles"])
-    new_level = int(json_object["level"]) + 1
-
-    # check if bomb string is empty
-    if not bomb:
-      json_object["selected_tiles"] = str(square_id)
-      if new_level < 5:
-        json_object["bombs"] = str(random_number)
-      else:
-        if random_number == 1:
-          json_object["bombs"] = "2:3:4"
-        elif random_number == 2:
-          json_object["bombs"] = "1:3:4"
-        elif random_number == 3:
-          json_object["bombs"] = "1:2:4"
-        elif random_number == 4:
-          json_object["bombs"] = "1:2:3"
-    else:
-      json_object["selected_tiles"] = selected_tiles + "," + str(square_id)
-      if new_level < 5:
-        json_object["bombs"] = bomb + "," + str(random_number)
-      else:
-        if random_number == 1:
-          json_object["bombs"] = bomb + "," + "2:3:4"
-        elif random_number == 2:
-          json_object["bombs"] = bomb + "," + "1:3:4"
-        elif random_number == 3:
-          json_object["bombs"] = bomb + "," + "1:2:4"
-        elif random_number == 4:
-          json_object["bombs"] = bomb + "," + "1:2:3"
-
-    json_object["level"] = new_level
-    game_db.active_games[str(active_game_num)] = json_dumps(json_object)
+    self._sessions = dict()
+    self._index = ActiveGameIndexDB(db)
+    # game_mode -> [open games, bets, balances, max payouts] changes written by flush
+    self._exposure_changes = dict()
+
+  def session(self, player_address: Address) -> 'GameSession':
+    key = str(player_address)
+    if key not in self._sessions:
+      self._sessions[key] = GameSession(player_address, self._db)
+    return self._sessions[key]
+
+  def flush(self) -> None:
+    for session in self._sessions.values():
+      session.flush()
+    for game_mode, changes in self._exposure_changes.items():
+      # only the totals that changed are read and written, a safe move only changes the balances
+      totals = self._index.exposure_totals[game_mode]
+      for field, change in zip(IGameRepository._EXPOSURE_FIELDS, changes):
+        if change != 0:
+          totals[field] = totals[field] + change
+    self._exposure_changes = dict()
+
+  def get(self, player_address, active_game_num: int) -> GameModel:
+    return self.session(player_address).get(active_game_num)
+
+  def create(self, player_address: Address, bet_amount: int, datetime: int, game_mode: int,
+             max_level: int, session_funded: bool = False) -> GameModel:
+    session = self.session(player_address)
+    active_game_num = session.free_slot()
+    if active_game_num == 0:
+      raise MaxConcurrentGamesReached(f"No more than {MAX_OPEN_GAMES} concurrent games can be played at once")
+
+    game = GameModel(game_id=self.get_uid(),
+                     player_address=player_address,
+                     bet_amount=bet_amount,
+                     active_game_num=active_game_num,
+                     game_started_datetime=datetime,
+                     game_mode=game_mode,
+                     max_level_allowed=max_level,
+                     session_funded=session_funded,
+                     indexed=True)
+    session.add(active_game_num, game)
+    self._index_add(game.game_id, player_address, active_game_num, datetime)
+    self._change_exposure(game, 1, bet_amount, 0, Payout.max_payout(bet_amount, game_mode, max_level))
+
+    return game
+
+  def climb_level(self, game: GameModel, random_number: int, square_id: int, datetime: int) -> None:
+    # moves a game up one level in memory only, nothing is written until save is called
+    # bombs are derived from the random number and the game rules when the record is read back
+    balance = game.balance
+    game.last_move_datetime = datetime
+    game.history.append([square_id, random_number])
+    game.level += 1
+    game.balance = GameRules.for_mode(game.game_mode).balance(game.bet_amount, game.level)
+    self._change_exposure(game, 0, 0, game.balance - balance, 0)
+
+  def save(self, player_address: Address, active_game_num: int, game: GameModel) -> None:
+    self.session(player_address).put(active_game_num, game)
 
   def get_open_games(self, player_address: Address) -> list:
-    game_db = GameDB(player_address, self._db)
-    active_games = game_db.active_games
-    active_games_list = list()
-
-    for i in range(1, 5):
-      if str(i) in active_games:
-        active_games_list.append(json_loads(active_games[str(i)]))
+    session = self.session(player_address)
+    return [session.get(active_game_num).to_dict() for active_game_num in session.open_slots()]
 
-    return active_games_list
+  def get_open_game_summaries(self, player_address: Address, fields: list) -> list:
+    # one row of the requested fields per open game, a player without open games costs the read of the slot bitmap
+    session = self.session(player_address)
+    return [[getattr(session.get(active_game_num), field) for field in fields]
+            for active_game_num in session.open_slots()]
 
   def get_finished_game_list(self, player_address: Address) -> str:
-    game_db = GameDB(player_address, self._db)
+    game_db = self.session(player_address).game_db
     finished_game_ids = game_db.finish_game_ids.get()
     return finished_game_ids
 
-  def remove_from_active_game(self, player_address: Address, active_game_num: int) -> int:
-    game_db = GameDB(player_address, self._db)
-    active_games = game_db.active_games
-    json_object = json_loads(active_games[str(active_game_num)])
-    game_id = json_object["game_id"]
-
-    # add a new game_id to the concat string
-    finished_game_ids = game_db.finish_game_ids.get()
-    finished_games_append = str(game_id) + "," + str(finished_game_ids)
-    game_db.finish_game_ids.set(finished_games_append)
-
-    # add game details to the finished games record
-    game_db.finished_game_records[str(game_id)] = json_dumps(json_object)
+  def get_finished_games(self, player_address: Address, offset: int, limit: int) -> list:
+    # newest first: the ArrayDB holds every game finished since it was introduced, oldest at index 0,
+    # anything older is still in the legacy comma delimited string which is newest first
+    game_db = self.session(player_address).game_db
+    finished_game_id_list = game_db.finished_game_id_list
+    list_size = len(finished_game_id_list)
+    legacy_game_ids = None
+    finished_games = list()
+
+    for i in range(offset, offset + limit):
+      if i < list_size:
+        game_id = finished_game_id_list[list_size - 1 - i]
+      else:
+        if legacy_game_ids is None:
+          legacy_game_ids = [game_id for game_id in str(game_db.finish_game_ids.get()).split(",") if game_id]
+        if i - list_size >= len(legacy_game_ids):
+          break
+        game_id = int(legacy_game_ids[i - list_size])
+      game = GameModel.from_storage(game_db.finished_game_records[str(game_id)], player_address)
+      finished_games.append(game.to_dict())
+
+    return finished_games
+
+  def get_finished_game_count(self, player_address: Address) -> int:
+    game_db = self.session(player_address).game_db
+    legacy_game_ids = [game_id for game_id in str(game_db.finish_game_ids.get()).split(",") if game_id]
+    return len(game_db.finished_game_id_list) + len(legacy_game_ids)
+
+  def remove_from_active_game(self, player_address: Address, active_game_num: int, game: GameModel = None) -> int:
+    session = self.session(player_address)
+    if game is None:
+      game = session.get(active_game_num)
+    session.finish(active_game_num, game)
+    self._index_remove(game)
+    self._change_exposure(game, -1, -game.bet_amount, -game.balance,
+                          -Payout.max_payout(game.bet_amount, game.game_mode, game.max_level_allowed))
+    return game.game_id
 
-    # reduce active games by 1
-    game_db.number_of_open_games.set(game_db.number_of_open_games.get() - 1)
+  # ================================================
+  # Global index of open games
+  # ================================================
+  def get_active_game_count(self) -> int:
+    return self._index.count.get()
+
+  def get_game_expiry(self) -> int:
+    expiry = self._index.expiry.get()
+    return expiry if expiry > 0 else GAME_EXPIRY
+
+  def set_game_expiry(self, seconds: int) -> None:
+    self._index.expiry.set(seconds)
+
+  def get_oldest_active_games(self, limit: int) -> list:
+    entries, _ = self._walk_index(limit)
+    return entries
+
+  def get_expired_games(self, started_before: int, limit: int, expired) -> list:
+    # the oldest open games started before started_before for which expired(player_address, active_game_num)
+    # holds, the others stay in the index for a later walk
+    entries, cursor = self._walk_index(limit, started_before, expired)
+    if cursor != self._index.cursor.get():
+      self._index.cursor.set(cursor)
+    return entries
+
+  def _walk_index(self, limit: int, started_before: int = None, expired=None) -> tuple:
+    # games are indexed in the order they started, so the walk stops at the first open game too young to expire
+    # finished games before the first open one are skipped for good by moving the cursor past them
+    game_ids = self._index.game_ids
+    size = len(game_ids)
+    position = self._index.cursor.get()
+    cursor = position
+    entries = list()
+    scanned = 0
+    while position < size and len(entries) < limit and scanned < MAX_INDEX_SCAN:
+      game_id = game_ids[position]
+      entry = self._index.entries[str(game_id)]
+      position += 1
+      scanned += 1
+      if not entry:
+        if cursor == position - 1:
+          cursor = position
+        continue
+      player_address, active_game_num, started = json_loads(entry)
+      if started_before is not None and started >= started_before:
+        break
+      player_address = Address.from_string(player_address)
+      if expired is not None and not expired(player_address, active_game_num):
+        continue
+      entries.append([game_id, player_address, active_game_num, started])
+    return entries, cursor
 
-    # lastly remove the game for from the active list
-    active_games.remove(str(active_game_num))
-    return game_id
+  # ================================================
+  # Exposure of the open games per game mode
+  # ================================================
+  def get_exposure(self) -> dict:
+    exposure = dict()
+    for game_mode in [GameMode.EASY, GameMode.MEDIUM, GameMode.HARD, GameMode.JACKPOT]:
+      totals = self._index.exposure_totals[game_mode]
+      exposure[str(game_mode)] = {field: totals[field] for field in IGameRepository._EXPOSURE_FIELDS}
+    return exposure
+
+  def _change_exposure(self, game: GameModel, open_games: int, bets: int, balances: int, max_payouts: int) -> None:
+    # games opened before the index was introduced are not in it, nor in the exposure totals
+    if not game.indexed:
+      return
+    changes = self._exposure_changes.setdefault(game.game_mode, [0, 0, 0, 0])
+    for index, change in enumerate([open_games, bets, balances, max_payouts]):
+      changes[index] += change
+
+  def _index_add(self, game_id: int, player_address: Address, active_game_num: int, started: int) -> None:
+    self._index.game_ids.put(game_id)
+    self._index.entries[str(game_id)] = json_dumps([str(player_address), active_game_num, started])
+    self._index.count.set(self._index.count.get() + 1)
+
+  def _index_remove(self, game: GameModel) -> None:
+    if not game.indexed:
+      return
+    self._index.entries.remove(str(game.game_id))
+    self._index.count.set(self._index.count.get() - 1)
 
   # ================================================
   # Checks
   # ================================================
   def game_exists(self, game_id: int, player_address: Address) -> None:
-    game_repository = GameDB(player_address, self._db)
-    if game_id not in game_repository.active_games:
+    if not self.session(player_address).exists(game_id):
       raise GameNotFoundException(f'Game does not exist: Game id provided: {game_id}')
 
 
+class GameSession(object):
+  # ================================================
+  # Unit of work over the GameDB of one player
+  # ================================================
+  # The occupied slots are kept as a bitmap, bit active_game_num - 1, so free and empty slots are known
+  # without reading them.
+  _BITMAP_WRITTEN = 1 << 8
+
+  def __init__(self, player_address: Address, db: IconScoreDatabase):
+    self._player_address = player_address
+    self._game_db = GameDB(player_address, db)
+    # active_game_num -> game read or changed, None once the game is finished
+    self._games = dict()
+    self._dirty = set()
+    self._finished = list()
+    self._slots = None
+    self._slots_changed = False
+    self._legacy_count = False
+
+  @property
+  def game_db(self) -> 'GameDB':
+    return self._game_db
+
+  @property
+  def slots(self) -> int:
+    if self._slots is None:
+      bitmap = self._game_db.open_slots.get()
+      if bitmap & GameSession._BITMAP_WRITTEN:
+        self._slots = bitmap ^ GameSession._BITMAP_WRITTEN
+      else:
+        # players from before the bitmap only have a count, their slots are read once to build it
+        self._slots = 0
+        self._legacy_count = self._game_db.number_of_open_games.get() > 0
+        if self._legacy_count:
+          for active_game_num in range(1, MAX_OPEN_GAMES + 1):
+            if self._game_db.active_games[str(active_game_num)]:
+              self._slots |= 1 << (active_game_num - 1)
+    return self._slots
+
+  @property
+  def number_of_open_games(self) -> int:
+    return bin(self.slots).count("1")
+
+  def open_slots(self) -> list:
+    slots = self.slots
+    return [active_game_num for active_game_num in range(1, MAX_OPEN_GAMES + 1)
+            if slots & (1 << (active_game_num - 1))]
+
+  def free_slot(self) -> int:
+    # the lowest free slot, 0 when every slot is taken
+    slots = self.slots
+    for active_game_num in range(1, MAX_OPEN_GAMES + 1):
+      if not slots & (1 << (active_game_num - 1)):
+        return active_game_num
+    return 0
+
+  def exists(self, active_game_num: int) -> bool:
+    if not 1 <= active_game_num <= MAX_OPEN_GAMES:
+      return False
+    return bool(self.slots & (1 << (active_game_num - 1)))
+
+  def find(self, active_game_num: int) -> GameModel:
+    # the game in the slot or None, the slot is read once, and not at all when the bitmap shows it empty
+    if active_game_num not in self._games:
+      game = None
+      if self._slots is None or self.exists(active_game_num):
+        data = self._game_db.active_games[str(active_game_num)]
+        game = GameModel.from_storage(data, self._player_address) if data else None
+      self._games[active_game_num] = game
+    return self._games[active_game_num]
+
+  def get(self, active_game_num: int) -> GameModel:
+    game = self.find(active_game_num)
+    if game is None:
+      raise GameNotFoundException(f'Game does not exist: active_game_num provided: {active_game_num}')
+    return game
+
+  def add(self, active_game_num: int, game: GameModel) -> None:
+    self._slots = self.slots | (1 << (active_game_num - 1))
+    self._slots_changed = True
+    self._games[active_game_num] = game
+    self._dirty.add(active_game_num)
+
+  def put(self, active_game_num: int, game: GameModel) -> None:
+    self._games[active_game_num] = game
+    self._dirty.add(active_game_num)
+
+  def finish(self, active_game_num: int, game: GameModel) -> None:
+    self._slots = self.slots & ~(1 << (active_game_num - 1))
+    self._slots_changed = True
+    self._games[active_game_num] = None
+    self._dirty.add(active_game_num)
+    self._finished.append(game)
+
+  def flush(self) -> None:
+    game_db = self._game_db
+    for game in self._finished:
+      # add game details to the finished games record and append the game_id to the history
+      game_db.finished_game_records[str(game.game_id)] = game.to_storage()
+      game_db.finished_game_id_list.put(game.game_id)
+
+    for active_game_num in sorted(self._dirty):
+      game = self._games[active_game_num]
+      if game is None:
+        game_db.active_games.remove(str(active_game_num))
+      else:
+        game_db.active_games[str(active_game_num)] = game.to_storage()
+
+    if self._slots_changed:
+      game_db.open_slots.set(self._slots | GameSession._BITMAP_WRITTEN)
+      if self._legacy_count:
+        game_db.number_of_open_games.remove()
+        self._legacy_count = False
+      self._slots_changed = False
+
+    self._dirty = set()
+    self._finished = list()
+
+
 class GameDB(object):
   _NAME = 'GameDB'
   _ACTIVE_GAMES_DICT = 'active_games'
   _FINISHED_GAME_DICT = 'finished_games'
+  _FINISHED_GAME_LIST = 'finished_game_id_list'
   _NUMBER_OF_GAMES = 'number_of_open_games'
+  _OPEN_SLOTS = 'open_slots'
 
   def __init__(self, player_address: Address, db: IconScoreDatabase):
     name = GameDB._NAME
     # Holds the game objects of all current games player has in progress
-    self._active_games = DictDB(f'{name}_{self._ACTIVE_GAMES_DICT}_{player_address}', db, value_type=str, depth=1)
+    # values are GameModel storage records, games stored before the packed layout are still JSON and read as such
+    self._active_games = DictDB(f'{name}_{self._ACTIVE_GAMES_DICT}_{player_address}', db, value_type=bytes, depth=1)
     # Holds a record of all games player has finished
     # [0] = holds all game object wih game_id as the key
-    # [1] = holds a comma delimited string of all game ids history as the key
-    # open._finished_game_records[1232] =
-    #   {
-    #    "game_id": "0x759c",
-    #    "player_address": "hxe7af5fcfd8dfc67530a01a0e403882687528dfcb",
-    #    "status": "NOT_STARTED",
-    #    "level": "0x0",
-    #    "bet_amount": "0xa"
-    #   },
-    self._finished_game_records = DictDB(f'{name}_{self._FINISHED_GAME_DICT}_{player_address}', db, value_type=str)
+    # [1] = holds the game ids in the order they finished
+    # [2] = legacy comma delimited string of game ids finished before [1] was introduced, no longer written
+    # open._finished_game_records[1232] = GameModel storage record of the game as it was when it finished
+    self._finished_game_records = DictDB(f'{name}_{self._FINISHED_GAME_DICT}_{player_address}', db, value_type=bytes)
     # open._finished_game_ids[history] = "1121, 1212, 1212, 1212, 1212, 1212, 1212, 1221"
     self._finished_game_ids = VarDB(f'{name}_{self._FINISHED_GAME_DICT}_{player_address}', db, value_type=str)
-    # Holds a record of the running total of concurrent games currently open
+    # open._finished_game_id_list = [1121, 1212, 1221]
+    self._finished_game_id_list = ArrayDB(f'{name}_{self._FINISHED_GAME_LIST}_{player_address}', db, value_type=int)
+    # Holds a record of the running total of concurrent games currently open, replaced by open_slots
     self._number_of_games = VarDB(f'{name}_{self._NUMBER_OF_GAMES}_{player_address}', db, value_type=int)
+    # Holds the bitmap of the slots with a game open, bit active_game_num - 1, bit 8 is set once written
+    self._open_slots = VarDB(f'{name}_{self._OPEN_SLOTS}_{player_address}', db, value_type=int)
 
   @property
   def active_games(self):
@@ -225,6 +396,14 @@ class GameDB(object):
   def finish_game_ids(self):
     return self._finished_game_ids
 
+  @property
+  def finished_game_id_list(self):
+    return self._finished_game_id_list
+
   @property
   def number_of_open_games(self):
     return self._number_of_games
+
+  @property
+  def open_slots(self):
+    return self._open_slots
@@ -4,10 +4,12 @@ from iconservice import *
 class IconBetDB:
   _GAME_ON = "game_on"
   _ROULETTE_SCORE = 'roulette_score'
+  _BATCHED_SETTLEMENT = 'batched_settlement'
 
   def __init__(self, db: IconScoreDatabase) -> None:
     self._game_on = VarDB(self._GAME_ON, db, value_type=bool)
     self._iconbet_score = VarDB(self._ROULETTE_SCORE, db, value_type=Address)
+    self._batched_settlement = VarDB(self._BATCHED_SETTLEMENT, db, value_type=bool)
 
   @property
   def game_on(self):
@@ -16,3 +18,7 @@ class IconBetDB:
   @property
   def iconbet_score(self):
     return self._iconbet_score
+
+  @property
+  def batched_settlement(self):
+    return self._batched_settlement
@@ -0,0 +1,29 @@
+from iconservice import *
+
+
+class LimitsDB:
+  _NAME = 'LimitsDB'
+  _LIMITS_TABLE = 'LIMITS_TABLE'
+  _REFRESH_WINDOW = 'REFRESH_WINDOW'
+
+  def __init__(self, db: IconScoreDatabase):
+    name = LimitsDB._NAME
+    # holds the cached bet limits table as JSON
+    #   {
+    #    "treasury_min": 2500000000000000000000,
+    #    "block_height": 1200,
+    #    "refresh_window": 1800,
+    #    "levels": {"0": [...], "1": [...], "2": [...]},
+    #    "custom": {"8": ..., "12": ..., "16": ..., "20": ..., "24": ...}
+    #   }
+    self._limits_table = VarDB(f'{name}_{self._LIMITS_TABLE}', db, value_type=str)
+    # holds the number of blocks a limits table stays valid, 0 = use the default
+    self._refresh_window = VarDB(f'{name}_{self._REFRESH_WINDOW}', db, value_type=int)
+
+  @property
+  def limits_table(self):
+    return self._limits_table
+
+  @property
+  def refresh_window(self):
+    return self._refresh_window
@@ -0,0 +1,42 @@
+from iconservice import *
+
+
+class NettingDB:
+  _NAME = 'NettingDB'
+  _NETTING_ON = 'NETTING_ON'
+  _EPOCH_BETS = 'EPOCH_BETS'
+  _FLOAT_LIMIT = 'FLOAT_LIMIT'
+  _LEDGER = 'LEDGER'
+
+  def __init__(self, db: IconScoreDatabase):
+    name = NettingDB._NAME
+    # holds whether custom bets are netted before they are settled with the roulette score
+    self._netting_on = VarDB(f'{name}_{self._NETTING_ON}', db, value_type=bool)
+    # holds the number of bets after which an epoch closes, 0 = an epoch lasts one block
+    self._epoch_bets = VarDB(f'{name}_{self._EPOCH_BETS}', db, value_type=int)
+    # holds the most DAOlevels may have paid out of its own balance above the wagers it holds
+    self._float_limit = VarDB(f'{name}_{self._FLOAT_LIMIT}', db, value_type=int)
+    # holds the ledger of the open epoch as JSON
+    #   {
+    #    "block_height": 1200,
+    #    "bets": 14,
+    #    "wager": 3000000000000000000,
+    #    "payout": 2400000000000000000
+    #   }
+    self._ledger = VarDB(f'{name}_{self._LEDGER}', db, value_type=str)
+
+  @property
+  def netting_on(self):
+    return self._netting_on
+
+  @property
+  def epoch_bets(self):
+    return self._epoch_bets
+
+  @property
+  def float_limit(self):
+    return self._float_limit
+
+  @property
+  def ledger(self):
+    return self._ledger
@@ -0,0 +1,59 @@
+from iconservice import *
+
+
+class SeedChainDB:
+  _NAME = 'SeedChainDB'
+  _COMMIT_REVEAL = 'COMMIT_REVEAL'
+  _TIP = 'TIP'
+  _REVEALED = 'REVEALED'
+  _REMAINING = 'REMAINING'
+  _LINKS = 'LINKS'
+  _COMMITMENTS = 'COMMITMENTS'
+  _PENDING_MOVES = 'PENDING_MOVES'
+
+  def __init__(self, db: IconScoreDatabase):
+    name = SeedChainDB._NAME
+    # holds whether select_tile moves wait for a later house seed instead of drawing straight away
+    self._commit_reveal = VarDB(f'{name}_{self._COMMIT_REVEAL}', db, value_type=bool)
+    # holds the hash the next revealed seed must hash to, the last revealed seed or the chain commitment
+    self._tip = VarDB(f'{name}_{self._TIP}', db, value_type=bytes)
+    # holds the number of seeds revealed over all chains, the index of the last revealed seed
+    self._revealed = VarDB(f'{name}_{self._REVEALED}', db, value_type=int)
+    # holds the number of seeds of the current chain not revealed yet
+    self._remaining = VarDB(f'{name}_{self._REMAINING}', db, value_type=int)
+    # holds every revealed seed by index, starting at 1
+    self._links = DictDB(f'{name}_{self._LINKS}', db, value_type=bytes)
+    # holds the commitment of each chain by the index of its first seed
+    self._commitments = DictDB(f'{name}_{self._COMMITMENTS}', db, value_type=bytes)
+    # holds the move waiting for a seed of each game slot as JSON
+    #   pending_moves["hx...:2"] = '[1232, 57, 3, "user seed", 2, 1600000000000000]'
+    #   (game_id, seed index, square_id, user_seed, level, time the move was committed)
+    self._pending_moves = DictDB(f'{name}_{self._PENDING_MOVES}', db, value_type=str)
+
+  @property
+  def commit_reveal(self):
+    return self._commit_reveal
+
+  @property
+  def tip(self):
+    return self._tip
+
+  @property
+  def revealed(self):
+    return self._revealed
+
+  @property
+  def remaining(self):
+    return self._remaining
+
+  @property
+  def links(self):
+    return self._links
+
+  @property
+  def commitments(self):
+    return self._commitments
+
+  @property
+  def pending_moves(self):
+    return self._pending_moves
@@ -0,0 +1,50 @@
+from iconservice import *
+
+
+class SessionDB:
+  _NAME = 'SessionDB'
+  _BALANCES = 'BALANCES'
+  _TOTAL_BALANCES = 'TOTAL_BALANCES'
+  _SETTLE_BLOCKS = 'SETTLE_BLOCKS'
+  _FLOAT_LIMIT = 'FLOAT_LIMIT'
+  _LEDGER = 'LEDGER'
+
+  def __init__(self, db: IconScoreDatabase):
+    name = SessionDB._NAME
+    # holds the prepaid balance of each player, bets are taken from it and results paid into it
+    self._balances = DictDB(f'{name}_{self._BALANCES}', db, value_type=int)
+    # holds the sum of every player balance, ICX DAOlevels holds on behalf of the players
+    self._total_balances = VarDB(f'{name}_{self._TOTAL_BALANCES}', db, value_type=int)
+    # holds the number of blocks after which the ledger is settled, 0 = SESSION_SETTLE_BLOCKS
+    self._settle_blocks = VarDB(f'{name}_{self._SETTLE_BLOCKS}', db, value_type=int)
+    # holds the most DAOlevels may have paid into balances above the wagers it took from them
+    self._float_limit = VarDB(f'{name}_{self._FLOAT_LIMIT}', db, value_type=int)
+    # holds the results of the session funded bets not yet settled with the roulette score as JSON
+    #   {
+    #    "block_height": 1200,
+    #    "bets": 14,
+    #    "wager": 3000000000000000000,
+    #    "rake": 200000000000000000,
+    #    "payout": 2400000000000000000
+    #   }
+    self._ledger = VarDB(f'{name}_{self._LEDGER}', db, value_type=str)
+
+  @property
+  def balances(self):
+    return self._balances
+
+  @property
+  def total_balances(self):
+    return self._total_balances
+
+  @property
+  def settle_blocks(self):
+    return self._settle_blocks
+
+  @property
+  def float_limit(self):
+    return self._float_limit
+
+  @property
+  def ledger(self):
+    return self._ledger
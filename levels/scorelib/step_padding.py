@@ -0,0 +1,35 @@
+from iconservice import *
+
+
+class StepPadding:
+  """ StepPadding burns steps in fixed cost units so different code paths can be charged the same. """
+
+  _NAME = '_STEP_PADDING'
+  # every unit hashes a 32 byte digest, so every unit is charged the same number of steps
+  _SEED = bytes(32)
+
+  def __init__(self, var_key: str, db: IconScoreDatabase, default_unit_cost: int):
+    self._name = var_key + StepPadding._NAME
+    self._unit_cost = VarDB(f'{self._name}_unit_cost', db, int)
+    self._default_unit_cost = default_unit_cost
+
+  @property
+  def unit_cost(self) -> int:
+    return self._unit_cost.get() or self._default_unit_cost
+
+  def set_unit_cost(self, unit_cost: int) -> None:
+    self._unit_cost.set(unit_cost)
+
+  def units(self, budget: int, spent: int) -> int:
+    # number of units that brings spent up to budget, rounded up
+    missing = budget - spent
+    if missing <= 0:
+      return 0
+    unit_cost = self.unit_cost
+    return (missing + unit_cost - 1) // unit_cost
+
+  @staticmethod
+  def burn(units: int) -> None:
+    digest = StepPadding._SEED
+    for _ in range(units):
+      digest = sha3_256(digest)
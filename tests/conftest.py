@@ -0,0 +1,73 @@
+"""
+Fixtures running DAOlevels on the bench LocalChain, see bench/local_chain.py and bench/iconservice.
+
+The bench directory goes first on sys.path so `iconservice` resolves to the offline stand-in.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'bench'), ROOT]
+
+import pytest
+
+from daolevels_env import DAOlevelsEnv
+from iconservice import json_dumps
+from levels.main import DAOlevels
+from local_chain import ICX
+
+
+@pytest.fixture
+def env() -> DAOlevelsEnv:
+  return DAOlevelsEnv(players=4)
+
+
+@pytest.fixture
+def player(env):
+  return env.players[0]
+
+
+class Draws:
+  """ Replaces the draws of DAOlevels._get_random with queued numbers, the real draw is used once they run out. """
+
+  def __init__(self, monkeypatch):
+    self.queue = list()
+    draw = DAOlevels._get_random
+
+    def get_random(score, brick_count: int, user_seed: str = '') -> int:
+      if self.queue and score._reveal_seed is None:
+        return self.queue.pop(0)
+      return draw(score, brick_count, user_seed)
+
+    monkeypatch.setattr(DAOlevels, '_get_random', get_random)
+
+  def push(self, *numbers: int) -> 'Draws':
+    self.queue.extend(numbers)
+    return self
+
+
+@pytest.fixture
+def draws(monkeypatch) -> Draws:
+  return Draws(monkeypatch)
+
+
+def ok(result):
+  assert result.status, result.error
+  return result
+
+
+def outcomes(result) -> list:
+  # (outcome, payout) of every GameOutcome eventlog of the transaction
+  return [(event.args[4], event.args[5]) for event in result.events if event.name == 'GameOutcome']
+
+
+def roulette_totals(env) -> tuple:
+  return env.roulette.wagers, env.roulette.rake, env.roulette.payouts
+
+
+
+def estimate(env, player, name: str, params: dict, value: int = 0) -> dict:
+  # estimate_action_cost of action(model) sent by player
+  model = json_dumps({'name': name, 'params': params})
+  return env.query('estimate_action_cost', {'model': model, 'player_address': player, 'value': value})
@@ -0,0 +1,85 @@
+import pytest
+
+from conftest import ICX, estimate, ok, outcomes, roulette_totals
+from daolevels_env import MODES, DAOlevelsEnv
+from iconservice import IconScoreException
+from levels.game.consts import *
+
+
+@pytest.fixture
+def env() -> DAOlevelsEnv:
+  return DAOlevelsEnv(players=2, commit_reveal_seeds=20)
+
+
+def pending_move(env, player, slot) -> dict:
+  return env.query('get_pending_move', {'player_address': player, 'slot': slot})
+
+
+def reveal_until(env, seed_index: int) -> None:
+  while env.query('get_seed_chain')['revealed'] < seed_index:
+    ok(env.reveal_seed())
+
+
+def test_move_waits_for_its_house_seed(env, player):
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  result = ok(env.select_tile(player, slot, 1, 'seed'))
+  assert [event.name for event in result.events] == ['MoveCommitted']
+
+  move = pending_move(env, player, slot)
+  assert not move['revealed']
+  assert not env.resolve_move(player, slot).status
+
+  reveal_until(env, move['seed_index'])
+  result = ok(env.resolve_move(player, slot))
+  assert pending_move(env, player, slot) == {}
+
+  # the draw can be checked against the chain from the values of MoveCommitted
+  verified = env.query('verify_move', {'seed_index': move['seed_index'], 'game_id': move['game_id'], 'level': 0,
+                                       'user_seed': 'seed', 'game_mode': MODES['easy']})
+  assert verified['valid']
+  bomb_placed_on = [event.args[0] for event in result.events if event.name == 'SelectedSquareResult'][0]
+  assert verified['random_number'] == bomb_placed_on
+
+
+def test_next_move_resolves_the_pending_one_first(env, player):
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  ok(env.select_tile(player, slot, 1))
+  reveal_until(env, pending_move(env, player, slot)['seed_index'])
+  result = ok(env.select_tile(player, slot, 2))
+
+  names = [event.name for event in result.events]
+  assert names[0] == 'SelectedSquareResult'
+  if outcomes(result)[0][0] == OUTCOME_SAFE:
+    assert names[-1] == 'MoveCommitted'
+  else:
+    assert roulette_totals(env) == (ICX, 0, 0)
+
+
+def test_move_skips_the_seed_that_may_be_in_the_mempool(env, player):
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  revealed = env.query('get_seed_chain')['revealed']
+  ok(env.select_tile(player, slot, 1))
+  assert pending_move(env, player, slot)['seed_index'] == revealed + 2
+
+  ok(env.reveal_seed())
+  assert not env.resolve_move(player, slot).status
+  ok(env.reveal_seed())
+  ok(env.resolve_move(player, slot))
+
+
+def test_auto_climb_is_rejected(env, player):
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  assert not env.auto_climb(player, slot, [1, 1]).status
+  with pytest.raises(IconScoreException):
+    estimate(env, player, 'auto_climb', {'active_game_num': slot, 'square_ids': [1, 1], 'user_seed': ''})
+
+
+def test_reveal_must_hash_to_the_chain(env):
+  assert not env.chain.invoke(env.owner, env.score, 'reveal_seed', {'seed': bytes(32)}).status
+
+
+def test_jackpot_games_draw_straight_away(env, player):
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['jackpot'], PROMO_ENTRY_VALUE)))
+  result = ok(env.select_tile(player, slot, 1))
+  assert outcomes(result)
+  assert pending_move(env, player, slot) == {}
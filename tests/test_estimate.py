@@ -0,0 +1,116 @@
+import pytest
+
+from calibrate_steps import ForcedDraws, draw_for, new_env, new_player
+from conftest import ICX, estimate, ok
+from daolevels_env import MODES
+from iconservice import json_dumps
+from levels.game.consts import *
+from levels.game.step_cost import StepCost
+
+# actions sent to a player with one EASY game on level 0 in slot 1, none of them can go through
+INVALID = [
+  ('create_new_game', {'game_mode': 9}, ICX),
+  ('create_new_game', {'game_mode': MODES['easy']}, 1),
+  ('create_new_game', {'game_mode': MODES['jackpot']}, ICX),
+  ('select_tile', {'active_game_num': 1, 'square_id': 9, 'user_seed': ''}, 0),
+  ('select_tile', {'active_game_num': 1, 'square_id': 'a', 'user_seed': ''}, 0),
+  ('select_tile', {'active_game_num': 2, 'square_id': 1, 'user_seed': ''}, 0),
+  ('select_tiles', {'moves': [[1, 1, ''], [1, 2, '']]}, 0),
+  ('select_tiles', {'moves': [[1, 9, '']]}, 0),
+  ('cash_out', {'active_game_num': 1}, 0),
+  ('resolve_move', {'active_game_num': 1}, 0),
+  ('custom_bet', {'number_of_tiles': 7, 'square_id': 1, 'user_seed': ''}, ICX),
+  ('custom_bet', {'number_of_tiles': 8, 'square_id': 9, 'user_seed': ''}, ICX),
+  ('custom_bet', {'number_of_tiles': 8, 'square_id': 1, 'user_seed': ''}, 10 ** 9 * ICX),
+  ('auto_climb', {'active_game_num': 1, 'square_ids': [9, 9], 'user_seed': ''}, 0),
+  ('auto_climb', {'active_game_num': 1, 'square_ids': ['a'], 'user_seed': ''}, 0),
+  ('auto_climb', {'active_game_num': 1, 'square_ids': [], 'user_seed': ''}, 0),
+  ('auto_climb', {'active_game_num': 1, 'square_ids': [1] * 7, 'user_seed': ''}, 0),
+]
+
+
+@pytest.mark.parametrize('name, params, value', INVALID)
+def test_estimate_reverts_where_the_action_does(env, player, name, params, value):
+  ok(env.create_game(player, MODES['easy'], ICX))
+  with pytest.raises(Exception):
+    estimate(env, player, name, params, value)
+  assert not env.action(player, name, params, value).status
+
+
+def test_estimate_of_a_valid_action(env, player):
+  ok(env.create_game(player, MODES['easy'], ICX))
+  result = estimate(env, player, 'auto_climb', {'active_game_num': 1, 'square_ids': [1, 2], 'user_seed': ''})
+  assert set(result['branches']) == {'lose', 'safe'}
+  assert result['step_limit'] == max(result['branches'].values())
+
+
+class Played:
+  """ Actions estimated and then played with their draws forced, every one recorded with what it was charged """
+
+  def __init__(self, **env_args):
+    self.env = new_env(**env_args)
+    self.charged = list()
+
+  def play(self, player, name: str, params: dict, value: int, branch: str, draws: list = ()):
+    model = json_dumps({'name': name, 'params': params})
+    transaction = StepCost.transaction(len(json_dumps({'method': 'action', 'params': {'model': model}}).encode()))
+    estimated = estimate(self.env, player, name, params, value)['branches'][branch] - transaction
+    with ForcedDraws() as forced:
+      for number in draws:
+        forced.push(number)
+      result = ok(self.env.action(player, name, params, value))
+    self.charged.append((name, branch, result.metrics['steps'], estimated))
+    return result
+
+  def open(self, game_mode: int, climbed: int = 0):
+    player = new_player(self.env)
+    bet_amount = 2 * ICX
+    with ForcedDraws() as forced:
+      for level in range(climbed):
+        forced.push(draw_for(game_mode, level, MAX_ROW_HEIGHT, 1, STEP_BRANCH_SAFE))
+      slot = self.env.new_game_slot(ok(self.env.create_game(player, game_mode, bet_amount)))
+      for _ in range(climbed):
+        ok(self.env.select_tile(player, slot, 1))
+    return player, slot
+
+
+def move(slot: int) -> dict:
+  return {'active_game_num': slot, 'square_id': 1, 'user_seed': ''}
+
+
+@pytest.mark.parametrize('env_args', [{}, {'batched_settlement': True}, {'session_deposit': 1000 * ICX}])
+def test_estimate_is_within_a_tenth_of_the_steps_charged(env_args):
+  # the steps are metered on games none of the constants was calibrated on, see estimate_action_cost
+  played = Played(**env_args)
+  for game_mode in (MODES['medium'], MODES['hard']):
+    for level in range(MAX_ROW_HEIGHT):
+      for branch in (STEP_BRANCH_SAFE, STEP_BRANCH_LOSE, STEP_BRANCH_WIN):
+        number = draw_for(game_mode, level, MAX_ROW_HEIGHT, 1, branch)
+        if number:
+          player, slot = played.open(game_mode, level)
+          played.play(player, 'select_tile', move(slot), 0, STEP_BRANCH_NAMES[branch], [number])
+    for level in range(2, MAX_ROW_HEIGHT - 1):
+      player, slot = played.open(game_mode, level)
+      played.play(player, 'cash_out', {'active_game_num': slot}, 0, 'cash_out')
+    for branches, name in (([STEP_BRANCH_SAFE] * 2, 'safe'), ([STEP_BRANCH_SAFE, STEP_BRANCH_LOSE], 'lose')):
+      player, slot = played.open(game_mode, 1)
+      params = {'active_game_num': slot, 'square_ids': [1] * 4, 'user_seed': '', 'stop_at_level': 3,
+                'cash_out': False}
+      draws = [draw_for(game_mode, 1 + index, MAX_ROW_HEIGHT, 1, branch) for index, branch in enumerate(branches)]
+      played.play(player, 'auto_climb', params, 0, name, draws)
+  for branch in (STEP_BRANCH_SAFE, STEP_BRANCH_LOSE):
+    player, first = played.open(MODES['medium'], 2)
+    second = played.env.new_game_slot(ok(played.env.create_game(player, MODES['hard'], 2 * ICX)))
+    draws = [draw_for(MODES['medium'], 2, MAX_ROW_HEIGHT, 1, branch), draw_for(MODES['hard'], 0, MAX_ROW_HEIGHT, 1, branch)]
+    played.play(player, 'select_tiles', {'moves': [[first, 1, ''], [second, 1, '']]}, 0, STEP_BRANCH_NAMES[branch],
+                draws)
+  for number_of_tiles in (CUSTOM_TILE_COUNTS[1], CUSTOM_TILE_COUNTS[-1]):
+    for branch, number in (('lose', 1), ('win', 2)):
+      params = {'number_of_tiles': number_of_tiles, 'square_id': 1, 'user_seed': ''}
+      value = 3 * ICX
+      if played.env.session:
+        params, value = dict(params, bet_amount=value), 0
+      played.play(new_player(played.env), 'custom_bet', params, value, branch, [number])
+
+  short = [charged for charged in played.charged if charged[2] > charged[3] + charged[3] // 10]
+  assert not short, short
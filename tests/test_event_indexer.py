@@ -0,0 +1,33 @@
+from daolevels_env import MODES, DAOlevelsEnv
+from export_eventlogs import EventlogExporter
+from indexer.event_indexer import EventIndexer, OPEN
+from run_benchmark import Benchmark
+
+
+def test_indexer_rebuilds_the_open_games(tmp_path):
+  env = DAOlevelsEnv(players=4)
+  exporter = EventlogExporter(str(tmp_path / 'blocks'), blocks_per_file=50)
+  env.chain.listeners.append(exporter)
+  Benchmark(env).run([MODES['easy'], MODES['hard'], MODES['custom']], 20, 'select')
+  # leave a game open on every player
+  for player in env.players:
+    slot = env.new_game_slot(env.create_game(player, MODES['medium'], 10 ** 18))
+    env.select_tile(player, slot, 1)
+  exporter.flush()
+
+  indexer = EventIndexer(str(tmp_path / 'games.sqlite'))
+  indexer.index_directory(str(tmp_path / 'blocks'))
+  rows = indexer._connection.execute(
+    'SELECT player_address, game_id, level, balance FROM games WHERE status = ?', (OPEN,)).fetchall()
+  indexed = sorted((player, game_id, level, int(balance)) for player, game_id, level, balance in rows)
+  finished = indexer._connection.execute(
+    'SELECT player_address, COUNT(*) FROM games WHERE status != ? AND game_id > 0 GROUP BY player_address',
+    (OPEN,)).fetchall()
+  indexer.close()
+
+  assert sorted(finished) == sorted((str(player), env.query('get_finished_game_count', {'player_address': player}))
+                                    for player in env.players)
+
+  on_chain = sorted((str(player), game['game_id'], game['level'], game['balance']) for player in env.players
+                    for game in env.query('get_open_games_by_address', {'player_address': player}))
+  assert on_chain and indexed == on_chain
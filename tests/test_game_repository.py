@@ -0,0 +1,75 @@
+import pytest
+
+from iconservice import Address, AddressPrefix, IconScoreDatabase, json_dumps
+from levels.game.consts import *
+from levels.repository.game_model import GameModel, GameMode
+from levels.repository.game_repository import IGameRepository
+from local_chain import ICX, Metrics
+
+PLAYER = Address(AddressPrefix.EOA, bytes(range(20)))
+
+
+@pytest.fixture
+def metrics() -> Metrics:
+  return Metrics()
+
+
+@pytest.fixture
+def db(metrics) -> IconScoreDatabase:
+  return IconScoreDatabase(Address(AddressPrefix.CONTRACT, bytes(20)), metrics)
+
+
+def open_game(db, game_mode: int = GameMode.EASY) -> GameModel:
+  repository = IGameRepository(db)
+  game = repository.create(PLAYER, ICX, 1, game_mode, MAX_ROW_HEIGHT)
+  repository.flush()
+  return game
+
+
+def test_exposure_totals_of_each_mode(db):
+  open_game(db, GameMode.EASY)
+  open_game(db, GameMode.HARD)
+  repository = IGameRepository(db)
+  repository.remove_from_active_game(PLAYER, 1)
+  repository.flush()
+
+  exposure = repository.get_exposure()
+  assert list(exposure[str(GameMode.EASY)].values()) == [0, 0, 0, 0]
+  assert exposure[str(GameMode.HARD)]['open_games'] == 1
+  assert exposure[str(GameMode.HARD)]['bets'] == ICX
+  assert repository.get_active_game_count() == 1
+
+
+def test_game_opened_before_the_index_is_left_out_of_the_totals(db):
+  # a game of the JSON layout, stored before the index and the packed layout were introduced
+  game = GameModel(7, PLAYER, ICX, 1, 1, GameMode.EASY, MAX_ROW_HEIGHT)
+  repository = IGameRepository(db)
+  repository.session(PLAYER).add(1, game)
+  repository.flush()
+  repository.session(PLAYER).game_db.active_games['1'] = json_dumps(game.to_dict())
+
+  repository = IGameRepository(db)
+  game = repository.get(PLAYER, 1)
+  repository.climb_level(game, 2, 1, 2)
+  repository.save(PLAYER, 1, game)
+  repository.flush()
+  repository = IGameRepository(db)
+  repository.remove_from_active_game(PLAYER, 1)
+  repository.flush()
+  assert list(repository.get_exposure()[str(GameMode.EASY)].values()) == [0, 0, 0, 0]
+  assert repository.get_active_game_count() == 0
+
+
+def test_safe_move_only_writes_the_game_and_the_balances_total(db, metrics):
+  open_game(db)
+  repository = IGameRepository(db)
+  game = repository.get(PLAYER, 1)
+  before = metrics.snapshot()
+  repository.climb_level(game, 2, 1, 2)
+  repository.save(PLAYER, 1, game)
+  repository.flush()
+
+  # the game record and one integer total, read once, no index or slot bookkeeping
+  assert metrics.since(before)['writes'] == 2
+  assert metrics.since(before)['reads'] == 1
+  assert repository.get_exposure()[str(GameMode.EASY)]['balances'] == game.balance
@@ -0,0 +1,91 @@
+import pytest
+
+from conftest import ICX, ok, outcomes, roulette_totals
+from daolevels_env import MODES, DAOlevelsEnv
+from levels.game.consts import *
+from levels.game.payout import Payout
+from levels.game.rules import GameRules
+
+
+@pytest.fixture
+def env() -> DAOlevelsEnv:
+  return DAOlevelsEnv(players=2, session_deposit=10 * ICX)
+
+
+def balance(env, player) -> int:
+  return env.query('get_session_balance', {'player_address': player})
+
+
+def test_bets_are_taken_from_and_paid_into_the_session_balance(env, player, draws):
+  wallet = env.chain.balance_of(player)
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  assert balance(env, player) == 9 * ICX
+
+  draws.push(2)
+  ok(env.select_tile(player, slot, 1))
+  ok(env.cash_out(player, slot))
+  payout = GameRules.for_mode(MODES['easy']).balance(ICX, 1)
+  assert balance(env, player) == 9 * ICX + payout
+  # nothing moved on chain, the ledger holds the result
+  assert env.chain.balance_of(player) == wallet
+  assert roulette_totals(env) == (0, 0, 0)
+  ledger = env.query('get_session_ledger')
+  assert (ledger['bets'], ledger['pending_wager'], ledger['pending_payout']) == (1, ICX, payout)
+
+
+def test_session_custom_bet(env, player, draws):
+  draws.push(1, 2)
+  ok(env.custom_bet(player, 8, 1, ICX))
+  ok(env.custom_bet(player, 8, 1, ICX))
+  assert balance(env, player) == 8 * ICX + Payout.custom(ICX, 8)
+
+
+def test_bet_over_the_session_balance_reverts(env, player):
+  assert not env.create_game(player, MODES['easy'], 11 * ICX).status
+  assert balance(env, player) == 10 * ICX
+
+
+def test_withdraw(env, player):
+  wallet = env.chain.balance_of(player)
+  ok(env.chain.invoke(player, env.score, 'withdraw', {'amount': 4 * ICX}))
+  assert balance(env, player) == 6 * ICX
+  assert env.chain.balance_of(player) == wallet + 4 * ICX
+  ok(env.chain.invoke(player, env.score, 'withdraw'))
+  assert balance(env, player) == 0
+  assert not env.chain.invoke(player, env.score, 'withdraw').status
+
+
+def test_ledger_settles_its_net_wager(env, player, draws):
+  draws.push(1)
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  ok(env.select_tile(player, slot, 1))
+  ok(env.chain.invoke(env.owner, env.score, 'close_session_epoch'))
+
+  assert roulette_totals(env) == (ICX, 0, 0)
+  assert env.query('get_session_ledger')['bets'] == 0
+
+
+def test_net_payout_is_carried_into_the_next_ledger(env, player, draws):
+  draws.push(2)
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  ok(env.select_tile(player, slot, 1))
+  ok(env.cash_out(player, slot))
+  ok(env.chain.invoke(env.owner, env.score, 'close_session_epoch'))
+
+  payout = GameRules.for_mode(MODES['easy']).balance(ICX, 1)
+  assert roulette_totals(env) == (0, 0, 0)
+  assert env.query('get_session_ledger')['pending_payout'] == payout - ICX
+
+
+def test_bet_over_the_float_limit_is_settled_straight_away(env, player, draws):
+  ok(env.chain.invoke(env.owner, env.score, 'set_session_settlement', {'float_limit': 0}))
+  draws.push(2)
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  ok(env.select_tile(player, slot, 1))
+  result = ok(env.cash_out(player, slot))
+
+  payout = GameRules.for_mode(MODES['easy']).balance(ICX, 1)
+  assert outcomes(result) == [(OUTCOME_CASHED_OUT, payout)]
+  # the roulette pays the player's wallet, the session balance only lost the bet
+  assert roulette_totals(env) == (ICX, 0, payout)
+  assert balance(env, player) == 9 * ICX
@@ -0,0 +1,172 @@
+from conftest import ICX, ok, outcomes, roulette_totals
+from daolevels_env import MODES, DAOlevelsEnv
+from levels.game.consts import *
+from levels.game.payout import Payout
+from levels.game.rules import GameRules
+
+
+def open_game(env, player, game_mode: int = MODES['easy'], bet_amount: int = ICX) -> int:
+  return env.new_game_slot(ok(env.create_game(player, game_mode, bet_amount)))
+
+
+def test_lost_game_sends_the_wager_to_the_roulette(env, player, draws):
+  slot = open_game(env, player)
+  roulette_balance = env.chain.balance_of(env.roulette.address)
+  draws.push(1)
+  result = ok(env.select_tile(player, slot, 1))
+
+  assert outcomes(result) == [(OUTCOME_LOST, 0)]
+  assert roulette_totals(env) == (ICX, 0, 0)
+  assert env.chain.balance_of(env.roulette.address) == roulette_balance + ICX
+  assert env.query('get_open_games_by_address', {'player_address': player}) == []
+
+
+def test_cash_out_takes_the_rake_of_the_level_below(env, player, draws):
+  slot = open_game(env, player)
+  draws.push(2, 2)
+  ok(env.select_tile(player, slot, 1))
+  ok(env.select_tile(player, slot, 1))
+  player_balance = env.chain.balance_of(player)
+  result = ok(env.cash_out(player, slot))
+
+  rules = GameRules.for_mode(MODES['easy'])
+  payout = rules.balance(ICX, 2)
+  assert outcomes(result) == [(OUTCOME_CASHED_OUT, payout)]
+  assert roulette_totals(env) == (ICX, rules.balance(ICX, 1), payout)
+  assert env.chain.balance_of(player) == player_balance + payout
+
+
+def test_won_game_pays_the_top_level(env, player, draws):
+  slot = open_game(env, player)
+  draws.push(*[2] * MAX_ROW_HEIGHT)
+  for _ in range(MAX_ROW_HEIGHT - 1):
+    ok(env.select_tile(player, slot, 1))
+  result = ok(env.select_tile(player, slot, 1))
+
+  rules = GameRules.for_mode(MODES['easy'])
+  payout = rules.balance(ICX, MAX_ROW_HEIGHT)
+  assert outcomes(result) == [(OUTCOME_WON, payout)]
+  assert roulette_totals(env) == (ICX, rules.balance(ICX, MAX_ROW_HEIGHT - 1), payout)
+
+
+def test_jackpot_promo_part_is_paid_by_daolevels(env, player, draws):
+  bet_amount = PROMO_ENTRY_VALUE
+  slot = open_game(env, player, MODES['jackpot'], bet_amount)
+  # safe on single bomb rows is any other tile, on three bomb rows only the drawn one
+  draws.push(2, 2, 2, 2, 1, 1)
+  for _ in range(MAX_ROW_HEIGHT - 1):
+    ok(env.select_tile(player, slot, 1))
+  score_balance = env.chain.balance_of(env.score)
+  player_balance = env.chain.balance_of(player)
+  result = ok(env.select_tile(player, slot, 1))
+
+  payout = Payout.apply(bet_amount, PROMO_ROW_MULTIPLIER[MAX_ROW_HEIGHT])
+  from_roulette = Payout.apply(bet_amount, PROMO_IB_TREASURY_MULTIPLIER)
+  assert outcomes(result) == [(OUTCOME_JACKPOT, payout)]
+  assert env.roulette.payouts == from_roulette
+  # the wager leaves for the roulette with the settlement
+  assert env.chain.balance_of(env.score) == score_balance - bet_amount - (payout - from_roulette)
+  assert env.chain.balance_of(player) == player_balance + payout
+
+
+def test_batched_settlement_settles_a_game_with_one_call(draws):
+  env = DAOlevelsEnv(players=1, batched_settlement=True)
+  player = env.players[0]
+  slot = open_game(env, player)
+  draws.push(2)
+  ok(env.select_tile(player, slot, 1))
+  ok(env.cash_out(player, slot))
+
+  rules = GameRules.for_mode(MODES['easy'])
+  assert env.roulette.settlements == 1
+  assert roulette_totals(env) == (ICX, 0, rules.balance(ICX, 1))
+
+
+def test_custom_bet(env, player, draws):
+  draws.push(3, 4)
+  lost = ok(env.custom_bet(player, 8, 3, ICX))
+  won = ok(env.custom_bet(player, 8, 3, ICX))
+
+  payout = Payout.custom(ICX, 8)
+  assert outcomes(lost) == [(OUTCOME_LOST, 0)]
+  assert outcomes(won) == [(OUTCOME_WON, payout)]
+  assert roulette_totals(env) == (2 * ICX, 0, payout)
+
+
+def test_netting_pays_wins_from_daolevels_and_settles_the_net(draws):
+  env = DAOlevelsEnv(players=1, netting_epoch_bets=3)
+  player = env.players[0]
+  payout = Payout.custom(ICX, 8)
+  draws.push(1, 2, 2)
+  score_balance = env.chain.balance_of(env.score)
+  for _ in range(3):
+    ok(env.custom_bet(player, 8, 1, ICX))
+  # one loss and two wins are held in the ledger, DAOlevels paid the wins
+  assert roulette_totals(env) == (0, 0, 0)
+  assert env.chain.balance_of(env.score) == score_balance + 3 * ICX - 2 * payout
+
+  ok(env.chain.invoke(env.owner, env.score, 'close_custom_epoch'))
+  assert roulette_totals(env) == (3 * ICX - 2 * payout, 0, 0)
+
+
+def test_select_tiles_settles_the_batch_as_one_record(draws):
+  env = DAOlevelsEnv(players=1, batched_settlement=True)
+  player = env.players[0]
+  slots = [open_game(env, player) for _ in range(3)]
+  draws.push(1, 2, 1)
+  result = ok(env.select_tiles(player, [[slot, 1, ''] for slot in slots]))
+
+  assert [outcome for outcome, _ in outcomes(result)] == [OUTCOME_LOST, OUTCOME_SAFE, OUTCOME_LOST]
+  assert env.roulette.settlements == 1
+  assert roulette_totals(env) == (2 * ICX, 0, 0)
+  open_games = env.query('get_open_games_by_address', {'player_address': player})
+  assert [game['active_game_num'] for game in open_games] == [slots[1]]
+
+
+def test_select_tiles_splits_a_batch_paying_more_than_one_game_can(draws):
+  env = DAOlevelsEnv(players=1, batched_settlement=True)
+  player = env.players[0]
+  # bets only allowed to reach level 1, a safe tile wins the game
+  bet_amount = 600 * ICX
+  slots = [open_game(env, player, bet_amount=bet_amount) for _ in range(3)]
+  # the treasury shrinks while the games are open
+  ok(env.chain.invoke(env.owner, env.score, 'set_treasury_min', {'treasury_min': 30000 * ICX}))
+  payout = GameRules.for_mode(MODES['easy']).balance(bet_amount, 1)
+  max_payout = env.query('get_limits')['max_payout']
+  assert payout <= max_payout < 2 * payout
+
+  draws.push(2, 1, 2)
+  result = ok(env.select_tiles(player, [[slot, 1, ''] for slot in slots]))
+  assert [outcome for outcome, _ in outcomes(result)] == [OUTCOME_WON, OUTCOME_LOST, OUTCOME_WON]
+  # the lost game rides along with the first win, the second win is settled on its own
+  assert env.roulette.settlements == 2
+  assert roulette_totals(env) == (3 * bet_amount, 0, 2 * payout)
+
+
+def test_auto_climb_cashes_out_after_the_climb(env, player, draws):
+  slot = open_game(env, player)
+  draws.push(2, 2, 2)
+  result = ok(env.auto_climb(player, slot, [1, 1, 1, 1], stop_at_level=3, cash_out=True))
+
+  payout = GameRules.for_mode(MODES['easy']).balance(ICX, 3)
+  assert outcomes(result)[-1] == (OUTCOME_CASHED_OUT, payout)
+  assert env.roulette.payouts == payout
+
+
+def test_auto_climb_with_nothing_to_climb_reverts(env, player, draws):
+  slot = open_game(env, player)
+  draws.push(2)
+  ok(env.select_tile(player, slot, 1))
+  assert not env.auto_climb(player, slot, [1, 1], stop_at_level=1).status
+  assert env.query('get_open_games_by_address', {'player_address': player})[0]['level'] == 1
+
+
+def test_failed_settlement_reverts_the_move(env, player, draws):
+  slot = open_game(env, player)
+  draws.push(2, 2)
+  ok(env.select_tile(player, slot, 1))
+  ok(env.select_tile(player, slot, 1))
+  # the roulette can not pay, the cash out reverts and the game stays open
+  env.chain._balances[env.roulette.address] = 0
+  assert not env.cash_out(player, slot).status
+  assert env.query('get_open_games_by_address', {'player_address': player})[0]['level'] == 2
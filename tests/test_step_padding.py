@@ -0,0 +1,58 @@
+import pytest
+
+from calibrate_steps import StepCalibration
+from daolevels_env import MODES
+from iconservice import Context, set_context
+from levels.game.consts import *
+from levels.scorelib.step_padding import StepPadding
+from local_chain import ICX, Metrics
+
+SETTLEMENTS = [
+  {},
+  {'batched_settlement': True},
+  {'session_deposit': 1000 * ICX},
+  {'netting_epoch_bets': 100}
+]
+
+
+def roulette_allowance(env_args: dict, game_mode: int) -> int:
+  # work the padding charges the settlement calls of a loss with, the roulette of the bench does none
+  if 'session_deposit' in env_args or ('netting_epoch_bets' in env_args and game_mode == MODES['custom']):
+    return 0
+  calls = 1 if 'batched_settlement' in env_args else 1 + (game_mode != MODES['custom'])
+  return calls * ROULETTE_CALL_STEP_COST
+
+
+@pytest.mark.parametrize('env_args', SETTLEMENTS)
+@pytest.mark.parametrize('game_mode', list(MODES.values()))
+def test_no_outcome_the_player_keeps_costs_less_than_a_loss(env_args, game_mode):
+  calibration = StepCalibration(**env_args)
+  states = dict()
+  for move in calibration.moves(game_mode):
+    states.setdefault(move.state, dict()).setdefault(move.branch, list()).append(move.steps)
+
+  for state, branches in states.items():
+    lose = max(branches.pop(STEP_BRANCH_LOSE))
+    kept = [steps for steps_list in branches.values() for steps in steps_list]
+    # a step limit letting the cheapest outcome the player keeps through lets a loss through too
+    assert lose <= min(kept), state
+    # the padding stays within a few units of the loss once the work of the roulette is left out
+    assert max(kept) - lose - roulette_allowance(env_args, game_mode) < 4 * PADDING_UNIT_COST, state
+
+
+def test_a_padding_unit_is_charged_its_cost(env):
+  # a unit hashes a 32 byte digest, the schedule charges the api call and a tenth more for the 32 bytes
+  assert Metrics.api_call('sha3_256', 32) == PADDING_UNIT_COST
+  set_context(Context(env.chain, None, None, env.chain.block_height, env.chain.timestamp))
+  try:
+    steps = env.chain.metrics.steps
+    StepPadding.burn(7)
+    assert env.chain.metrics.steps - steps == 7 * PADDING_UNIT_COST
+  finally:
+    set_context(None)
+
+
+def test_loops_are_kept_for_existing_tooling(env):
+  assert env.chain.invoke(env.owner, env.score, 'set_loops', {'loops': 5}).status
+  assert env.query('get_loops') == 5
+  assert not env.chain.invoke(env.players[0], env.score, 'set_loops', {'loops': 1}).status
@@ -0,0 +1,163 @@
+from conftest import ICX, ok, outcomes, roulette_totals
+from daolevels_env import MODES, DAOlevelsEnv
+from levels.game.consts import *
+from levels.game.rules import GameRules
+
+
+def expire(env) -> None:
+  ok(env.chain.invoke(env.owner, env.score, 'set_game_expiry', {'seconds': MIN_GAME_EXPIRY}))
+  env.chain.timestamp += (MIN_GAME_EXPIRY + 10) * 1000000
+
+
+def sweep(env):
+  return ok(env.chain.invoke(env.owner, env.score, 'sweep_expired'))
+
+
+def test_untouched_game_is_refunded(env, player):
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  wallet = env.chain.balance_of(player)
+  expire(env)
+  result = sweep(env)
+
+  assert outcomes(result) == [(OUTCOME_REFUNDED, ICX)]
+  assert env.chain.balance_of(player) == wallet + ICX
+  assert roulette_totals(env) == (0, 0, 0)
+  assert env.query('get_open_games_by_address', {'player_address': player}) == []
+  assert env.query('get_active_game_count') == 0
+
+
+def test_session_funded_game_is_refunded_into_the_session_balance():
+  env = DAOlevelsEnv(players=1, session_deposit=10 * ICX)
+  player = env.players[0]
+  env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  expire(env)
+  result = sweep(env)
+
+  assert outcomes(result) == [(OUTCOME_REFUNDED, ICX)]
+  # no ICX leaves DAOlevels, so no FundTransfer is logged
+  assert [event.name for event in result.events if event.name == 'FundTransfer'] == []
+  assert env.query('get_session_balance', {'player_address': player}) == 10 * ICX
+
+
+def test_only_the_admin_can_sweep(env, player):
+  expire(env)
+  assert not env.chain.invoke(player, env.score, 'sweep_expired').status
+
+
+def test_expiry_has_a_floor(env):
+  assert not env.chain.invoke(env.owner, env.score, 'set_game_expiry', {'seconds': MIN_GAME_EXPIRY - 1}).status
+  ok(env.chain.invoke(env.owner, env.score, 'set_game_expiry', {'seconds': 0}))
+  assert env.query('get_game_expiry') == GAME_EXPIRY
+
+
+def test_expiry_runs_from_the_last_move(env, player, draws):
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  expire(env)
+  draws.push(2)
+  ok(env.select_tile(player, slot, 1))
+  assert outcomes(sweep(env)) == []
+
+  env.chain.timestamp += (MIN_GAME_EXPIRY + 10) * 1000000
+  assert [outcome for outcome, _ in outcomes(sweep(env))] == [OUTCOME_CASHED_OUT]
+
+
+def test_young_games_are_not_swept(env, player):
+  env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  assert outcomes(sweep(env)) == []
+  assert env.query('get_active_game_count') == 1
+
+
+def test_exposure_follows_open_games(env, player, draws):
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  draws.push(2)
+  ok(env.select_tile(player, slot, 1))
+  exposure = env.query('get_exposure')[str(MODES['easy'])]
+  assert exposure['open_games'] == 1
+  assert exposure['bets'] == ICX
+  assert exposure['balances'] == env.query('get_open_games_by_address', {'player_address': player})[0]['balance']
+
+  expire(env)
+  sweep(env)
+  exposure = env.query('get_exposure')[str(MODES['easy'])]
+  assert list(exposure.values()) == [0, 0, 0, 0]
+
+
+def test_game_past_its_first_level_is_cashed_out_into_the_session_balance(draws):
+  # a treasury deep enough for a HARD game of 1 ICX to reach level 6
+  env = DAOlevelsEnv(players=1, treasury_min=10 ** 7 * ICX)
+  player = env.players[0]
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['hard'], ICX)))
+  draws.push(*[1] * 5)
+  for _ in range(5):
+    ok(env.select_tile(player, slot, 1))
+  wallet = env.chain.balance_of(player)
+  expire(env)
+  result = sweep(env)
+
+  rules = GameRules.for_mode(MODES['hard'])
+  payout = rules.balance(ICX, 5)
+  assert outcomes(result) == [(OUTCOME_CASHED_OUT, payout)]
+  assert [event.args[1] for event in result.events if event.name == 'GameOutcome'] == [player]
+  # the roulette would pay the admin sending the sweep, the balance is held for the player instead
+  assert roulette_totals(env) == (0, 0, 0)
+  assert env.chain.balance_of(player) == wallet
+  assert env.query('get_session_balance', {'player_address': player}) == payout
+  ledger = env.query('get_session_ledger')
+  assert (ledger['pending_wager'], ledger['pending_rake'], ledger['pending_payout']) == \
+         (ICX, rules.balance(ICX, 4), payout)
+
+  ok(env.chain.invoke(player, env.score, 'withdraw'))
+  assert env.chain.balance_of(player) == wallet + payout
+
+
+def test_jackpot_game_past_its_first_level_is_forfeited(env, player, draws):
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['jackpot'], PROMO_ENTRY_VALUE)))
+  draws.push(2)
+  ok(env.select_tile(player, slot, 1))
+  expire(env)
+  result = sweep(env)
+
+  assert outcomes(result) == [(OUTCOME_FORFEITED, 0)]
+  assert roulette_totals(env) == (PROMO_ENTRY_VALUE, 0, 0)
+  assert env.query('get_session_balance', {'player_address': player}) == 0
+
+
+def test_committed_move_with_a_revealed_seed_is_resolved_first():
+  env = DAOlevelsEnv(players=1, commit_reveal_seeds=10)
+  player = env.players[0]
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  ok(env.select_tile(player, slot, 1))
+  for _ in range(2):
+    ok(env.reveal_seed())
+  expire(env)
+  result = sweep(env)
+
+  # the move is played as the player would have, a safe tile leaves a game that is then cashed out
+  codes = [outcome for outcome, _ in outcomes(result)]
+  assert codes in ([OUTCOME_LOST], [OUTCOME_SAFE, OUTCOME_CASHED_OUT])
+  assert env.query('get_pending_move', {'player_address': player, 'slot': slot}) == {}
+  assert env.query('get_active_game_count') == 0
+
+
+def test_committed_move_waiting_for_its_seed_survives_the_sweep():
+  env = DAOlevelsEnv(players=1, commit_reveal_seeds=10)
+  player = env.players[0]
+  slot = env.new_game_slot(ok(env.create_game(player, MODES['easy'], ICX)))
+  ok(env.select_tile(player, slot, 1))
+  ok(env.reveal_seed())
+  wallet = env.chain.balance_of(player)
+  expire(env)
+  result = sweep(env)
+
+  # only the house knows the draw, finishing the game now would hand it a free option on the move
+  assert outcomes(result) == []
+  assert env.chain.balance_of(player) == wallet
+  assert roulette_totals(env) == (0, 0, 0)
+  assert env.query('get_pending_move', {'player_address': player, 'slot': slot})['revealed'] is False
+  assert env.query('get_active_game_count') == 1
+  assert env.query('get_oldest_active_games')[0]['active_game_num'] == slot
+
+  # once the seed is revealed the move is resolved and the game finished
+  ok(env.reveal_seed())
+  codes = [outcome for outcome, _ in outcomes(sweep(env))]
+  assert codes in ([OUTCOME_LOST], [OUTCOME_SAFE, OUTCOME_CASHED_OUT])